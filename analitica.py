@@ -0,0 +1,178 @@
+## MÉTRICAS DE RENDIMIENTO PRECALCULADAS PARA EL INFORME (TABLA metricas_rendimiento)
+# POR TICKER Y PARA LA CARTERA COMPLETA (TICKER_CARTERA), EN ARS Y EN USD:
+#   twr:          RENDIMIENTO PONDERADO POR TIEMPO, ENCADENANDO LOS RETORNOS ENTRE FOTOS DE datos_historicos_cedears
+#   xirr:         RENDIMIENTO PONDERADO POR DINERO (TASA ANUAL) CON LAS COMPRAS DE cedears Y LA TENENCIA ACTUAL
+#   max_drawdown: MAYOR CAÍDA DESDE UN MÁXIMO DEL ÍNDICE DEL twr
+#   volatilidad:  DESVÍO ANUALIZADO DE LOS RETORNOS DE LAS ÚLTIMAS VENTANA_VOLATILIDAD FOTOS
+# TODOS LOS VALORES SON FRACCIONES (0.05 = 5%). LAS SERIES SE CALCULAN A LA VEZ COMO COLUMNAS DE UNA MATRIZ
+# (FECHA x SERIE) Y LA XIRR CON UN NEWTON VECTORIZADO SOBRE TODAS LAS SERIES (SUMAS POR SERIE CON np.bincount).
+
+## IMPORTACION DE BIBLIOTECAS
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from valuacion import columna_float
+
+## TICKER CON EL QUE SE GUARDAN LAS MÉTRICAS DE LA CARTERA COMPLETA
+TICKER_CARTERA = "CARTERA"
+
+## FOTOS QUE ABARCA LA VOLATILIDAD MÓVIL Y RUEDAS POR AÑO PARA ANUALIZARLA
+VENTANA_VOLATILIDAD = int(os.getenv("ANALITICA_VENTANA_VOLATILIDAD", "30"))
+RUEDAS_POR_ANIO = 252
+
+COLUMNAS_METRICAS = ["ticker", "moneda", "fecha_calculo", "desde", "dias", "twr", "xirr", "max_drawdown", "volatilidad"]
+
+
+## RETORNOS ENTRE FOTOS CONSECUTIVAS DE CADA SERIE
+# EL FLUJO DEL DÍA ES LA VARIACIÓN DEL COSTO (COMPRAS POSITIVAS, VENTAS AL COSTO NEGATIVAS):
+#   r = (tenencia - flujo) / tenencia_anterior - 1
+# faltantes: FOTOS SIN VALOR (POR DEFECTO LAS DE TENENCIA 0 CON COSTO: FALTÓ LA COTIZACIÓN ESE DÍA). NO TIENEN RETORNO
+# Y EL SIGUIENTE SE MIDE DESDE LA ÚLTIMA FOTO VÁLIDA. TAMPOCO HAY RETORNO SI LA TENENCIA ANTERIOR ES 0
+def retornos_series(tenencia, costo, faltantes=None):
+    if faltantes is None:
+        faltantes = (tenencia == 0) & (costo > 0)
+    tenencia_valida = pd.DataFrame(np.where(faltantes, np.nan, tenencia)).ffill().to_numpy()
+    costo_valido = pd.DataFrame(np.where(faltantes, np.nan, costo)).ffill().to_numpy()
+    vacia = np.full((1, tenencia.shape[1]), np.nan)
+    anterior = np.vstack([vacia, tenencia_valida[:-1]])
+    flujo = costo - np.vstack([vacia, costo_valido[:-1]])
+    validos = (anterior > 0) & ~faltantes
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(validos, (tenencia - flujo) / anterior - 1, np.nan)
+
+
+## TWR, MÁXIMA CAÍDA Y VOLATILIDAD DE TODAS LAS SERIES (COLUMNAS DE retornos)
+def metricas_retornos(retornos, ventana=VENTANA_VOLATILIDAD):
+    observaciones = np.sum(~np.isnan(retornos), axis=0)
+    indice = np.cumprod(np.where(np.isnan(retornos), 1.0, 1.0 + retornos), axis=0)
+    twr = np.where(observaciones > 0, indice[-1] - 1, np.nan)
+    caidas = indice / np.maximum.accumulate(indice, axis=0) - 1
+    max_drawdown = np.where(observaciones > 0, caidas.min(axis=0), np.nan)
+    moviles = pd.DataFrame(retornos).rolling(ventana, min_periods=max(2, ventana // 2)).std()
+    volatilidad = moviles.iloc[-1].to_numpy() * np.sqrt(RUEDAS_POR_ANIO)
+    return twr, max_drawdown, volatilidad
+
+
+## XIRR VECTORIZADA: RESUELVE sum(monto * (1 + tasa) ** -anios) = 0 PARA TODAS LAS SERIES A LA VEZ
+# series: ÍNDICE DE SERIE DE CADA FLUJO; anios: AÑOS DESDE EL PRIMER FLUJO DE SU SERIE
+# LAS SERIES QUE NO CONVERGEN O NO TIENEN FLUJOS DE AMBOS SIGNOS QUEDAN EN NaN
+def xirr(series, montos, anios, cantidad_series, iteraciones=50, tolerancia=1e-7):
+    tasa = np.full(cantidad_series, 0.1)
+    convergida = np.zeros(cantidad_series, dtype=bool)
+    activa = (
+        (np.bincount(series, weights=(montos > 0), minlength=cantidad_series) > 0)
+        & (np.bincount(series, weights=(montos < 0), minlength=cantidad_series) > 0)
+    )
+    with np.errstate(all="ignore"):
+        for _ in range(iteraciones):
+            base = 1.0 + tasa[series]
+            descontado = montos * base ** -anios
+            vpn = np.bincount(series, weights=descontado, minlength=cantidad_series)
+            derivada = np.bincount(series, weights=-anios * descontado / base, minlength=cantidad_series)
+            paso = vpn / derivada
+            activa &= np.isfinite(paso)
+            pendiente = activa & ~convergida
+            if not pendiente.any():
+                break
+            tasa = np.where(pendiente, np.maximum(tasa - paso, -0.9999), tasa)
+            convergida |= pendiente & (np.abs(paso) < tolerancia)
+    return np.where(activa & convergida, tasa, np.nan)
+
+
+## XIRR POR TICKER Y DE LA CARTERA, EN ARS Y EN USD (LOTES YA VALUADOS CON valuacion.valuar_lotes)
+# CADA LOTE ES UN FLUJO NEGATIVO (SU COSTO) EN SU FECHA; LA TENENCIA ACTUAL ES UN FLUJO POSITIVO EN fecha_calculo
+def xirr_lotes(df_cedears, fecha_calculo):
+    tickers = df_cedears["ticker"].astype(str).to_numpy()
+    categorias, codigos = np.unique(tickers, return_inverse=True)
+    cantidad_tickers = len(categorias)
+    cartera = cantidad_tickers
+
+    fechas = pd.to_datetime(df_cedears["fecha"]).to_numpy(dtype="datetime64[D]")
+    fecha_final = np.datetime64(fecha_calculo, "D")
+    filas = []
+    for moneda in ("ars", "usd"):
+        ## LOS LOTES SIN COTIZACIÓN (TENENCIA NaN) NO APORTAN FLUJOS: VALUARLOS EN 0 SERÍA UNA PÉRDIDA TOTAL
+        tenencia = columna_float(df_cedears, f"tenencia_{moneda}")
+        cotizados = ~np.isnan(tenencia)
+        tenencia = tenencia[cotizados]
+        costo = np.nan_to_num(columna_float(df_cedears, f"costo_{moneda}"))[cotizados]
+        codigos_cotizados = codigos[cotizados]
+        fechas_cotizadas = fechas[cotizados]
+
+        ## FLUJOS DE CADA TICKER Y, REPETIDOS, DE LA CARTERA (ÚLTIMA SERIE)
+        series = np.concatenate([codigos_cotizados, codigos_cotizados, np.full(2 * len(codigos_cotizados), cartera)])
+        montos = np.concatenate([-costo, tenencia, -costo, tenencia])
+        fechas_flujo = np.concatenate([fechas_cotizadas, np.full(len(fechas_cotizadas), fecha_final)] * 2)
+
+        primera = np.full(cantidad_tickers + 1, fecha_final)
+        np.minimum.at(primera, series, fechas_flujo)
+        anios = (fechas_flujo - primera[series]).astype("float64") / 365.0
+        tasas = xirr(series, montos, anios, cantidad_tickers + 1)
+        filas.append(pd.DataFrame({
+            "ticker": np.append(categorias, TICKER_CARTERA),
+            "moneda": moneda,
+            "xirr": tasas
+        }))
+    return pd.concat(filas, ignore_index=True)
+
+
+## TWR, MÁXIMA CAÍDA Y VOLATILIDAD DESDE LAS FOTOS DIARIAS (COLUMNAS ticker, fecha_ejecucion, moneda, costo, tenencia)
+def metricas_historico(df_historico, ventana=VENTANA_VOLATILIDAD):
+    historico = pd.DataFrame({
+        "ticker": df_historico["ticker"].astype(str),
+        "fecha_ejecucion": pd.to_datetime(df_historico["fecha_ejecucion"]),
+        "moneda": df_historico["moneda"].astype(str),
+        "costo": df_historico["costo"].astype("float64"),
+        "tenencia": df_historico["tenencia"].astype("float64")
+    })
+    historico["faltante"] = (historico["tenencia"] == 0) & (historico["costo"] > 0)
+
+    ## LA CARTERA SUMA SOLO LAS FOTOS CON COTIZACIÓN; UNA FECHA CON ALGÚN TICKER SIN COTIZACIÓN ES UNA FOTO FALTANTE
+    # DE LA CARTERA (SI NO, EL TICKER SIN PRECIO APARECERÍA COMO UNA CAÍDA O COMO UNA VENTA)
+    claves = ["fecha_ejecucion", "moneda"]
+    cartera = historico[~historico["faltante"]].groupby(claves)[["costo", "tenencia"]].sum()
+    cartera = historico.groupby(claves)[["faltante"]].any().join(cartera).fillna(0.0).reset_index()
+    historico = pd.concat([historico, cartera.assign(ticker=TICKER_CARTERA)], ignore_index=True)
+
+    ## MATRICES (FECHA x SERIE); UN TICKER SIN FOTO EN UNA FECHA NO TENÍA TENENCIA
+    tabla = historico.pivot(index="fecha_ejecucion", columns=["ticker", "moneda"],
+                            values=["tenencia", "costo", "faltante"])
+    tabla = tabla.sort_index().fillna(0.0)
+    columnas = tabla["tenencia"].columns
+    tenencia = tabla["tenencia"].to_numpy(dtype="float64")
+    costo = tabla["costo"][columnas].to_numpy(dtype="float64")
+    faltantes = tabla["faltante"][columnas].to_numpy(dtype="float64") > 0
+
+    retornos = retornos_series(tenencia, costo, faltantes)
+    twr, max_drawdown, volatilidad = metricas_retornos(retornos, ventana)
+    con_tenencia = tenencia > 0
+    fechas = tabla.index.to_numpy()
+    return pd.DataFrame({
+        "ticker": columnas.get_level_values("ticker"),
+        "moneda": columnas.get_level_values("moneda"),
+        "desde": np.where(con_tenencia.any(axis=0), fechas[con_tenencia.argmax(axis=0)], np.datetime64("NaT")),
+        "dias": con_tenencia.sum(axis=0),
+        "twr": twr,
+        "max_drawdown": max_drawdown,
+        "volatilidad": volatilidad
+    })
+
+
+## TABLA COMPLETA DE MÉTRICAS (UNA FILA POR TICKER Y MONEDA, MÁS LAS DE LA CARTERA)
+def calcular_metricas(df_cedears, df_historico, fecha_calculo=None, ventana=VENTANA_VOLATILIDAD):
+    fecha_calculo = fecha_calculo or datetime.now().date()
+    df_xirr = xirr_lotes(df_cedears, fecha_calculo)
+    if df_historico is not None and not df_historico.empty:
+        df_metricas = metricas_historico(df_historico, ventana).merge(df_xirr, on=["ticker", "moneda"], how="outer")
+    else:
+        df_metricas = df_xirr
+    df_metricas = df_metricas.reindex(columns=COLUMNAS_METRICAS)
+    df_metricas["fecha_calculo"] = fecha_calculo
+    df_metricas["desde"] = pd.to_datetime(df_metricas["desde"])
+    df_metricas["dias"] = df_metricas["dias"].fillna(0).astype("int64")
+    metricas = ["twr", "xirr", "max_drawdown", "volatilidad"]
+    df_metricas[metricas] = df_metricas[metricas].astype("float64").replace([np.inf, -np.inf], np.nan).round(6)
+    return df_metricas.sort_values(["moneda", "ticker"], ignore_index=True)
@@ -0,0 +1,645 @@
+## IMPORTACION DE BIBLIOTECAS
+import hashlib
+import io
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+import pandas as pd
+from sqlalchemy import create_engine, URL, MetaData, Table, Column, String, Date, DateTime, Float, Integer, BigInteger, Boolean, Text, func, select, text
+
+from valuacion import COMISION_VENTA
+
+## REGISTRO DE ENGINES COMPARTIDO POR TODO EL PROCESO, UNO POR (HOST, BASE, USUARIO)
+# CADA ENGINE MANTIENE UN POOL PEQUEÑO DE CONEXIONES YA AUTENTICADAS CONTRA EL SESSION POOLER.
+# SE DESCARTAN LOS ENGINES MENOS USADOS AL SUPERAR EL MÁXIMO Y LOS QUE QUEDAN INACTIVOS DEMASIADO TIEMPO.
+class RegistroEngines:
+
+    def __init__(self, max_engines=16, tiempo_inactivo=900, pool_size=2, max_overflow=3, pool_recycle=1800):
+        self.max_engines = max_engines
+        self.tiempo_inactivo = tiempo_inactivo
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_recycle = pool_recycle
+        self.engines = OrderedDict()
+        self.lock = threading.Lock()
+
+    def crear_engine(self, db_host, db_name, db_user, db_pass):
+        url = URL.create(
+            "postgresql+psycopg2",
+            username=db_user,
+            password=db_pass,
+            host=db_host,
+            port=5432,
+            database=db_name,
+            query={"sslmode": "require"}
+        )
+        return create_engine(
+            url,
+            pool_size=self.pool_size,
+            max_overflow=self.max_overflow,
+            pool_pre_ping=True,
+            pool_recycle=self.pool_recycle,
+            pool_use_lifo=True
+        )
+
+    ## DEVUELVE EL ENGINE DE LAS CREDENCIALES, CREÁNDOLO SI NO EXISTE O SI CAMBIÓ LA CONTRASEÑA
+    def obtener(self, db_host, db_name, db_user, db_pass):
+        clave = (db_host, db_name, db_user)
+        huella = hashlib.sha256(db_pass.encode()).hexdigest()
+        descartados = []
+        with self.lock:
+            ahora = time.monotonic()
+            entrada = self.engines.pop(clave, None)
+            if entrada is not None and entrada[1] != huella:
+                descartados.append(entrada[0])
+                entrada = None
+            if entrada is None:
+                engine = self.crear_engine(db_host, db_name, db_user, db_pass)
+            else:
+                engine = entrada[0]
+            self.engines[clave] = (engine, huella, ahora)
+
+            # DESCARTE DE ENGINES INACTIVOS Y DE LOS MENOS USADOS
+            for otra_clave, (otro_engine, _, ultimo_uso) in list(self.engines.items()):
+                if otra_clave != clave and ahora - ultimo_uso > self.tiempo_inactivo:
+                    descartados.append(self.engines.pop(otra_clave)[0])
+            while len(self.engines) > self.max_engines:
+                descartados.append(self.engines.popitem(last=False)[1][0])
+
+        for engine_descartado in descartados:
+            engine_descartado.dispose()
+        return engine
+
+
+registro_engines = RegistroEngines()
+
+
+## ACCESO AL ENGINE COMPARTIDO DE UNA BASE DE DATOS
+def obtener_engine(db_host, db_name, db_user, db_pass):
+    return registro_engines.obtener(db_host, db_name, db_user, db_pass)
+
+
+## ESTRUCTURA DE LAS TABLAS
+metadata = MetaData()
+
+cedears_table = Table(
+    'cedears',
+    metadata,
+    Column('id_operacion', Integer, primary_key=True, autoincrement=True),
+    Column('cantidad', Float),
+    Column('descripcion', Text),
+    Column('fecha', Date),
+    Column('fecha_descarga', Date),
+    Column('gastos', Float),
+    Column('moneda', String),
+    Column('precio_compra', Float),
+    Column('ticker', String),
+    Column('tipo', String),
+    Column('dolar_mep', Float),
+    Column('dolar_oficial', Float),
+    Column('costo_ars', Float),
+    Column('costo_usd', Float),
+    Column('tenencia_ars', Float),
+    Column('tenencia_usd', Float),
+    Column('resultados_ars', Float),
+    Column('resultados_usd', Float),
+    Column('rendimiento_ars', Float),
+    Column('rendimiento_usd', Float),
+    Column('clave_lote', BigInteger, unique=True)
+)
+
+## COLUMNAS QUE IDENTIFICAN UN LOTE DE FORMA ESTABLE ENTRE REPORTES
+COLUMNAS_CLAVE_LOTE = ['ticker', 'fecha', 'fecha_descarga', 'cantidad', 'precio_compra']
+
+## COLUMNAS DE CEDEARS QUE DEPENDEN DEL MERCADO (EL RESTO SOLO DEPENDE DEL REPORTE)
+COLUMNAS_MERCADO = ['tenencia_ars', 'tenencia_usd', 'resultados_ars', 'resultados_usd', 'rendimiento_ars', 'rendimiento_usd']
+
+historico_table = Table(
+    'datos_historicos_cedears',
+    metadata,
+    Column('ticker', String, primary_key=True),
+    Column('cantidad', Float),
+    Column('fecha_ejecucion', Date, primary_key=True),
+    Column('moneda', String, primary_key=True),
+    Column('costo', Float),
+    Column('tenencia', Float),
+    Column('resultados', Float),
+    Column('rendimiento', Float)
+)
+
+historico_dolar_table = Table(
+    'historico_dolar',
+    metadata,
+    Column('fecha', Date, primary_key=True),
+    Column('tipo', String, primary_key=True),
+    Column('valor', Float)
+)
+
+
+## RESÚMENES SEMANALES Y MENSUALES DE LOS HISTÓRICOS (LOS ARMA mantenimiento.py CON LAS FILAS DIARIAS QUE VENCEN)
+# periodo: PRIMER DÍA DE LA SEMANA (LUNES) O DEL MES; LOS VALORES SON LOS DEL ÚLTIMO DÍA DEL PERÍODO,
+# LOS *_promedio SON PROMEDIOS DE LOS dias DIARIOS RESUMIDOS Y ultima_fecha ES EL ÚLTIMO DÍA INCLUIDO
+def tabla_resumen_historico(nombre):
+    return Table(
+        nombre,
+        metadata,
+        Column('ticker', String, primary_key=True),
+        Column('periodo', Date, primary_key=True),
+        Column('moneda', String, primary_key=True),
+        Column('cantidad', Float),
+        Column('costo', Float),
+        Column('tenencia', Float),
+        Column('resultados', Float),
+        Column('rendimiento', Float),
+        Column('tenencia_promedio', Float),
+        Column('rendimiento_promedio', Float),
+        Column('dias', Integer),
+        Column('ultima_fecha', Date)
+    )
+
+
+def tabla_resumen_dolar(nombre):
+    return Table(
+        nombre,
+        metadata,
+        Column('periodo', Date, primary_key=True),
+        Column('tipo', String, primary_key=True),
+        Column('valor', Float),
+        Column('valor_promedio', Float),
+        Column('dias', Integer),
+        Column('ultima_fecha', Date)
+    )
+
+
+historico_semanal_table = tabla_resumen_historico('datos_historicos_cedears_semanal')
+historico_mensual_table = tabla_resumen_historico('datos_historicos_cedears_mensual')
+historico_dolar_semanal_table = tabla_resumen_dolar('historico_dolar_semanal')
+historico_dolar_mensual_table = tabla_resumen_dolar('historico_dolar_mensual')
+
+
+## MÉTRICAS DE CADA EJECUCIÓN DEL PROCESO
+pipeline_runs_table = Table(
+    'pipeline_runs',
+    metadata,
+    Column('id_ejecucion', Integer, primary_key=True, autoincrement=True),
+    Column('fecha_inicio', DateTime),
+    Column('segundos_total', Float),
+    Column('segundos_lectura', Float),
+    Column('segundos_cotizaciones', Float),
+    Column('segundos_dolar', Float),
+    Column('segundos_valuacion', Float),
+    Column('segundos_guardado', Float),
+    Column('segundos_historico', Float),
+    Column('segundos_mantenimiento', Float),
+    Column('segundos_analitica', Float),
+    Column('archivos', Integer),
+    Column('lotes', Integer),
+    Column('tickers', Integer),
+    Column('filas_escritas', Integer),
+    Column('bytes_escritos', BigInteger),
+    Column('aciertos_cache_cotizaciones', Float),
+    Column('origen_dolar', String),
+    Column('huella_lotes', String),
+    Column('exito', Boolean),
+    Column('mensaje', Text)
+)
+
+
+## MÉTRICAS DE RENDIMIENTO PRECALCULADAS (analitica.py): UNA FILA POR TICKER Y MONEDA, MÁS LA CARTERA
+# SE REEMPLAZA COMPLETA EN CADA EJECUCIÓN
+metricas_rendimiento_table = Table(
+    'metricas_rendimiento',
+    metadata,
+    Column('ticker', String, primary_key=True),
+    Column('moneda', String, primary_key=True),
+    Column('fecha_calculo', Date),
+    Column('desde', Date),
+    Column('dias', Integer),
+    Column('twr', Float),
+    Column('xirr', Float),
+    Column('max_drawdown', Float),
+    Column('volatilidad', Float)
+)
+
+
+## CONVERSIÓN DEL DATAFRAME A UN BUFFER CSV EN MEMORIA (SIN LISTAS INTERMEDIAS DE FILAS)
+def dataframe_a_buffer(df, columnas):
+    buffer = io.StringIO()
+    df.to_csv(buffer, columns=columnas, index=False, header=False, date_format="%Y-%m-%d")
+    bytes_escritos = buffer.tell()
+    buffer.seek(0)
+    return buffer, bytes_escritos
+
+
+## CARGA MASIVA CON COPY FROM STDIN SOBRE LA CONEXIÓN ACTUAL
+def copiar_dataframe(connection, df, tabla, columnas):
+    buffer, bytes_escritos = dataframe_a_buffer(df, columnas)
+    lista_columnas = ", ".join(columnas)
+    conexion_dbapi = connection.connection.dbapi_connection
+    with conexion_dbapi.cursor() as cursor:
+        cursor.copy_expert(f"COPY {tabla} ({lista_columnas}) FROM STDIN WITH (FORMAT csv)", buffer)
+    return bytes_escritos
+
+
+## CARGA MASIVA QUE OMITE LAS FILAS YA EXISTENTES (EQUIVALENTE A IGNORAR DUPLICADOS)
+# SE COPIA A UNA TABLA TEMPORAL Y LUEGO SE INSERTA CON ON CONFLICT DO NOTHING
+def copiar_sin_duplicados(connection, df, tabla, columnas):
+    tabla_temporal = f"tmp_{tabla}"
+    connection.execute(text(
+        f"CREATE TEMP TABLE IF NOT EXISTS {tabla_temporal} (LIKE {tabla} INCLUDING DEFAULTS) ON COMMIT DROP"
+    ))
+    connection.execute(text(f"TRUNCATE TABLE {tabla_temporal}"))
+    bytes_escritos = copiar_dataframe(connection, df, tabla_temporal, columnas)
+    lista_columnas = ", ".join(columnas)
+    resultado = connection.execute(text(
+        f"INSERT INTO {tabla} ({lista_columnas}) SELECT {lista_columnas} FROM {tabla_temporal} ON CONFLICT DO NOTHING"
+    ))
+    return resultado.rowcount, bytes_escritos
+
+
+## CLAVE NATURAL DE CADA LOTE: HASH DE LAS COLUMNAS CLAVE + N° DE APARICIÓN
+# EL N° DE APARICIÓN DISTINGUE LOTES IDÉNTICOS (MISMA COMPRA REPETIDA EL MISMO DÍA)
+def calcular_clave_lote(df):
+    claves = pd.DataFrame({
+        'ticker': df['ticker'].astype(str),
+        'fecha': pd.to_datetime(df['fecha']).dt.normalize(),
+        'fecha_descarga': pd.to_datetime(df['fecha_descarga']).dt.normalize(),
+        'cantidad': df['cantidad'].astype('float64'),
+        'precio_compra': df['precio_compra'].astype('float64')
+    }, index=df.index)
+    claves['aparicion'] = claves.groupby(COLUMNAS_CLAVE_LOTE, sort=False).cumcount()
+    return pd.util.hash_pandas_object(claves, index=False).values.view('int64')
+
+
+## HUELLA DEL CONJUNTO DE LOTES: SHA-256 DE TODAS LAS COLUMNAS QUE NO DEPENDEN DEL MERCADO
+# DOS CARGAS CON LA MISMA HUELLA DEJAN LA TABLA cedears IGUAL SALVO POR LAS COLUMNAS DE MERCADO
+def huella_lotes(df):
+    columnas = [c.name for c in cedears_table.columns
+                if c.name in df.columns and c.name not in COLUMNAS_MERCADO + ['id_operacion', 'clave_lote']]
+    hashes = pd.util.hash_pandas_object(df[columnas], index=False).values
+    return hashlib.sha256(hashes.tobytes()).hexdigest()
+
+
+## SINCRONIZACIÓN INCREMENTAL DE CEDEARS
+# SOLO SE INSERTAN LOS LOTES NUEVOS, SE ACTUALIZAN LOS QUE CAMBIARON Y SE BORRAN LOS QUE YA NO ESTÁN
+def sincronizar_cedears(connection, df_cedears, columnas):
+    lista_columnas = ", ".join(columnas)
+    # SIN LOS DEFAULTS DE cedears: CADA FILA COPIADA CONSUMIRÍA UN VALOR DE LA SECUENCIA DE id_operacion
+    connection.execute(text(
+        f"CREATE TEMP TABLE IF NOT EXISTS tmp_cedears ON COMMIT DROP AS "
+        f"SELECT {lista_columnas} FROM cedears WITH NO DATA"
+    ))
+    bytes_escritos = copiar_dataframe(connection, df_cedears, 'tmp_cedears', columnas)
+
+    eliminadas = connection.execute(text(
+        "DELETE FROM cedears c WHERE c.clave_lote IS NULL "
+        "OR NOT EXISTS (SELECT 1 FROM tmp_cedears t WHERE t.clave_lote = c.clave_lote)"
+    )).rowcount
+
+    ## UN LOTE SIN COTIZACIÓN (COLUMNAS DE MERCADO NULL) CONSERVA LOS VALORES DE MERCADO GUARDADOS
+    columnas_actualizables = [c for c in columnas if c != 'clave_lote']
+    nuevas = [f"COALESCE(t.{c}, c.{c})" if c in COLUMNAS_MERCADO else f"t.{c}" for c in columnas_actualizables]
+    asignaciones = ", ".join(f"{c} = {nueva}" for c, nueva in zip(columnas_actualizables, nuevas))
+    actuales = ", ".join(f"c.{c}" for c in columnas_actualizables)
+    nuevas = ", ".join(nuevas)
+    actualizadas = connection.execute(text(
+        f"UPDATE cedears c SET {asignaciones} FROM tmp_cedears t "
+        f"WHERE c.clave_lote = t.clave_lote AND ({actuales}) IS DISTINCT FROM ({nuevas})"
+    )).rowcount
+
+    ## SOLO LOS LOTES NUEVOS PIDEN UN id_operacion (UN INSERT ... ON CONFLICT LO PIDE PARA CADA FILA PROPUESTA)
+    insertadas = connection.execute(text(
+        f"INSERT INTO cedears ({lista_columnas}) SELECT {lista_columnas} FROM tmp_cedears t "
+        f"WHERE NOT EXISTS (SELECT 1 FROM cedears c WHERE c.clave_lote = t.clave_lote) "
+        f"ON CONFLICT (clave_lote) DO NOTHING"
+    )).rowcount
+
+    return {
+        'filas': insertadas + actualizadas,
+        'insertadas': insertadas,
+        'actualizadas': actualizadas,
+        'eliminadas': eliminadas,
+        'bytes': bytes_escritos
+    }
+
+
+## INSERCIÓN PARA to_sql QUE IGNORA FILAS DUPLICADAS (SQLITE)
+def insertar_o_ignorar(tabla_pandas, connection, columnas, filas):
+    registros = [dict(zip(columnas, fila)) for fila in filas]
+    return connection.execute(tabla_pandas.table.insert().prefix_with("OR IGNORE"), registros).rowcount
+
+
+## COLUMNAS Date COMO datetime.date: SQLITE GUARDA LOS datetime64 CON HORA Y LUEGO NO LOS PUEDE LEER COMO Date
+def fechas_como_date(df, tabla):
+    df = df.copy()
+    for columna in tabla.columns:
+        if isinstance(columna.type, Date) and columna.name in df.columns:
+            df[columna.name] = pd.to_datetime(df[columna.name]).dt.date
+    return df
+
+
+## GUARDADO EN UNA BASE SQLITE LOCAL (SIN COPY; SE USA PARA PRUEBAS Y BENCHMARKS SIN RED)
+def guardar_tablas_sqlite(engine, df_cedears, df_historico, df_dolar):
+    resumen = {}
+    with engine.begin() as connection:
+        connection.execute(text("DELETE FROM cedears"))
+        columnas_cedears = [c.name for c in cedears_table.columns if c.name in df_cedears.columns]
+        df_cedears = fechas_como_date(df_cedears[columnas_cedears], cedears_table)
+        df_cedears.to_sql('cedears', connection, if_exists='append', index=False)
+        resumen['cedears'] = {'filas': len(df_cedears), 'bytes': 0}
+
+        df_historico = fechas_como_date(df_historico, historico_table)
+        filas = df_historico.to_sql('datos_historicos_cedears', connection, if_exists='append', index=False,
+                                    method=insertar_o_ignorar)
+        resumen['datos_historicos_cedears'] = {'filas': filas or 0, 'bytes': 0}
+
+        df_dolar = fechas_como_date(df_dolar, historico_dolar_table)
+        filas = df_dolar.to_sql('historico_dolar', connection, if_exists='append', index=False,
+                                method=insertar_o_ignorar)
+        resumen['historico_dolar'] = {'filas': filas or 0, 'bytes': 0}
+    return resumen
+
+
+## GUARDADO DE LAS TRES TABLAS EN UNA SOLA TRANSACCIÓN
+# modo_cedears: "incremental" (SINCRONIZA POR CLAVE DE LOTE) O "reemplazo" (TRUNCATE + CARGA COMPLETA)
+# DEVUELVE, POR TABLA, LAS FILAS ESCRITAS Y LOS BYTES ENVIADOS
+def guardar_tablas(engine, df_cedears, df_historico, df_dolar, modo_cedears="incremental"):
+    df_cedears = df_cedears.assign(clave_lote=calcular_clave_lote(df_cedears))
+    if engine.dialect.name == "sqlite":
+        return guardar_tablas_sqlite(engine, df_cedears, df_historico, df_dolar)
+
+    resumen = {}
+    columnas_cedears = [c.name for c in cedears_table.columns if c.name in df_cedears.columns]
+    with engine.begin() as connection:
+
+        ## CEDEARS
+        if modo_cedears == "incremental":
+            resumen['cedears'] = sincronizar_cedears(connection, df_cedears, columnas_cedears)
+        else:
+            connection.execute(text("TRUNCATE TABLE cedears RESTART IDENTITY;"))
+            bytes_cedears = copiar_dataframe(connection, df_cedears, 'cedears', columnas_cedears)
+            resumen['cedears'] = {'filas': len(df_cedears), 'bytes': bytes_cedears}
+
+        ## HISTÓRICOS: SE IGNORAN LOS REGISTROS YA CARGADOS EN EL DÍA
+        columnas_historico = [c.name for c in historico_table.columns]
+        filas, bytes_historico = copiar_sin_duplicados(connection, df_historico, 'datos_historicos_cedears', columnas_historico)
+        resumen['datos_historicos_cedears'] = {'filas': filas, 'bytes': bytes_historico}
+
+        columnas_dolar = [c.name for c in historico_dolar_table.columns]
+        filas, bytes_dolar = copiar_sin_duplicados(connection, df_dolar, 'historico_dolar', columnas_dolar)
+        resumen['historico_dolar'] = {'filas': filas, 'bytes': bytes_dolar}
+    return resumen
+
+
+## REGISTRO DE UNA EJECUCIÓN EN pipeline_runs (SOLO LAS COLUMNAS CONOCIDAS)
+def guardar_metricas(engine, fila):
+    columnas = {c.name for c in pipeline_runs_table.columns}
+    with engine.begin() as connection:
+        connection.execute(pipeline_runs_table.insert().values(
+            **{clave: valor for clave, valor in fila.items() if clave in columnas}
+        ))
+
+
+## HUELLA DE LOTES DE LA ÚLTIMA CARGA EXITOSA DE UN REPORTE (None SI NO HAY)
+# LAS REVALUACIONES NO REGISTRAN HUELLA: NO CAMBIAN LOS LOTES
+def ultima_huella_lotes(engine):
+    with engine.connect() as connection:
+        return connection.execute(
+            select(pipeline_runs_table.c.huella_lotes)
+            .where(pipeline_runs_table.c.exito.is_(True), pipeline_runs_table.c.huella_lotes.isnot(None))
+            .order_by(pipeline_runs_table.c.id_ejecucion.desc())
+            .limit(1)
+        ).scalar()
+
+
+## AGREGA FILAS A LAS TABLAS HISTÓRICAS CONSERVANDO LAS QUE YA EXISTÍAN (DENTRO DE LA TRANSACCIÓN ACTUAL)
+def agregar_historicos(connection, df_historico, df_dolar):
+    resumen = {}
+    for tabla, df in ((historico_table, df_historico), (historico_dolar_table, df_dolar)):
+        if connection.dialect.name == "sqlite":
+            df = fechas_como_date(df, tabla)
+            filas = df.to_sql(tabla.name, connection, if_exists='append', index=False, method=insertar_o_ignorar)
+            resumen[tabla.name] = {'filas': filas or 0, 'bytes': 0}
+        else:
+            columnas = [c.name for c in tabla.columns]
+            filas, bytes_escritos = copiar_sin_duplicados(connection, df, tabla.name, columnas)
+            resumen[tabla.name] = {'filas': filas, 'bytes': bytes_escritos}
+    return resumen
+
+
+## CARGA DEL HISTÓRICO RECONSTRUIDO: SE CONSERVAN LAS FILAS QUE YA EXISTÍAN
+def guardar_historico(engine, df_historico, df_dolar):
+    with engine.begin() as connection:
+        return agregar_historicos(connection, df_historico, df_dolar)
+
+
+## PRIMERA Y ÚLTIMA FECHA DE LAS FOTOS ANTERIORES A hasta ((None, None) SI NO HAY)
+# SE LEEN COMO TEXTO: LAS BASES SQLITE ANTERIORES TIENEN FECHAS GUARDADAS CON HORA
+def rango_historico(engine, hasta):
+    with engine.connect() as connection:
+        fila = connection.execute(text(
+            f"SELECT min(fecha_ejecucion), max(fecha_ejecucion) FROM {historico_table.name} "
+            f"WHERE fecha_ejecucion < :hasta"
+        ), {"hasta": str(hasta)}).fetchone()
+    return tuple(None if valor is None else date.fromisoformat(str(valor)[:10]) for valor in fila)
+
+
+## ÚLTIMO PRECIO CONOCIDO DE CADA TICKER, DEDUCIDO DE LA FOTO MÁS RECIENTE EN ARS DE datos_historicos_cedears
+# (tenencia = cantidad * precio * (1 - COMISION_VENTA)); SE USA CUANDO NINGÚN PROVEEDOR DEVUELVE EL PRECIO
+def ultimos_precios(engine, tickers):
+    h = historico_table.c
+    ultima = (
+        select(h.ticker, func.max(h.fecha_ejecucion).label('fecha'))
+        .where(h.moneda == 'ars', h.cantidad > 0, h.tenencia > 0, h.ticker.in_(list(tickers)))
+        .group_by(h.ticker)
+        .subquery()
+    )
+    consulta = (
+        select(h.ticker, h.tenencia, h.cantidad)
+        .join(ultima, (h.ticker == ultima.c.ticker) & (h.fecha_ejecucion == ultima.c.fecha))
+        .where(h.moneda == 'ars')
+    )
+    with engine.connect() as connection:
+        filas = connection.execute(consulta).fetchall()
+    return precios_de_fotos((fila.ticker, fila.tenencia, fila.cantidad) for fila in filas)
+
+
+## MISMA CONSULTA PARA LOS DESTINOS LOCALES (DUCKDB) CON LOS TICKERS COMO PARÁMETRO ?
+CONSULTA_ULTIMAS_FOTOS = f"""
+    SELECT h.ticker, h.tenencia, h.cantidad
+    FROM {historico_table.name} h
+    JOIN (
+        SELECT ticker, max(fecha_ejecucion) AS fecha
+        FROM {historico_table.name}
+        WHERE moneda = 'ars' AND cantidad > 0 AND tenencia > 0 AND list_contains(?, ticker)
+        GROUP BY ticker
+    ) u ON h.ticker = u.ticker AND h.fecha_ejecucion = u.fecha
+    WHERE h.moneda = 'ars'
+"""
+
+
+## ÚLTIMA FOTO EN ARS DE CADA TICKER A PARTIR DE LAS FOTOS YA LEÍDAS (DESTINO PARQUET)
+def ultimas_fotos(df_historico, tickers):
+    df = df_historico[
+        (df_historico['moneda'].astype(str) == 'ars') & (df_historico['cantidad'] > 0) & (df_historico['tenencia'] > 0)
+        & df_historico['ticker'].astype(str).isin([str(t) for t in tickers])
+    ]
+    df = df.sort_values('fecha_ejecucion').groupby(df['ticker'].astype(str)).last()
+    return zip(df.index, df['tenencia'], df['cantidad'])
+
+
+## PRECIO DEDUCIDO DE CADA FOTO (ticker, tenencia, cantidad)
+def precios_de_fotos(filas):
+    return {ticker: tenencia / (cantidad * (1 - COMISION_VENTA)) for ticker, tenencia, cantidad in filas
+            if tenencia and cantidad}
+
+
+## LOTES YA CARGADOS EN cedears CON LAS COLUMNAS QUE NECESITA LA VALUACIÓN
+COLUMNAS_REVALUACION = ['id_operacion', 'ticker', 'fecha', 'cantidad', 'costo_ars', 'costo_usd']
+
+
+def leer_lotes(engine):
+    with engine.connect() as connection:
+        # SIN EL TIPO Date DE SQLALCHEMY: LAS BASES SQLITE ANTERIORES GUARDARON LAS FECHAS CON HORA
+        df = pd.read_sql(text(f"SELECT {', '.join(COLUMNAS_REVALUACION)} FROM cedears"), connection)
+    df['ticker'] = df['ticker'].astype('category')
+    df['fecha'] = pd.to_datetime(df['fecha'])
+    return df
+
+
+## FOTOS DIARIAS GUARDADAS (COLUMNAS QUE USA analitica.calcular_metricas)
+COLUMNAS_HISTORICO_ANALITICA = ['ticker', 'fecha_ejecucion', 'moneda', 'costo', 'tenencia']
+
+
+# SIN EL TIPO Date DE SQLALCHEMY: LAS BASES SQLITE ANTERIORES TIENEN FECHAS GUARDADAS CON HORA, A VECES REPETIDAS
+# CON LA MISMA FECHA SIN HORA (SE CONSERVA UNA FILA POR TICKER, FECHA Y MONEDA)
+def leer_historico(engine):
+    with engine.connect() as connection:
+        df = pd.read_sql(text(f"SELECT {', '.join(COLUMNAS_HISTORICO_ANALITICA)} FROM {historico_table.name}"),
+                         connection)
+    df['fecha_ejecucion'] = pd.to_datetime(df['fecha_ejecucion'].astype(str).str[:10])
+    return df.drop_duplicates(subset=['ticker', 'fecha_ejecucion', 'moneda'], keep='last', ignore_index=True)
+
+
+## REEMPLAZO COMPLETO DE metricas_rendimiento EN UNA TRANSACCIÓN
+def guardar_metricas_rendimiento(engine, df_metricas):
+    columnas = [c.name for c in metricas_rendimiento_table.columns]
+    with engine.begin() as connection:
+        connection.execute(metricas_rendimiento_table.delete())
+        if engine.dialect.name == "sqlite":
+            df_metricas[columnas].to_sql(metricas_rendimiento_table.name, connection, if_exists='append', index=False)
+            bytes_escritos = 0
+        else:
+            bytes_escritos = copiar_dataframe(connection, df_metricas, metricas_rendimiento_table.name, columnas)
+    return {'filas': len(df_metricas), 'bytes': bytes_escritos}
+
+
+## LOTES VALUADOS: LOS DE TICKERS SIN COTIZACIÓN (COLUMNAS DE MERCADO EN NaN) NO SE ACTUALIZAN Y CONSERVAN
+# LOS ÚLTIMOS VALORES GUARDADOS
+def lotes_cotizados(df_cedears):
+    return df_cedears[df_cedears['tenencia_ars'].notna()]
+
+
+## ACTUALIZACIÓN DE LAS COLUMNAS DE MERCADO DE cedears EN UNA SOLA SENTENCIA (UPDATE ... FROM)
+# clave: 'id_operacion' (LOTES LEÍDOS DE LA BASE) O 'clave_lote' (LOTES DE UN REPORTE YA CARGADO)
+def actualizar_columnas_mercado(connection, df_cedears, clave):
+    df_cedears = lotes_cotizados(df_cedears)
+    columnas = [clave] + COLUMNAS_MERCADO
+    asignaciones = ", ".join(f"{c} = t.{c}" for c in COLUMNAS_MERCADO)
+    if connection.dialect.name == "sqlite":
+        registros = df_cedears[columnas].to_dict("records")
+        asignaciones = ", ".join(f"{c} = :{c}" for c in COLUMNAS_MERCADO)
+        resultado = connection.execute(text(f"UPDATE cedears SET {asignaciones} WHERE {clave} = :{clave}"), registros)
+        return {'filas': resultado.rowcount, 'bytes': 0}
+
+    tabla_temporal = f"tmp_mercado_{clave}"
+    definiciones = ", ".join([f"{clave} BIGINT"] + [f"{c} DOUBLE PRECISION" for c in COLUMNAS_MERCADO])
+    connection.execute(text(f"CREATE TEMP TABLE IF NOT EXISTS {tabla_temporal} ({definiciones}) ON COMMIT DROP"))
+    connection.execute(text(f"TRUNCATE TABLE {tabla_temporal}"))
+    bytes_escritos = copiar_dataframe(connection, df_cedears, tabla_temporal, columnas)
+    resultado = connection.execute(text(
+        f"UPDATE cedears c SET {asignaciones} FROM {tabla_temporal} t WHERE c.{clave} = t.{clave}"
+    ))
+    return {'filas': resultado.rowcount, 'bytes': bytes_escritos}
+
+
+## REVALUACIÓN: COLUMNAS DE MERCADO DE cedears + FOTO DEL DÍA, EN UNA SOLA TRANSACCIÓN
+# SI LOS LOTES NO TRAEN id_operacion SE UBICAN POR SU CLAVE NATURAL (clave_lote)
+def guardar_mercado(engine, df_cedears, df_historico, df_dolar):
+    if 'id_operacion' in df_cedears.columns:
+        clave = 'id_operacion'
+    else:
+        clave = 'clave_lote'
+        df_cedears = df_cedears.assign(clave_lote=calcular_clave_lote(df_cedears))
+    with engine.begin() as connection:
+        resumen = {'cedears': actualizar_columnas_mercado(connection, df_cedears, clave)}
+        resumen.update(agregar_historicos(connection, df_historico, df_dolar))
+    return resumen
+
+
+## VISTAS MATERIALIZADAS PARA POWER BI (AGREGACIONES RESUELTAS EN EL SERVIDOR)
+# CADA VISTA TIENE UN ÍNDICE ÚNICO PARA PODER ACTUALIZARLA CON REFRESH ... CONCURRENTLY
+VISTAS_MATERIALIZADAS = {
+    # TOTAL DE LA CARTERA POR FECHA Y MONEDA
+    "mv_cartera_por_fecha": (
+        """
+        SELECT fecha_ejecucion, moneda,
+               COUNT(*) AS tickers,
+               SUM(costo) AS costo,
+               SUM(tenencia) AS tenencia,
+               SUM(resultados) AS resultados,
+               SUM(resultados) / NULLIF(SUM(costo), 0) AS rendimiento
+        FROM datos_historicos_cedears
+        GROUP BY fecha_ejecucion, moneda
+        """,
+        "fecha_ejecucion, moneda"
+    ),
+    # ÚLTIMA POSICIÓN CONOCIDA DE CADA TICKER EN CADA MONEDA
+    "mv_posicion_actual": (
+        """
+        SELECT DISTINCT ON (ticker, moneda)
+               ticker, moneda, fecha_ejecucion, cantidad, costo, tenencia, resultados, rendimiento
+        FROM datos_historicos_cedears
+        ORDER BY ticker, moneda, fecha_ejecucion DESC
+        """,
+        "ticker, moneda"
+    ),
+    # RENDIMIENTO DE CADA TICKER EN ARS Y EN USD LADO A LADO (LOTES ACTUALES)
+    "mv_rendimiento_por_moneda": (
+        """
+        SELECT ticker,
+               SUM(cantidad) AS cantidad,
+               SUM(costo_ars) AS costo_ars,
+               SUM(tenencia_ars) AS tenencia_ars,
+               SUM(resultados_ars) AS resultados_ars,
+               SUM(resultados_ars) / NULLIF(SUM(costo_ars), 0) AS rendimiento_ars,
+               SUM(costo_usd) AS costo_usd,
+               SUM(tenencia_usd) AS tenencia_usd,
+               SUM(resultados_usd) AS resultados_usd,
+               SUM(resultados_usd) / NULLIF(SUM(costo_usd), 0) AS rendimiento_usd
+        FROM cedears
+        GROUP BY ticker
+        """,
+        "ticker"
+    )
+}
+
+## ÍNDICES DE COBERTURA PARA LAS CONSULTAS DEL INFORME
+INDICES_COBERTURA = [
+    "CREATE INDEX IF NOT EXISTS datos_historicos_fecha_moneda_ticker_idx "
+    "ON datos_historicos_cedears (fecha_ejecucion, moneda, ticker) "
+    "INCLUDE (cantidad, costo, tenencia, resultados, rendimiento)",
+    "CREATE INDEX IF NOT EXISTS cedears_ticker_idx ON cedears (ticker)"
+]
+
+
+## ACTUALIZACIÓN DE LAS VISTAS MATERIALIZADAS (SE CREAN EN LAS MIGRACIONES DE esquema.py)
+# SE EJECUTA DESPUÉS DE LA CARGA, EN SU PROPIA TRANSACCIÓN; CONCURRENTLY NO BLOQUEA LAS LECTURAS DE POWER BI
+def actualizar_vistas(engine):
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as connection:
+        for nombre in VISTAS_MATERIALIZADAS:
+            connection.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {nombre}"))
@@ -0,0 +1,114 @@
+## SERVICIOS DE MERCADO FALSOS PARA MEDIR EL PROCESO SIN RED
+# SE REEMPLAZA SOLO EL ACCESO A LA RED (yfinance Y LA SESIÓN HTTP DEL DÓLAR): EL MOTOR DE COTIZACIONES (LIMITADOR,
+# CACHE, LOTES E INDIVIDUALES, CORTOCIRCUITOS Y SOLICITUDES CUBIERTAS) Y dolar.ProveedorDolar SE EJECUTAN COMPLETOS.
+# SE PUEDEN CONFIGURAR LA LATENCIA Y LA TASA DE ERRORES. CON EL MISMO seed LOS RESULTADOS SON REPETIBLES.
+
+## IMPORTACION DE BIBLIOTECAS
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+import cotizaciones
+from cotizaciones import SUFIJO_MERCADO
+
+
+## REEMPLAZO DEL MÓDULO yfinance (download Y Ticker)
+# latencia: SEGUNDOS POR SOLICITUD; tasa_error: PROPORCIÓN DE TICKERS QUE NO DEVUELVEN PRECIO EN CADA SOLICITUD
+class YahooFalso:
+
+    def __init__(self, precios, latencia=0.05, tasa_error=0.0, seed=0):
+        self.precios = {ticker + SUFIJO_MERCADO: precio for ticker, precio in precios.items()}
+        self.latencia = latencia
+        self.tasa_error = tasa_error
+        self.aleatorio = random.Random(seed)
+        self.lock = threading.Lock()
+        self.solicitudes = 0
+
+    ## UNA SOLICITUD: ESPERA LA LATENCIA Y DECIDE QUÉ SÍMBOLOS FALLAN
+    def responder(self, simbolos):
+        time.sleep(self.latencia)
+        with self.lock:
+            self.solicitudes += 1
+            return [s for s in simbolos if s in self.precios and self.aleatorio.random() >= self.tasa_error]
+
+    ## MISMO FORMATO QUE yf.download CON VARIOS SÍMBOLOS: COLUMNAS (CAMPO, SÍMBOLO)
+    def download(self, simbolos, period=None, start=None, **opciones):
+        disponibles = self.responder(simbolos)
+        if not disponibles:
+            return pd.DataFrame()
+        hasta = pd.Timestamp.today().normalize()
+        fechas = pd.date_range(start or hasta - pd.Timedelta(days=4), hasta, freq="D", name="Date")
+        columnas = pd.MultiIndex.from_product([["Close"], disponibles])
+        valores = [[self.precios[s] for s in disponibles]] * len(fechas)
+        return pd.DataFrame(valores, index=fechas, columns=columnas)
+
+    def Ticker(self, simbolo):
+        return TickerFalso(self, simbolo)
+
+
+## REEMPLAZO DE yf.Ticker: fast_info HACE LA SOLICITUD
+class TickerFalso:
+
+    def __init__(self, yahoo, simbolo):
+        self.yahoo = yahoo
+        self.simbolo = simbolo
+        self.info = {}
+
+    @property
+    def fast_info(self):
+        if not self.yahoo.responder([self.simbolo]):
+            raise RuntimeError("Error simulado")
+        return {"last_price": self.yahoo.precios[self.simbolo]}
+
+
+## INSTALA yahoo EN LUGAR DE yfinance MIENTRAS DURA EL BLOQUE
+@contextmanager
+def yahoo_falso(yahoo):
+    original = cotizaciones.yf
+    cotizaciones.yf = yahoo
+    try:
+        yield yahoo
+    finally:
+        cotizaciones.yf = original
+
+
+## RESPUESTA HTTP FALSA (LA PARTE DE requests.Response QUE USA dolar.ProveedorDolar)
+class RespuestaFalsa:
+
+    def __init__(self, datos, error=None):
+        self.datos = datos
+        self.error = error
+
+    def raise_for_status(self):
+        if self.error is not None:
+            raise self.error
+
+    def json(self):
+        return self.datos
+
+
+## REEMPLAZO DE LA SESIÓN HTTP DE dolar.ProveedorDolar (VALORES DEL DÍA Y SERIE HISTÓRICA CONSTANTES)
+class SesionDolarFalsa:
+
+    def __init__(self, url, oficial=1000.0, mep=1200.0, latencia=0.1, tasa_error=0.0, seed=0):
+        self.url = url
+        self.valores = {"oficial": oficial, "bolsa": mep}
+        self.latencia = latencia
+        self.tasa_error = tasa_error
+        self.aleatorio = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def get(self, url, timeout=None):
+        time.sleep(self.latencia)
+        with self.lock:
+            falla = self.aleatorio.random() < self.tasa_error
+        if falla:
+            return RespuestaFalsa(None, RuntimeError("503 Error simulado"))
+        if url == self.url:
+            return RespuestaFalsa([{"casa": casa, "venta": valor} for casa, valor in self.valores.items()])
+        casa = "oficial" if url.rstrip("/").endswith("oficial") else "bolsa"
+        fechas = pd.date_range("2015-01-01", pd.Timestamp.today().normalize(), freq="D")
+        return RespuestaFalsa([{"fecha": f"{fecha:%Y-%m-%d}", "venta": self.valores[casa]} for fecha in fechas])
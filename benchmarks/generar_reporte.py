@@ -0,0 +1,90 @@
+## GENERADOR DE REPORTES SINTÉTICOS DE BALANZ (HOJA resultados_por_lotes_finales)
+#
+# USO:
+#   python -m benchmarks.generar_reporte --lotes 10000 --tickers 100 --salida reporte_10k.xlsx
+
+## IMPORTACION DE BIBLIOTECAS
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+from openpyxl import Workbook
+
+from ingesta import HOJA_LOTES
+
+## ENCABEZADO CON TODAS LAS COLUMNAS DEL REPORTE ORIGINAL (INCLUSO LAS QUE NO SE USAN)
+ENCABEZADO = ["Tipo", "Ticker", "Descripcion", "Operacion", "Fecha", "Fecha Lote", "Cantidad",
+              "Precio Compra", "Gastos", "Moneda", "DolarCCL", "DolarMEP", "DolarOficial"]
+
+## OTROS TIPOS DE ACTIVO QUE EL PROCESO DEBE DESCARTAR
+OTROS_TIPOS = ["Acciones", "Bonos", "Fondos"]
+
+
+## NOMBRES DE TICKERS SINTÉTICOS
+def nombres_tickers(cantidad):
+    return [f"TK{i:03d}" for i in range(cantidad)]
+
+
+## PRECIO DE REFERENCIA (ARS) DE CADA TICKER SINTÉTICO, IGUAL PARA EL MISMO seed
+def precios_referencia(cantidad, seed=0):
+    rng = np.random.default_rng(seed)
+    return dict(zip(nombres_tickers(cantidad), np.round(rng.uniform(500, 50000, cantidad), 2)))
+
+
+## GENERA UN REPORTE CON lotes FILAS DE CEDEARS (+ proporcion_otros DE OTROS ACTIVOS)
+def generar_reporte(ruta, lotes, tickers, seed=0, proporcion_otros=0.2, desde="2022-01-01"):
+    rng = np.random.default_rng(seed)
+    nombres = nombres_tickers(tickers)
+    precios = precios_referencia(tickers, seed)
+    inicio = datetime.fromisoformat(desde)
+    dias = max((datetime.now() - inicio).days, 1)
+
+    total = int(lotes / (1 - proporcion_otros)) if proporcion_otros else lotes
+    es_cedear = np.zeros(total, dtype=bool)
+    es_cedear[rng.choice(total, lotes, replace=False)] = True
+    indices_ticker = rng.integers(0, tickers, total)
+    desplazamientos = rng.integers(0, dias, total)
+    cantidades = rng.integers(1, 200, total)
+    variaciones = rng.uniform(0.5, 1.5, total)
+    dolares_mep = np.round(rng.uniform(300, 1500, total), 2)
+    dolares_oficial = np.round(dolares_mep * rng.uniform(0.7, 1.05, total), 2)
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet(HOJA_LOTES)
+    hoja.append(ENCABEZADO)
+    for i in range(total):
+        ticker = nombres[indices_ticker[i]]
+        fecha = inicio + timedelta(days=int(desplazamientos[i]))
+        precio = round(float(precios[ticker] * variaciones[i]), 2)
+        cantidad = int(cantidades[i])
+        hoja.append([
+            "Cedears" if es_cedear[i] else OTROS_TIPOS[i % len(OTROS_TIPOS)],
+            ticker,
+            f"CEDEAR {ticker}",
+            "Compra",
+            fecha,
+            fecha,
+            cantidad,
+            precio,
+            round(cantidad * precio * 0.005, 2),
+            "Pesos",
+            float(dolares_mep[i]) * 1.02,
+            float(dolares_mep[i]),
+            float(dolares_oficial[i])
+        ])
+    libro.save(ruta)
+    return ruta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera un reporte sintético de Balanz.")
+    parser.add_argument("--lotes", type=int, default=1000)
+    parser.add_argument("--tickers", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--salida", required=True)
+    args = parser.parse_args(argv)
+    generar_reporte(args.salida, args.lotes, args.tickers, args.seed)
+
+
+if __name__ == "__main__":
+    main()
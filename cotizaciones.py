@@ -0,0 +1,547 @@
+## IMPORTACION DE BIBLIOTECAS
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+
+import pandas as pd
+import yfinance as yf
+
+## SUFIJO DE LOS CEDEARS EN BYMA
+SUFIJO_MERCADO = ".BA"
+
+
+## LIMITADOR DE SOLICITUDES (TOKEN BUCKET) CON BACKOFF ADAPTATIVO ANTE ERRORES 429
+class LimitadorTokens:
+
+    def __init__(self, tasa=2.0, capacidad=4, tasa_minima=0.25, espera_maxima=30.0):
+        self.tasa_maxima = tasa
+        self.tasa_minima = tasa_minima
+        self.tasa = tasa
+        self.capacidad = capacidad
+        self.espera_maxima = espera_maxima
+        self.tokens = float(capacidad)
+        self.ultima_recarga = time.monotonic()
+        self.bloqueado_hasta = 0.0
+        self.lock = threading.Lock()
+
+    ## ESPERA HASTA QUE HAYA UN TOKEN DISPONIBLE
+    def adquirir(self):
+        while True:
+            with self.lock:
+                ahora = time.monotonic()
+                self.tokens = min(self.capacidad, self.tokens + (ahora - self.ultima_recarga) * self.tasa)
+                self.ultima_recarga = ahora
+                if ahora >= self.bloqueado_hasta and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                espera = max(self.bloqueado_hasta - ahora, (1 - self.tokens) / self.tasa)
+            time.sleep(espera)
+
+    ## TOMA UN TOKEN SOLO SI HAY UNO DISPONIBLE EN ESTE MOMENTO (NO ESPERA)
+    def intentar_adquirir(self):
+        with self.lock:
+            ahora = time.monotonic()
+            self.tokens = min(self.capacidad, self.tokens + (ahora - self.ultima_recarga) * self.tasa)
+            self.ultima_recarga = ahora
+            if ahora >= self.bloqueado_hasta and self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    ## ANTE UN 429 SE REDUCE LA TASA A LA MITAD Y SE BLOQUEA CON BACKOFF EXPONENCIAL
+    def penalizar(self, intento):
+        with self.lock:
+            self.tasa = max(self.tasa_minima, self.tasa / 2)
+            espera = min(self.espera_maxima, 2 ** intento)
+            self.bloqueado_hasta = max(self.bloqueado_hasta, time.monotonic() + espera)
+
+    ## CADA RESPUESTA CORRECTA RECUPERA LA TASA DE FORMA GRADUAL
+    def recompensar(self):
+        with self.lock:
+            self.tasa = min(self.tasa_maxima, self.tasa * 1.2)
+
+
+## LIMITADOR COMPARTIDO POR TODO EL PROCESO (YAHOO LIMITA POR IP, NO POR SESIÓN)
+limitador_global = LimitadorTokens()
+
+
+## CACHE DE COTIZACIONES COMPARTIDA POR TODAS LAS SESIONES DEL PROCESO
+# - TTL: TIEMPO EN SEGUNDOS EN QUE UN PRECIO SE CONSIDERA FRESCO
+# - VENTANA_OBSOLETA: TIEMPO EXTRA EN QUE SE DEVUELVE EL PRECIO VIEJO MIENTRAS SE ACTUALIZA EN SEGUNDO PLANO
+# - MAX_ENTRADAS: LÍMITE DE TICKERS EN MEMORIA (SE DESCARTA EL MENOS USADO)
+# - RUTA_SQLITE: ARCHIVO OPCIONAL PARA CONSERVAR LOS PRECIOS ENTRE REINICIOS
+class CacheCotizaciones:
+
+    def __init__(self, ttl=300, ventana_obsoleta=900, max_entradas=2000, ruta_sqlite=None):
+        self.ttl = ttl
+        self.ventana_obsoleta = ventana_obsoleta
+        self.max_entradas = max_entradas
+        self.entradas = OrderedDict()
+        self.en_revalidacion = set()
+        self.aciertos = 0
+        self.fallos = 0
+        self.lock = threading.Lock()
+        self.conexion = None
+        if ruta_sqlite:
+            self.conexion = sqlite3.connect(ruta_sqlite, check_same_thread=False)
+            self.conexion.execute(
+                "CREATE TABLE IF NOT EXISTS cotizaciones (ticker TEXT PRIMARY KEY, precio REAL, guardado REAL)"
+            )
+            self.conexion.commit()
+            self.cargar_sqlite()
+
+    ## CARGA EN MEMORIA LOS PRECIOS QUE AÚN PUEDEN SERVIR
+    def cargar_sqlite(self):
+        limite = time.time() - self.ttl - self.ventana_obsoleta
+        filas = self.conexion.execute(
+            "SELECT ticker, precio, guardado FROM cotizaciones WHERE guardado >= ? ORDER BY guardado",
+            (limite,)
+        ).fetchall()
+        for ticker, precio, guardado in filas[-self.max_entradas:]:
+            self.entradas[ticker] = (precio, guardado)
+
+    ## DEVUELVE (PRECIO, ESTADO) DONDE ESTADO ES "fresco", "obsoleto" O None
+    def obtener(self, ticker):
+        with self.lock:
+            entrada = self.entradas.get(ticker)
+            if entrada is None:
+                self.fallos += 1
+                return None, None
+            precio, guardado = entrada
+            edad = time.time() - guardado
+            if edad < self.ttl:
+                self.entradas.move_to_end(ticker)
+                self.aciertos += 1
+                return precio, "fresco"
+            if edad < self.ttl + self.ventana_obsoleta:
+                self.entradas.move_to_end(ticker)
+                self.aciertos += 1
+                return precio, "obsoleto"
+            del self.entradas[ticker]
+            self.fallos += 1
+            return None, None
+
+    def guardar(self, precios):
+        if not precios:
+            return
+        ahora = time.time()
+        with self.lock:
+            for ticker, precio in precios.items():
+                self.entradas[ticker] = (precio, ahora)
+                self.entradas.move_to_end(ticker)
+                self.en_revalidacion.discard(ticker)
+            while len(self.entradas) > self.max_entradas:
+                self.entradas.popitem(last=False)
+            if self.conexion is not None:
+                self.conexion.executemany(
+                    "INSERT OR REPLACE INTO cotizaciones (ticker, precio, guardado) VALUES (?, ?, ?)",
+                    [(t, p, ahora) for t, p in precios.items()]
+                )
+                self.conexion.commit()
+
+    ## MARCA LOS TICKERS A REVALIDAR Y DEVUELVE SOLO LOS QUE NADIE ESTÁ ACTUALIZANDO
+    def reservar_revalidacion(self, tickers):
+        with self.lock:
+            nuevos = [t for t in tickers if t not in self.en_revalidacion]
+            self.en_revalidacion.update(nuevos)
+            return nuevos
+
+    def liberar_revalidacion(self, tickers):
+        with self.lock:
+            self.en_revalidacion.difference_update(tickers)
+
+    def tasa_aciertos(self):
+        with self.lock:
+            consultas = self.aciertos + self.fallos
+            return self.aciertos / consultas if consultas else 0.0
+
+
+## CACHE GLOBAL CONFIGURABLE POR VARIABLES DE ENTORNO
+cache_global = CacheCotizaciones(
+    ttl=float(os.environ.get("COTIZACIONES_TTL", 300)),
+    ventana_obsoleta=float(os.environ.get("COTIZACIONES_VENTANA_OBSOLETA", 900)),
+    max_entradas=int(os.environ.get("COTIZACIONES_MAX_ENTRADAS", 2000)),
+    ruta_sqlite=os.environ.get("COTIZACIONES_CACHE_DB") or None
+)
+
+
+## IDENTIFICA SI UN ERROR CORRESPONDE A UN LÍMITE DE SOLICITUDES
+def es_limite_de_tasa(error):
+    mensaje = str(error).lower()
+    return (type(error).__name__ == "YFRateLimitError"
+            or "429" in mensaje
+            or "too many requests" in mensaje
+            or "rate limit" in mensaje)
+
+
+## IDENTIFICA LOS ERRORES DEL SERVICIO (RED, TIEMPO DE ESPERA O 429), LOS ÚNICOS QUE CUENTAN PARA UN CORTOCIRCUITO
+# UN SÍMBOLO INEXISTENTE O SIN PRECIO ES UNA RESPUESTA DEL SERVICIO, NO UNA FALLA
+def es_error_de_red(error):
+    if es_limite_de_tasa(error) or isinstance(error, OSError):
+        return True
+    nombre = type(error).__name__.lower()
+    mensaje = str(error).lower()
+    return ("timeout" in nombre or "connection" in nombre
+            or "timed out" in mensaje or "connection" in mensaje)
+
+
+## DESCARGA EN UNA SOLA SOLICITUD LOS CIERRES DIARIOS DE VARIOS TICKERS
+# DEVUELVE UN DATAFRAME (FECHA x TICKER SIN SUFIJO) O None SI NO HUBO DATOS
+# LOS ERRORES DE RED (es_error_de_red) SE PROPAGAN, TAMBIÉN EL 429 SI PERSISTE TRAS LOS REINTENTOS
+def descargar_cierres_lote(tickers, limitador, reintentos=3, **parametros):
+    simbolos = [t + SUFIJO_MERCADO for t in tickers]
+    ultimo_error = None
+    for intento in range(reintentos):
+        limitador.adquirir()
+        try:
+            datos = yf.download(simbolos, interval="1d", progress=False, threads=False,
+                                auto_adjust=False, **parametros)
+        except Exception as e:
+            if es_limite_de_tasa(e):
+                ultimo_error = e
+                limitador.penalizar(intento + 1)
+                continue
+            if es_error_de_red(e):
+                raise
+            return None
+        limitador.recompensar()
+        if datos is None or datos.empty:
+            return None
+
+        # SEGÚN LA VERSIÓN DE YFINANCE LAS COLUMNAS PUEDEN O NO TENER MULTIINDEX
+        cierres = datos["Close"]
+        if isinstance(cierres, pd.Series):
+            cierres = cierres.to_frame(name=simbolos[0])
+        cierres = cierres.rename(columns=dict(zip(simbolos, tickers)))
+        return cierres[[t for t in tickers if t in cierres.columns]]
+    raise ultimo_error
+
+
+## DESCARGA EN UNA SOLA SOLICITUD EL ÚLTIMO PRECIO DE VARIOS TICKERS
+def descargar_lote(tickers, limitador, reintentos=3):
+    cierres = descargar_cierres_lote(tickers, limitador, reintentos, period="5d")
+    if cierres is None:
+        return {}
+    ultimos = cierres.ffill().iloc[-1]
+    return {ticker: float(precio) for ticker, precio in ultimos.items() if pd.notna(precio)}
+
+
+## CIERRES DIARIOS DE TODOS LOS TICKERS DESDE UNA FECHA (PARA RECONSTRUIR EL HISTÓRICO)
+def descargar_cierres(tickers, desde, tamanio_lote=40, limitador=None):
+    limitador = limitador or limitador_global
+    tickers = list(dict.fromkeys(tickers))
+    partes = []
+    for inicio in range(0, len(tickers), tamanio_lote):
+        try:
+            cierres = descargar_cierres_lote(tickers[inicio:inicio + tamanio_lote], limitador, start=desde)
+        except Exception:
+            continue
+        if cierres is not None:
+            partes.append(cierres)
+    if not partes:
+        return pd.DataFrame()
+    cierres = pd.concat(partes, axis=1).sort_index()
+    cierres.index = pd.to_datetime(cierres.index)
+    if cierres.index.tz is not None:
+        cierres.index = cierres.index.tz_localize(None)
+    cierres.index = cierres.index.normalize()
+    return cierres[~cierres.index.duplicated(keep="last")]
+
+
+## UNA SOLICITUD DEL PRECIO DE UN TICKER (SIN LIMITADOR: EL TOKEN LO TOMA QUIEN LA LLAMA)
+def consultar_precio(ticker):
+    ticker_obj = yf.Ticker(ticker + SUFIJO_MERCADO)
+    precio = ticker_obj.fast_info["last_price"]
+    if precio is None or pd.isna(precio):
+        info = ticker_obj.info
+        precio = info.get("regularMarketPrice")
+    if precio is None or pd.isna(precio):
+        raise ValueError("Sin precio disponible")
+    return float(precio)
+
+
+## OBTIENE EL PRECIO DE UN TICKER INDIVIDUAL (SE USA PARA LOS QUE FALTAN EN EL LOTE)
+# demora_cobertura: SI SE INDICA, CADA SOLICITUD ES CUBIERTA (VER solicitud_cubierta). LA DEMORA SE CUENTA DESDE QUE
+# SE OBTUVO EL TOKEN, ASÍ LA ESPERA DEL LIMITADOR NUNCA DISPARA UNA COPIA, Y LA COPIA SOLO SE LANZA SI HAY UN TOKEN LIBRE
+def descargar_individual(ticker, limitador, reintentos=3, demora_cobertura=None):
+    ultimo_error = None
+    for intento in range(reintentos):
+        limitador.adquirir()
+        try:
+            if demora_cobertura is None:
+                precio = consultar_precio(ticker)
+            else:
+                precio = solicitud_cubierta(consultar_precio, ticker, demora=demora_cobertura,
+                                            permitir_copia=limitador.intentar_adquirir)
+            limitador.recompensar()
+            return precio
+        except Exception as e:
+            ultimo_error = e
+            if es_limite_de_tasa(e):
+                limitador.penalizar(intento + 1)
+            else:
+                break
+    raise ultimo_error
+
+
+## ACTUALIZA EN SEGUNDO PLANO LOS PRECIOS OBSOLETOS QUE SE DEVOLVIERON DESDE LA CACHE
+def revalidar_en_segundo_plano(tickers, cache, limitador, tamanio_lote):
+    tickers = cache.reservar_revalidacion(tickers)
+    if not tickers:
+        return
+
+    def tarea():
+        try:
+            for inicio in range(0, len(tickers), tamanio_lote):
+                try:
+                    cache.guardar(descargar_lote(tickers[inicio:inicio + tamanio_lote], limitador))
+                except Exception:
+                    continue
+        finally:
+            cache.liberar_revalidacion(tickers)
+
+    threading.Thread(target=tarea, daemon=True).start()
+
+
+## CORTOCIRCUITO DE UN PROVEEDOR: TRAS VARIOS FALLOS SEGUIDOS SE LO SALTEA DURANTE UN TIEMPO
+# PASADA LA ESPERA SE DEJA PASAR UNA SOLICITUD DE PRUEBA (MEDIO ABIERTO): SI FUNCIONA SE CIERRA, SI FALLA SE VUELVE A ABRIR
+# MIENTRAS LA PRUEBA ESTÁ EN CURSO LAS DEMÁS SOLICITUDES SE RECHAZAN. CADA permite() QUE DEVUELVE True DEBE TERMINAR
+# EN exito() O fallo()
+class Cortocircuito:
+
+    def __init__(self, umbral_fallos=3, espera=60.0):
+        self.umbral_fallos = umbral_fallos
+        self.espera = espera
+        self.fallos = 0
+        self.abierto_hasta = 0.0
+        self.probando = False
+        self.lock = threading.Lock()
+
+    def cerrado(self):
+        with self.lock:
+            return self.fallos < self.umbral_fallos
+
+    ## ABIERTO: NO SE PUEDE CONSULTAR NI SIQUIERA COMO PRUEBA (NO CONSUME LA PRUEBA)
+    def abierto(self):
+        with self.lock:
+            return self.fallos >= self.umbral_fallos and (self.probando or time.monotonic() < self.abierto_hasta)
+
+    def permite(self):
+        with self.lock:
+            if self.fallos < self.umbral_fallos:
+                return True
+            if self.probando or time.monotonic() < self.abierto_hasta:
+                return False
+            self.probando = True
+            return True
+
+    def exito(self):
+        with self.lock:
+            self.fallos = 0
+            self.probando = False
+
+    def fallo(self):
+        with self.lock:
+            self.fallos += 1
+            self.probando = False
+            if self.fallos >= self.umbral_fallos:
+                self.abierto_hasta = time.monotonic() + self.espera
+
+
+## POOL PARA LAS SOLICITUDES DUPLICADAS (SEPARADO DEL POOL QUE LAS ESPERA PARA NO BLOQUEARSE)
+pool_cobertura = ThreadPoolExecutor(max_workers=8, thread_name_prefix="cobertura")
+
+
+## SOLICITUD CUBIERTA: SI LA PRIMERA NO RESPONDE EN demora SEGUNDOS SE LANZA UNA COPIA Y SE USA LA PRIMERA QUE RESPONDA BIEN
+# permitir_copia() (OPCIONAL) DECIDE EN ESE MOMENTO SI SE LANZA LA COPIA; SI NO, SE ESPERA A LA PRIMERA
+def solicitud_cubierta(funcion, *args, demora=2.0, permitir_copia=None):
+    primera = pool_cobertura.submit(funcion, *args)
+    hechas, _ = wait([primera], timeout=demora)
+    if hechas or (permitir_copia is not None and not permitir_copia()):
+        return primera.result()
+    pendientes = {primera, pool_cobertura.submit(funcion, *args)}
+    ultimo_error = None
+    while pendientes:
+        hechas, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+        for futuro in hechas:
+            try:
+                return futuro.result()
+            except Exception as e:
+                ultimo_error = e
+    raise ultimo_error
+
+
+## INTERFAZ DE PROVEEDOR DE COTIZACIONES
+# obtener(tickers, limitador, avisar) DEVUELVE (PRECIOS, ERRORES); avisar(ticker) SE LLAMA EN EL HILO QUE INVOCA
+class ProveedorCotizaciones(ABC):
+
+    nombre = ""
+
+    def __init__(self, cortocircuito=None):
+        self.cortocircuito = cortocircuito or Cortocircuito()
+
+    @abstractmethod
+    def obtener(self, tickers, limitador, avisar):
+        ...
+
+
+## YAHOO POR LOTES: UNA SOLICITUD CADA tamanio_lote TICKERS (LA FUENTE MÁS BARATA)
+# UN LOTE SIN PRECIOS (SÍMBOLOS INEXISTENTES) NO ES UNA FALLA: SOLO LOS ERRORES DE RED ABREN EL CORTOCIRCUITO
+class ProveedorYahooLote(ProveedorCotizaciones):
+
+    nombre = "yahoo_lote"
+
+    def __init__(self, tamanio_lote=40, cortocircuito=None):
+        super().__init__(cortocircuito)
+        self.tamanio_lote = tamanio_lote
+
+    def obtener(self, tickers, limitador, avisar):
+        precios = {}
+        for inicio in range(0, len(tickers), self.tamanio_lote):
+            if not self.cortocircuito.permite():
+                break
+            lote = tickers[inicio:inicio + self.tamanio_lote]
+            try:
+                precios_lote = descargar_lote(lote, limitador)
+            except Exception:
+                self.cortocircuito.fallo()
+                continue
+            self.cortocircuito.exito()
+            precios.update(precios_lote)
+            for ticker in lote:
+                if ticker in precios_lote:
+                    avisar(ticker)
+        return precios, {}
+
+
+## YAHOO TICKER POR TICKER (fast_info) CON SOLICITUDES CUBIERTAS PARA RECORTAR LAS DEMORAS LARGAS
+class ProveedorYahooIndividual(ProveedorCotizaciones):
+
+    nombre = "yahoo_individual"
+
+    def __init__(self, max_workers=4, demora_cobertura=2.0, cortocircuito=None):
+        super().__init__(cortocircuito)
+        self.max_workers = max_workers
+        self.demora_cobertura = demora_cobertura
+
+    def consultar(self, ticker, limitador):
+        if not self.cortocircuito.permite():
+            raise RuntimeError(f"Proveedor {self.nombre} suspendido por fallos repetidos")
+        try:
+            precio = descargar_individual(ticker, limitador, demora_cobertura=self.demora_cobertura)
+        except Exception as e:
+            if es_error_de_red(e):
+                self.cortocircuito.fallo()
+            else:
+                self.cortocircuito.exito()
+            raise
+        self.cortocircuito.exito()
+        return precio
+
+    def obtener(self, tickers, limitador, avisar):
+        precios = {}
+        errores = {}
+
+        def registrar(ticker, consulta):
+            try:
+                precios[ticker] = consulta()
+                avisar(ticker)
+            except Exception as e:
+                errores[ticker] = e
+
+        ## CON EL CORTOCIRCUITO MEDIO ABIERTO EL PRIMER TICKER ES LA PRUEBA: LOS DEMÁS ESPERAN SU RESULTADO
+        if tickers and not self.cortocircuito.cerrado():
+            registrar(tickers[0], lambda: self.consultar(tickers[0], limitador))
+            tickers = tickers[1:]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futuros = {pool.submit(self.consultar, t, limitador): t for t in tickers}
+            for futuro in as_completed(futuros):
+                registrar(futuros[futuro], futuro.result)
+        return precios, errores
+
+
+## CADENA DE PROVEEDORES COMPARTIDA POR TODO EL PROCESO (LOS CORTOCIRCUITOS RECUERDAN LOS FALLOS ENTRE EJECUCIONES)
+proveedores_globales = [
+    ProveedorYahooLote(tamanio_lote=int(os.environ.get("COTIZACIONES_TAMANIO_LOTE", 40))),
+    ProveedorYahooIndividual(demora_cobertura=float(os.environ.get("COTIZACIONES_DEMORA_COBERTURA", 2.0)))
+]
+
+
+## MOTOR DE COTIZACIONES: CACHE + CADENA DE PROVEEDORES + ÚLTIMO PRECIO CONOCIDO
+# CADA PROVEEDOR RECIBE SOLO LOS TICKERS QUE LOS ANTERIORES NO RESOLVIERON; LOS SUSPENDIDOS SE SALTEAN
+# respaldo(tickers) (OPCIONAL) DEVUELVE EL ÚLTIMO PRECIO CONOCIDO DE LOS TICKERS QUE NINGÚN PROVEEDOR RESOLVIÓ
+# progreso(completados, total, ticker) SE LLAMA SIEMPRE DESDE EL HILO QUE INVOCA LA FUNCIÓN
+# estadisticas (OPCIONAL) SE COMPLETA CON LA CANTIDAD DE PRECIOS OBTENIDOS DE LA CACHE, DE LA RED Y DEL RESPALDO
+# tamanio_lote: TICKERS POR SOLICITUD AL REVALIDAR EN SEGUNDO PLANO LOS PRECIOS OBSOLETOS
+def obtener_cotizaciones(tickers, progreso=None, tamanio_lote=40, limitador=None, cache=None, estadisticas=None,
+                         proveedores=None, respaldo=None):
+    limitador = limitador or limitador_global
+    cache = cache or cache_global
+    proveedores = proveedores if proveedores is not None else proveedores_globales
+    tickers = list(dict.fromkeys(tickers))
+    total = len(tickers)
+    cotizaciones = {}
+    errores = {}
+    completados = 0
+
+    def avisar(ticker):
+        nonlocal completados
+        completados += 1
+        if progreso is not None:
+            progreso(completados, total, ticker)
+
+    ## PRECIOS DISPONIBLES EN LA CACHE
+    obsoletos = []
+    for ticker in tickers:
+        precio, estado = cache.obtener(ticker)
+        if estado is None:
+            continue
+        cotizaciones[ticker] = precio
+        if estado == "obsoleto":
+            obsoletos.append(ticker)
+        avisar(ticker)
+    if obsoletos:
+        revalidar_en_segundo_plano(obsoletos, cache, limitador, tamanio_lote)
+
+    ## PROVEEDORES EN ORDEN, CADA UNO CON LOS TICKERS QUE FALTAN
+    pendientes = [t for t in tickers if t not in cotizaciones]
+    en_cache = total - len(pendientes)
+    for proveedor in proveedores:
+        if not pendientes:
+            break
+        if proveedor.cortocircuito.abierto():
+            continue
+        precios, errores_proveedor = proveedor.obtener(pendientes, limitador, avisar)
+        cache.guardar(precios)
+        cotizaciones.update(precios)
+        errores.update(errores_proveedor)
+        pendientes = [t for t in pendientes if t not in cotizaciones]
+    de_red = total - en_cache - len(pendientes)
+
+    ## ÚLTIMO PRECIO CONOCIDO (NO SE GUARDA EN LA CACHE: NO ES UN PRECIO ACTUAL)
+    de_respaldo = 0
+    if pendientes and respaldo is not None:
+        try:
+            precios = respaldo(pendientes)
+        except Exception:
+            precios = {}
+        for ticker in pendientes:
+            if ticker in precios:
+                cotizaciones[ticker] = precios[ticker]
+                de_respaldo += 1
+                avisar(ticker)
+        pendientes = [t for t in pendientes if t not in cotizaciones]
+
+    for ticker in pendientes:
+        errores.setdefault(ticker, RuntimeError("Ningún proveedor devolvió un precio"))
+        avisar(ticker)
+    if estadisticas is not None:
+        estadisticas["cache"] = en_cache
+        estadisticas["red"] = de_red
+        estadisticas["respaldo"] = de_respaldo
+
+    return {t: cotizaciones[t] for t in tickers if t in cotizaciones}, {t: e for t, e in errores.items() if t not in cotizaciones}
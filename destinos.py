@@ -0,0 +1,521 @@
+## DESTINOS DE LAS TABLAS DEL PROCESO
+# EL PROCESO ESCRIBE cedears, datos_historicos_cedears, historico_dolar Y pipeline_runs A TRAVÉS DE UN DESTINO:
+#   DestinoSQL:     POSTGRES (SUPABASE) O SQLITE, CON LAS FUNCIONES DE base_datos
+#   DestinoDuckDB:  UN ARCHIVO .duckdb LOCAL
+#   DestinoParquet: UNA CARPETA DE ARCHIVOS PARQUET PARTICIONADOS POR AÑO Y MES
+# LOS DESTINOS LOCALES NO USAN LA RED: RECIBEN LOS DATAFRAMES COMO TABLAS ARROW Y DEVUELVEN UN ARCHIVO PARA DESCARGAR.
+# LAS COLUMNAS Y CLAVES SON LAS MISMAS QUE EN base_datos.
+
+## IMPORTACION DE BIBLIOTECAS
+import os
+import shutil
+import threading
+import uuid
+
+import pandas as pd
+from sqlalchemy import BigInteger, Boolean, Date, DateTime, Float, Integer, String, Text
+
+from base_datos import (COLUMNAS_HISTORICO_ANALITICA, COLUMNAS_MERCADO, COLUMNAS_REVALUACION, CONSULTA_ULTIMAS_FOTOS,
+                        actualizar_vistas, calcular_clave_lote, cedears_table, guardar_historico, guardar_mercado,
+                        guardar_metricas, guardar_metricas_rendimiento, guardar_tablas, historico_dolar_table,
+                        historico_table, leer_historico, leer_lotes, lotes_cotizados, metricas_rendimiento_table,
+                        pipeline_runs_table, precios_de_fotos, rango_historico, ultima_huella_lotes, ultimas_fotos,
+                        ultimos_precios)
+from esquema import asegurar_esquema
+from mantenimiento import inicio_retencion, mantener_historicos
+
+## DEPENDENCIAS OPCIONALES (pyarrow PARA LOS DESTINOS LOCALES Y duckdb PARA DestinoDuckDB)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_DISPONIBLE = True
+except ImportError:
+    PYARROW_DISPONIBLE = False
+
+try:
+    import duckdb
+    DUCKDB_DISPONIBLE = True
+except ImportError:
+    DUCKDB_DISPONIBLE = False
+
+
+## INTERFAZ DE DESTINO: CADA IMPLEMENTACIÓN REDEFINE LOS MÉTODOS
+class Destino:
+
+    ## ENGINE DE SQLALCHEMY SI EL DESTINO ES UNA BASE SQL (LO USA dolar.ProveedorDolar PARA LEER historico_dolar)
+    engine = None
+
+    ## CREA O ACTUALIZA LAS TABLAS. DEVUELVE LAS VERSIONES DE ESQUEMA APLICADAS
+    def preparar(self):
+        return []
+
+    ## GUARDA LOS LOTES Y LA FOTO DEL DÍA. DEVUELVE, POR TABLA, LAS FILAS ESCRITAS Y LOS BYTES ENVIADOS
+    def guardar_tablas(self, df_cedears, df_historico, df_dolar):
+        raise NotImplementedError
+
+    ## LOTES YA GUARDADOS (COLUMNAS base_datos.COLUMNAS_REVALUACION)
+    def leer_lotes(self):
+        raise NotImplementedError
+
+    ## REVALUACIÓN: SOLO LAS COLUMNAS DE MERCADO DE LOS LOTES YA GUARDADOS Y LA FOTO DEL DÍA
+    # LOS LOTES SE UBICAN POR id_operacion O, SI NO LO TIENEN, POR SU CLAVE NATURAL
+    def guardar_mercado(self, df_cedears, df_historico, df_dolar):
+        raise NotImplementedError
+
+    ## AGREGA EL HISTÓRICO RECONSTRUIDO CONSERVANDO LAS FILAS QUE YA EXISTÍAN
+    def guardar_historico(self, df_historico, df_dolar):
+        raise NotImplementedError
+
+    def guardar_metricas(self, fila):
+        pass
+
+    ## HUELLA DE LOTES (base_datos.huella_lotes) DE LA ÚLTIMA EJECUCIÓN EXITOSA; None SI NO SE CONOCE
+    def ultima_huella(self):
+        return None
+
+    ## ÚLTIMO PRECIO GUARDADO DE CADA TICKER (RESPALDO CUANDO NO HAY COTIZACIÓN)
+    def ultimos_precios(self, tickers):
+        return {}
+
+    ## MANTENIMIENTO DE LOS HISTÓRICOS (mantenimiento.mantener_historicos); {} SI NO APLICA
+    def mantener(self):
+        return {}
+
+    ## PRIMERA FECHA QUE SE CONSERVA EN LAS TABLAS DIARIAS (LO ANTERIOR SE COMPACTA); None SI SE CONSERVA TODO
+    def inicio_historico(self):
+        return None
+
+    ## PRIMERA Y ÚLTIMA FECHA DE LAS FOTOS DIARIAS ANTERIORES A hasta; (None, None) SI NO HAY
+    def rango_historico(self, hasta):
+        return None, None
+
+    ## FOTOS DIARIAS GUARDADAS (COLUMNAS base_datos.COLUMNAS_HISTORICO_ANALITICA); None SI NO SE PUEDEN LEER
+    def leer_historico(self):
+        return None
+
+    ## REEMPLAZA LAS MÉTRICAS DE RENDIMIENTO (analitica.calcular_metricas)
+    def guardar_metricas_rendimiento(self, df_metricas):
+        pass
+
+    def actualizar_vistas(self):
+        pass
+
+    ## RUTA DE UN ARCHIVO CON EL RESULTADO PARA DESCARGAR (None SI NO APLICA)
+    def archivo_descarga(self):
+        return None
+
+
+## POSTGRES O SQLITE A TRAVÉS DE SQLALCHEMY
+class DestinoSQL(Destino):
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def preparar(self):
+        return asegurar_esquema(self.engine)
+
+    def guardar_tablas(self, df_cedears, df_historico, df_dolar):
+        return guardar_tablas(self.engine, df_cedears, df_historico, df_dolar)
+
+    def leer_lotes(self):
+        return leer_lotes(self.engine)
+
+    def guardar_mercado(self, df_cedears, df_historico, df_dolar):
+        return guardar_mercado(self.engine, df_cedears, df_historico, df_dolar)
+
+    def guardar_historico(self, df_historico, df_dolar):
+        return guardar_historico(self.engine, df_historico, df_dolar)
+
+    def guardar_metricas(self, fila):
+        guardar_metricas(self.engine, fila)
+
+    def ultima_huella(self):
+        return ultima_huella_lotes(self.engine)
+
+    def ultimos_precios(self, tickers):
+        return ultimos_precios(self.engine, tickers)
+
+    def mantener(self):
+        return mantener_historicos(self.engine)
+
+    def inicio_historico(self):
+        return inicio_retencion(self.engine)
+
+    def rango_historico(self, hasta):
+        return rango_historico(self.engine, hasta)
+
+    def leer_historico(self):
+        return leer_historico(self.engine)
+
+    def guardar_metricas_rendimiento(self, df_metricas):
+        return guardar_metricas_rendimiento(self.engine, df_metricas)
+
+    def actualizar_vistas(self):
+        actualizar_vistas(self.engine)
+
+
+## TIPOS ARROW EQUIVALENTES A LOS TIPOS DE LAS TABLAS
+def tipo_arrow(tipo):
+    if isinstance(tipo, (BigInteger, Integer)):
+        return pa.int64()
+    if isinstance(tipo, Float):
+        return pa.float64()
+    if isinstance(tipo, Boolean):
+        return pa.bool_()
+    if isinstance(tipo, DateTime):
+        return pa.timestamp("us")
+    if isinstance(tipo, Date):
+        return pa.date32()
+    if isinstance(tipo, (String, Text)):
+        return pa.string()
+    raise TypeError(f"Tipo de columna no soportado: {tipo!r}")
+
+
+## CONVERSIÓN DE UN DATAFRAME A UNA TABLA ARROW CON EL ESQUEMA DE LA TABLA (SOLO LAS COLUMNAS PRESENTES)
+# LAS COLUMNAS NUMÉRICAS SE TOMAN SIN COPIA; LAS CATEGÓRICAS Y FECHAS SE CONVIERTEN AL TIPO DE LA TABLA
+def tabla_arrow(df, tabla):
+    columnas = [c for c in tabla.columns if c.name in df.columns]
+    esquema = pa.schema([(c.name, tipo_arrow(c.type)) for c in columnas])
+    arrow = pa.Table.from_pandas(df[[c.name for c in columnas]], preserve_index=False)
+    return arrow.cast(esquema)
+
+
+## TIPOS SQL DE DUCKDB EQUIVALENTES A LOS TIPOS DE LAS TABLAS
+def tipo_duckdb(tipo):
+    if isinstance(tipo, (BigInteger, Integer)):
+        return "BIGINT"
+    if isinstance(tipo, Float):
+        return "DOUBLE"
+    if isinstance(tipo, Boolean):
+        return "BOOLEAN"
+    if isinstance(tipo, DateTime):
+        return "TIMESTAMP"
+    if isinstance(tipo, Date):
+        return "DATE"
+    return "VARCHAR"
+
+
+## CREATE TABLE DE DUCKDB CON LAS MISMAS COLUMNAS Y CLAVE PRIMARIA
+# LAS CLAVES AUTOINCREMENTALES (id_operacion, id_ejecucion) TOMAN SU VALOR DE UNA SECUENCIA
+def crear_tabla_duckdb(tabla):
+    definiciones = []
+    secuencias = []
+    for columna in tabla.columns:
+        definicion = f"{columna.name} {tipo_duckdb(columna.type)}"
+        if columna.autoincrement is True:
+            secuencia = f"{tabla.name}_{columna.name}_seq"
+            secuencias.append(f"CREATE SEQUENCE IF NOT EXISTS {secuencia}")
+            definicion += f" DEFAULT nextval('{secuencia}')"
+        definiciones.append(definicion)
+    clave = [c.name for c in tabla.primary_key.columns]
+    if clave:
+        definiciones.append(f"PRIMARY KEY ({', '.join(clave)})")
+    return secuencias + [f"CREATE TABLE IF NOT EXISTS {tabla.name} ({', '.join(definiciones)})"]
+
+
+## BASE DUCKDB LOCAL (UN ARCHIVO)
+# LAS ESCRITURAS A UN MISMO ARCHIVO SE SERIALIZAN: DUCKDB ADMITE UN SOLO ESCRITOR POR ARCHIVO
+class DestinoDuckDB(Destino):
+
+    def __init__(self, ruta):
+        if not (DUCKDB_DISPONIBLE and PYARROW_DISPONIBLE):
+            raise ImportError("El destino DuckDB requiere los paquetes 'duckdb' y 'pyarrow'.")
+        self.ruta = ruta
+        self.lock = threading.Lock()
+
+    def conectar(self):
+        return duckdb.connect(self.ruta)
+
+    ## INSERTA UNA TABLA ARROW; CON ignorar_duplicados SE SALTEAN LAS CLAVES YA CARGADAS
+    def insertar(self, conexion, tabla, df, ignorar_duplicados=False):
+        arrow = tabla_arrow(df, tabla)
+        conexion.register("datos_arrow", arrow)
+        try:
+            columnas = ", ".join(arrow.column_names)
+            conflicto = " ON CONFLICT DO NOTHING" if ignorar_duplicados else ""
+            antes = conexion.execute(f"SELECT count(*) FROM {tabla.name}").fetchone()[0]
+            conexion.execute(f"INSERT INTO {tabla.name} ({columnas}) SELECT {columnas} FROM datos_arrow{conflicto}")
+            despues = conexion.execute(f"SELECT count(*) FROM {tabla.name}").fetchone()[0]
+        finally:
+            conexion.unregister("datos_arrow")
+        return {'filas': despues - antes, 'bytes': arrow.nbytes}
+
+    def preparar(self):
+        with self.lock, self.conectar() as conexion:
+            for tabla in (cedears_table, historico_table, historico_dolar_table, pipeline_runs_table,
+                          metricas_rendimiento_table):
+                for sentencia in crear_tabla_duckdb(tabla):
+                    conexion.execute(sentencia)
+        return []
+
+    ## LOS LOTES SE REEMPLAZAN COMPLETOS; LOS HISTÓRICOS IGNORAN LO YA CARGADO
+    def guardar_tablas(self, df_cedears, df_historico, df_dolar):
+        df_cedears = df_cedears.assign(clave_lote=calcular_clave_lote(df_cedears))
+        resumen = {}
+        with self.lock, self.conectar() as conexion:
+            conexion.begin()
+            conexion.execute("DELETE FROM cedears")
+            resumen['cedears'] = self.insertar(conexion, cedears_table, df_cedears)
+            resumen['datos_historicos_cedears'] = self.insertar(conexion, historico_table, df_historico, True)
+            resumen['historico_dolar'] = self.insertar(conexion, historico_dolar_table, df_dolar, True)
+            conexion.commit()
+        return resumen
+
+    def leer_lotes(self):
+        with self.lock, self.conectar() as conexion:
+            df = conexion.execute(f"SELECT {', '.join(COLUMNAS_REVALUACION)} FROM cedears").df()
+        df['ticker'] = df['ticker'].astype('category')
+        return df
+
+    def guardar_mercado(self, df_cedears, df_historico, df_dolar):
+        if 'id_operacion' in df_cedears.columns:
+            clave = 'id_operacion'
+        else:
+            clave = 'clave_lote'
+            df_cedears = df_cedears.assign(clave_lote=calcular_clave_lote(df_cedears))
+        arrow = tabla_arrow(lotes_cotizados(df_cedears)[[clave] + COLUMNAS_MERCADO], cedears_table)
+        asignaciones = ", ".join(f"{c} = t.{c}" for c in COLUMNAS_MERCADO)
+        with self.lock, self.conectar() as conexion:
+            conexion.begin()
+            conexion.register("mercado_arrow", arrow)
+            try:
+                filas = conexion.execute(
+                    f"UPDATE cedears SET {asignaciones} FROM mercado_arrow t WHERE cedears.{clave} = t.{clave}"
+                ).fetchone()[0]
+            finally:
+                conexion.unregister("mercado_arrow")
+            resumen = {'cedears': {'filas': filas, 'bytes': arrow.nbytes}}
+            resumen['datos_historicos_cedears'] = self.insertar(conexion, historico_table, df_historico, True)
+            resumen['historico_dolar'] = self.insertar(conexion, historico_dolar_table, df_dolar, True)
+            conexion.commit()
+        return resumen
+
+    def guardar_historico(self, df_historico, df_dolar):
+        resumen = {}
+        with self.lock, self.conectar() as conexion:
+            conexion.begin()
+            resumen['datos_historicos_cedears'] = self.insertar(conexion, historico_table, df_historico, True)
+            resumen['historico_dolar'] = self.insertar(conexion, historico_dolar_table, df_dolar, True)
+            conexion.commit()
+        return resumen
+
+    def guardar_metricas(self, fila):
+        columnas = {c.name for c in pipeline_runs_table.columns}
+        df = pd.DataFrame([{clave: valor for clave, valor in fila.items() if clave in columnas}])
+        with self.lock, self.conectar() as conexion:
+            self.insertar(conexion, pipeline_runs_table, df)
+
+    def leer_historico(self):
+        with self.lock, self.conectar() as conexion:
+            return conexion.execute(
+                f"SELECT {', '.join(COLUMNAS_HISTORICO_ANALITICA)} FROM {historico_table.name}"
+            ).df()
+
+    def ultimos_precios(self, tickers):
+        with self.lock, self.conectar() as conexion:
+            filas = conexion.execute(CONSULTA_ULTIMAS_FOTOS, [[str(t) for t in tickers]]).fetchall()
+        return precios_de_fotos(filas)
+
+    def rango_historico(self, hasta):
+        with self.lock, self.conectar() as conexion:
+            return conexion.execute(
+                f"SELECT min(fecha_ejecucion), max(fecha_ejecucion) FROM {historico_table.name} "
+                f"WHERE fecha_ejecucion < ?", [hasta]
+            ).fetchone()
+
+    def guardar_metricas_rendimiento(self, df_metricas):
+        with self.lock, self.conectar() as conexion:
+            conexion.begin()
+            conexion.execute(f"DELETE FROM {metricas_rendimiento_table.name}")
+            resumen = self.insertar(conexion, metricas_rendimiento_table, df_metricas)
+            conexion.commit()
+        return resumen
+
+    def ultima_huella(self):
+        with self.lock, self.conectar() as conexion:
+            fila = conexion.execute(
+                "SELECT huella_lotes FROM pipeline_runs WHERE exito AND huella_lotes IS NOT NULL "
+                "ORDER BY id_ejecucion DESC LIMIT 1"
+            ).fetchone()
+        return fila[0] if fila else None
+
+    def archivo_descarga(self):
+        return self.ruta
+
+
+## CARPETA DE ARCHIVOS PARQUET (UNA SUBCARPETA POR TABLA)
+# cedears SE REESCRIBE COMPLETA; LOS HISTÓRICOS SE PARTICIONAN POR anio/mes Y CADA CARGA AGREGA UN ARCHIVO
+# CON LAS FILAS CUYA CLAVE NO ESTABA EN ESAS PARTICIONES
+class DestinoParquet(Destino):
+
+    ## COLUMNA DE FECHA QUE DEFINE LA PARTICIÓN DE CADA TABLA HISTÓRICA
+    FECHA_PARTICION = {
+        'datos_historicos_cedears': 'fecha_ejecucion',
+        'historico_dolar': 'fecha',
+        'pipeline_runs': 'fecha_inicio'
+    }
+
+    def __init__(self, carpeta):
+        if not PYARROW_DISPONIBLE:
+            raise ImportError("El destino Parquet requiere el paquete 'pyarrow'.")
+        self.carpeta = carpeta
+        self.lock = threading.Lock()
+
+    def preparar(self):
+        os.makedirs(self.carpeta, exist_ok=True)
+        return []
+
+    ## FILAS CUYA CLAVE PRIMARIA YA ESTÁ EN LAS PARTICIONES QUE TOCA LA CARGA
+    def claves_existentes(self, tabla, particiones):
+        clave = [c.name for c in tabla.primary_key.columns]
+        partes = []
+        for anio, mes in particiones:
+            ruta = os.path.join(self.carpeta, tabla.name, f"anio={anio}", f"mes={mes}")
+            if os.path.isdir(ruta):
+                partes.append(pq.read_table(ruta, columns=clave).to_pandas())
+        if not partes:
+            return pd.DataFrame(columns=clave)
+        return pd.concat(partes, ignore_index=True)
+
+    ## AGREGA LAS FILAS NUEVAS DE UNA TABLA HISTÓRICA EN SUS PARTICIONES anio/mes
+    # LAS CLAVES SE COMPARAN YA CONVERTIDAS A LOS TIPOS DE LA TABLA (IGUAL QUE LAS LEÍDAS DEL PARQUET)
+    def agregar_particionado(self, tabla, df):
+        if df.empty:
+            return {'filas': 0, 'bytes': 0}
+        arrow = tabla_arrow(df, tabla)
+        fechas = pd.to_datetime(df[self.FECHA_PARTICION[tabla.name]])
+        particion = pd.DataFrame({"anio": fechas.dt.year.to_numpy(), "mes": fechas.dt.month.to_numpy()})
+
+        clave = [c.name for c in tabla.primary_key.columns]
+        if all(nombre in arrow.column_names for nombre in clave):
+            claves_nuevas = arrow.select(clave).to_pandas().astype(str)
+            nuevas = ~claves_nuevas.duplicated().to_numpy()
+            existentes = self.claves_existentes(tabla, particion.drop_duplicates().itertuples(index=False))
+            if not existentes.empty:
+                nuevas &= ~pd.MultiIndex.from_frame(claves_nuevas).isin(
+                    pd.MultiIndex.from_frame(existentes.astype(str)))
+            if not nuevas.all():
+                arrow = arrow.filter(pa.array(nuevas))
+                particion = particion[nuevas]
+            if arrow.num_rows == 0:
+                return {'filas': 0, 'bytes': 0}
+
+        arrow = arrow.append_column("anio", pa.array(particion["anio"].to_numpy()))
+        arrow = arrow.append_column("mes", pa.array(particion["mes"].to_numpy()))
+        pq.write_to_dataset(arrow, os.path.join(self.carpeta, tabla.name), partition_cols=["anio", "mes"],
+                            basename_template=f"parte-{uuid.uuid4().hex}-{{i}}.parquet")
+        return {'filas': arrow.num_rows, 'bytes': arrow.nbytes}
+
+    def ruta_cedears(self):
+        return os.path.join(self.carpeta, cedears_table.name, "cedears.parquet")
+
+    ## REESCRIBE EL ARCHIVO DE LOTES COMPLETO (EL LOCK YA ESTÁ TOMADO)
+    def escribir_cedears(self, df_cedears):
+        shutil.rmtree(os.path.dirname(self.ruta_cedears()), ignore_errors=True)
+        os.makedirs(os.path.dirname(self.ruta_cedears()))
+        arrow = tabla_arrow(df_cedears, cedears_table)
+        pq.write_table(arrow, self.ruta_cedears())
+        return {'filas': len(df_cedears), 'bytes': arrow.nbytes}
+
+    def guardar_tablas(self, df_cedears, df_historico, df_dolar):
+        df_cedears = df_cedears.assign(clave_lote=calcular_clave_lote(df_cedears))
+        df_cedears["id_operacion"] = range(1, len(df_cedears) + 1)
+        with self.lock:
+            return {
+                'cedears': self.escribir_cedears(df_cedears),
+                'datos_historicos_cedears': self.agregar_particionado(historico_table, df_historico),
+                'historico_dolar': self.agregar_particionado(historico_dolar_table, df_dolar)
+            }
+
+    def leer_lotes(self):
+        with self.lock:
+            if not os.path.exists(self.ruta_cedears()):
+                return pd.DataFrame(columns=COLUMNAS_REVALUACION)
+            df = pq.read_table(self.ruta_cedears(), columns=COLUMNAS_REVALUACION).to_pandas()
+        df['ticker'] = df['ticker'].astype('category')
+        return df
+
+    ## EN PARQUET NO HAY UPDATE: SE REESCRIBE cedears CON LAS NUEVAS COLUMNAS DE MERCADO
+    # (LOS LOTES SIN COTIZACIÓN CONSERVAN LAS QUE TENÍAN)
+    def guardar_mercado(self, df_cedears, df_historico, df_dolar):
+        if 'id_operacion' in df_cedears.columns:
+            clave = 'id_operacion'
+        else:
+            clave = 'clave_lote'
+            df_cedears = df_cedears.assign(clave_lote=calcular_clave_lote(df_cedears))
+        mercado = lotes_cotizados(df_cedears).set_index(clave)[COLUMNAS_MERCADO]
+        with self.lock:
+            lotes = pq.read_table(self.ruta_cedears()).to_pandas()
+            nuevos = mercado.reindex(lotes[clave]).set_axis(lotes.index)
+            lotes[COLUMNAS_MERCADO] = nuevos.combine_first(lotes.reindex(columns=COLUMNAS_MERCADO))
+            return {
+                'cedears': self.escribir_cedears(lotes),
+                'datos_historicos_cedears': self.agregar_particionado(historico_table, df_historico),
+                'historico_dolar': self.agregar_particionado(historico_dolar_table, df_dolar)
+            }
+
+    def guardar_historico(self, df_historico, df_dolar):
+        with self.lock:
+            return {
+                'datos_historicos_cedears': self.agregar_particionado(historico_table, df_historico),
+                'historico_dolar': self.agregar_particionado(historico_dolar_table, df_dolar)
+            }
+
+    def guardar_metricas(self, fila):
+        columnas = {c.name for c in pipeline_runs_table.columns}
+        df = pd.DataFrame([{clave: valor for clave, valor in fila.items() if clave in columnas}])
+        with self.lock:
+            self.agregar_particionado(pipeline_runs_table, df)
+
+    ## EN PARQUET LAS EJECUCIONES NO TIENEN id_ejecucion: LA ÚLTIMA ES LA DE fecha_inicio MÁS RECIENTE
+    def ultima_huella(self):
+        ruta = os.path.join(self.carpeta, pipeline_runs_table.name)
+        with self.lock:
+            if not os.path.isdir(ruta):
+                return None
+            df = pq.read_table(ruta, columns=["fecha_inicio", "exito", "huella_lotes"]).to_pandas()
+        df = df[df["exito"].fillna(False).astype(bool) & df["huella_lotes"].notna()]
+        if df.empty:
+            return None
+        return df.sort_values("fecha_inicio")["huella_lotes"].iloc[-1]
+
+    def leer_historico(self):
+        ruta = os.path.join(self.carpeta, historico_table.name)
+        with self.lock:
+            if not os.path.isdir(ruta):
+                return None
+            return pq.read_table(ruta, columns=COLUMNAS_HISTORICO_ANALITICA).to_pandas()
+
+    def ultimos_precios(self, tickers):
+        ruta = os.path.join(self.carpeta, historico_table.name)
+        with self.lock:
+            if not os.path.isdir(ruta):
+                return {}
+            df = pq.read_table(ruta, columns=["ticker", "fecha_ejecucion", "moneda", "cantidad", "tenencia"]).to_pandas()
+        return precios_de_fotos(ultimas_fotos(df, tickers))
+
+    def rango_historico(self, hasta):
+        ruta = os.path.join(self.carpeta, historico_table.name)
+        with self.lock:
+            if not os.path.isdir(ruta):
+                return None, None
+            fechas = pq.read_table(ruta, columns=["fecha_ejecucion"]).column("fecha_ejecucion").to_pandas()
+        fechas = pd.to_datetime(fechas)
+        fechas = fechas[fechas < pd.Timestamp(hasta)]
+        if fechas.empty:
+            return None, None
+        return fechas.min().date(), fechas.max().date()
+
+    ## metricas_rendimiento SE REESCRIBE COMPLETA (UN SOLO ARCHIVO)
+    def guardar_metricas_rendimiento(self, df_metricas):
+        carpeta = os.path.join(self.carpeta, metricas_rendimiento_table.name)
+        arrow = tabla_arrow(df_metricas, metricas_rendimiento_table)
+        with self.lock:
+            os.makedirs(carpeta, exist_ok=True)
+            pq.write_table(arrow, os.path.join(carpeta, f"{metricas_rendimiento_table.name}.parquet"))
+        return {'filas': arrow.num_rows, 'bytes': arrow.nbytes}
+
+    ## LA CARPETA COMPLETA COMPRIMIDA EN UN .zip
+    def archivo_descarga(self):
+        with self.lock:
+            return shutil.make_archive(self.carpeta, "zip", self.carpeta)
@@ -0,0 +1,130 @@
+## IMPORTACION DE BIBLIOTECAS
+import os
+import threading
+from datetime import date
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from sqlalchemy import text
+from urllib3.util.retry import Retry
+
+## URL DE LA API (SE PUEDE APUNTAR A UN SERVIDOR LOCAL PARA PRUEBAS CON DOLAR_API_URL)
+URL_DOLAR_API = os.environ.get("DOLAR_API_URL", "https://dolarapi.com/v1/dolares")
+
+## URL DE LA SERIE HISTÓRICA POR CASA ({casa} SE REEMPLAZA POR "oficial" O "bolsa")
+URL_DOLAR_HISTORICO_API = os.environ.get("DOLAR_HISTORICO_API_URL", "https://api.argentinadatos.com/v1/cotizaciones/dolares/{casa}")
+
+## TIEMPOS MÁXIMOS DE CONEXIÓN Y LECTURA EN SEGUNDOS
+TIMEOUT_CONEXION = float(os.environ.get("DOLAR_API_TIMEOUT_CONEXION", 3.05))
+TIMEOUT_LECTURA = float(os.environ.get("DOLAR_API_TIMEOUT_LECTURA", 5))
+
+
+## PROVEEDOR DE TIPO DE CAMBIO: CACHE DIARIA EN MEMORIA -> TABLA historico_dolar -> API
+class ProveedorDolar:
+
+    def __init__(self, url=URL_DOLAR_API, timeout=(TIMEOUT_CONEXION, TIMEOUT_LECTURA), url_historico=URL_DOLAR_HISTORICO_API):
+        self.url = url
+        self.url_historico = url_historico
+        self.timeout = timeout
+        self.cache = {}
+        self.lock = threading.Lock()
+
+        ## SESIÓN REUTILIZABLE CON POOL DE CONEXIONES Y REINTENTOS ACOTADOS
+        self.sesion = requests.Session()
+        reintentos = Retry(total=2, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504),
+                           allowed_methods=frozenset(["GET"]))
+        adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=reintentos)
+        self.sesion.mount("http://", adaptador)
+        self.sesion.mount("https://", adaptador)
+
+    ## LECTURA DE LOS VALORES DEL DÍA YA GUARDADOS EN LA BASE DE DATOS
+    def leer_desde_base(self, engine, fecha):
+        try:
+            with engine.connect() as conn:
+                filas = conn.execute(
+                    text("SELECT tipo, valor FROM historico_dolar WHERE fecha = :fecha AND tipo IN ('Oficial', 'MEP')"),
+                    {"fecha": fecha}
+                ).fetchall()
+        except Exception:
+            # LA TABLA PUEDE NO EXISTIR TODAVÍA EN UNA BASE NUEVA
+            return None
+        valores = {tipo: valor for tipo, valor in filas}
+        if "Oficial" in valores and "MEP" in valores:
+            return valores["Oficial"], valores["MEP"]
+        return None
+
+    ## CONSULTA A LA API
+    def leer_desde_api(self):
+        response = self.sesion.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        valores = {fila["casa"]: fila["venta"] for fila in data}
+        return valores["oficial"], valores["bolsa"]
+
+    ## DEVUELVE (DOLAR_OFICIAL, DOLAR_MEP) DEL DÍA
+    # estadisticas (OPCIONAL) SE COMPLETA CON EL ORIGEN DEL VALOR: "memoria", "base" O "api"
+    def obtener(self, engine=None, estadisticas=None):
+        estadisticas = estadisticas if estadisticas is not None else {}
+        hoy = date.today()
+        with self.lock:
+            if hoy in self.cache:
+                estadisticas["origen"] = "memoria"
+                return self.cache[hoy]
+
+        valores = None
+        estadisticas["origen"] = "base"
+        if engine is not None:
+            valores = self.leer_desde_base(engine, hoy)
+        if valores is None:
+            estadisticas["origen"] = "api"
+            valores = self.leer_desde_api()
+
+        with self.lock:
+            # SOLO SE CONSERVA EL DÍA ACTUAL
+            self.cache = {hoy: valores}
+        return valores
+
+
+    ## SERIE HISTÓRICA: DATAFRAME INDEXADO POR FECHA CON LAS COLUMNAS oficial Y mep
+    # SE COMBINA LO GUARDADO EN historico_dolar (PRIORITARIO) CON LA SERIE DE LA API
+    def historico(self, desde, engine=None):
+        partes = []
+        if engine is not None:
+            try:
+                with engine.connect() as conn:
+                    df_base = pd.read_sql(
+                        text("SELECT fecha, tipo, valor FROM historico_dolar WHERE fecha >= :desde AND tipo IN ('Oficial', 'MEP')"),
+                        conn, params={"desde": desde}
+                    )
+                if not df_base.empty:
+                    df_base["tipo"] = df_base["tipo"].map({"Oficial": "oficial", "MEP": "mep"})
+                    df_base["fecha"] = pd.to_datetime(df_base["fecha"])
+                    partes.append(df_base.pivot_table(index="fecha", columns="tipo", values="valor", aggfunc="last"))
+            except Exception:
+                pass
+
+        series = {}
+        for columna, casa in (("oficial", "oficial"), ("mep", "bolsa")):
+            try:
+                response = self.sesion.get(self.url_historico.format(casa=casa), timeout=self.timeout)
+                response.raise_for_status()
+                df_api = pd.DataFrame(response.json())
+                series[columna] = df_api.set_index(pd.to_datetime(df_api["fecha"]))["venta"]
+            except Exception:
+                continue
+        if series:
+            partes.append(pd.DataFrame(series))
+
+        if not partes:
+            return pd.DataFrame(columns=["oficial", "mep"], index=pd.DatetimeIndex([], name="fecha"))
+        resultado = partes[0]
+        for parte in partes[1:]:
+            resultado = resultado.combine_first(parte)
+        resultado.index.name = "fecha"
+        resultado = resultado.reindex(columns=["oficial", "mep"]).sort_index()
+        return resultado[resultado.index >= pd.Timestamp(desde)]
+
+
+## PROVEEDOR COMPARTIDO POR TODO EL PROCESO
+proveedor_dolar = ProveedorDolar()
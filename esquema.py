@@ -0,0 +1,123 @@
+## ADMINISTRACIÓN DEL ESQUEMA DE LA BASE DE DATOS
+# LA VERSIÓN APLICADA SE GUARDA EN LA TABLA esquema_version Y SOLO SE EJECUTAN LAS MIGRACIONES PENDIENTES.
+# CADA BASE YA VERIFICADA SE RECUERDA MIENTRAS DURE EL PROCESO, ASÍ LAS EJECUCIONES NORMALES NO CONSULTAN EL CATÁLOGO.
+# PARA AGREGAR COLUMNAS O ÍNDICES: AGREGAR UNA FUNCIÓN AL FINAL DE MIGRACIONES (NUNCA MODIFICAR LAS YA PUBLICADAS).
+
+## IMPORTACION DE BIBLIOTECAS
+import threading
+
+from sqlalchemy import Table, Column, Integer, DateTime, String, MetaData, func, select, text
+
+from base_datos import (INDICES_COBERTURA, VISTAS_MATERIALIZADAS, historico_dolar_mensual_table,
+                        historico_dolar_semanal_table, historico_mensual_table, historico_semanal_table, metadata,
+                        metricas_rendimiento_table)
+
+## TABLA CON LAS MIGRACIONES APLICADAS
+metadata_esquema = MetaData()
+
+esquema_version_table = Table(
+    'esquema_version',
+    metadata_esquema,
+    Column('version', Integer, primary_key=True),
+    Column('descripcion', String),
+    Column('aplicada', DateTime, server_default=func.now())
+)
+
+
+## MIGRACIONES (LA POSICIÓN EN LA LISTA + 1 ES EL NÚMERO DE VERSIÓN)
+# EN UNA BASE NUEVA LA PRIMERA YA CREA LAS TABLAS CON SU DEFINICIÓN ACTUAL; LAS SIGUIENTES ACTUALIZAN BASES ANTERIORES
+def crear_tablas(connection):
+    metadata.create_all(connection)
+
+
+def agregar_clave_lote(connection):
+    if connection.dialect.name != "postgresql":
+        return
+    connection.execute(text("ALTER TABLE cedears ADD COLUMN IF NOT EXISTS clave_lote BIGINT"))
+    connection.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS cedears_clave_lote_key ON cedears (clave_lote)"))
+
+
+def agregar_indices_cobertura(connection):
+    if connection.dialect.name != "postgresql":
+        return
+    for indice in INDICES_COBERTURA:
+        connection.execute(text(indice))
+
+
+def agregar_segundos_historico(connection):
+    if connection.dialect.name != "postgresql":
+        return
+    connection.execute(text("ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS segundos_historico DOUBLE PRECISION"))
+
+
+def crear_vistas_materializadas(connection):
+    if connection.dialect.name != "postgresql":
+        return
+    for nombre, (consulta, clave) in VISTAS_MATERIALIZADAS.items():
+        connection.execute(text(f"CREATE MATERIALIZED VIEW IF NOT EXISTS {nombre} AS {consulta}"))
+        connection.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS {nombre}_clave_idx ON {nombre} ({clave})"))
+
+
+def agregar_huella_lotes(connection):
+    if connection.dialect.name != "postgresql":
+        return
+    connection.execute(text("ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS huella_lotes VARCHAR"))
+
+
+def crear_resumenes_historicos(connection):
+    for tabla in (historico_semanal_table, historico_mensual_table, historico_dolar_semanal_table,
+                  historico_dolar_mensual_table):
+        tabla.create(connection, checkfirst=True)
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS segundos_mantenimiento DOUBLE PRECISION"))
+
+
+def crear_metricas_rendimiento(connection):
+    metricas_rendimiento_table.create(connection, checkfirst=True)
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS segundos_analitica DOUBLE PRECISION"))
+
+
+MIGRACIONES = [
+    ("Tablas iniciales", crear_tablas),
+    ("Clave natural de lotes en cedears", agregar_clave_lote),
+    ("Índices de cobertura para Power BI", agregar_indices_cobertura),
+    ("Tiempo de reconstrucción del histórico en pipeline_runs", agregar_segundos_historico),
+    ("Vistas materializadas para Power BI", crear_vistas_materializadas),
+    ("Huella de los lotes en pipeline_runs", agregar_huella_lotes),
+    ("Resúmenes semanales y mensuales de los históricos", crear_resumenes_historicos),
+    ("Métricas de rendimiento precalculadas", crear_metricas_rendimiento)
+]
+
+VERSION_ACTUAL = len(MIGRACIONES)
+
+## BASES YA VERIFICADAS EN ESTE PROCESO
+bases_verificadas = set()
+lock_verificadas = threading.Lock()
+
+
+## APLICA LAS MIGRACIONES PENDIENTES. DEVUELVE LA LISTA DE VERSIONES APLICADAS (VACÍA SI YA ESTABA AL DÍA)
+def asegurar_esquema(engine):
+    clave = engine.url.render_as_string(hide_password=True)
+    with lock_verificadas:
+        if clave in bases_verificadas:
+            return []
+
+    aplicadas = []
+    with engine.begin() as connection:
+        # EVITA QUE DOS PROCESOS MIGREN LA MISMA BASE A LA VEZ
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SELECT pg_advisory_xact_lock(hashtext('esquema_cedears'))"))
+        esquema_version_table.create(connection, checkfirst=True)
+        version = connection.execute(select(func.max(esquema_version_table.c.version))).scalar() or 0
+
+        for numero, (descripcion, migracion) in enumerate(MIGRACIONES, start=1):
+            if numero <= version:
+                continue
+            migracion(connection)
+            connection.execute(esquema_version_table.insert().values(version=numero, descripcion=descripcion))
+            aplicadas.append(numero)
+
+    with lock_verificadas:
+        bases_verificadas.add(clave)
+    return aplicadas
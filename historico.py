@@ -0,0 +1,92 @@
+## RECONSTRUCCIÓN VECTORIZADA DEL HISTÓRICO DIARIO DE LA CARTERA (datos_historicos_cedears)
+# A PARTIR DE LOS LOTES, LOS CIERRES DIARIOS DE CADA TICKER Y LA SERIE DEL DÓLAR SE ARMA LA MATRIZ
+# (FECHA x TICKER) DE TENENCIAS Y SE VALÚAN TODAS LAS FECHAS EN UNA SOLA PASADA.
+
+## IMPORTACION DE BIBLIOTECAS
+import numpy as np
+import pandas as pd
+
+from valuacion import COMISION_VENTA, codificar_tickers, columna_float
+
+
+## SERIE DEL DÓLAR TOMADA DE LOS PROPIOS LOTES (SE USA SI NO HAY OTRA FUENTE)
+def serie_dolar_de_lotes(df_cedears):
+    serie = df_cedears[["fecha", "dolar_oficial", "dolar_mep"]].dropna()
+    serie = serie.rename(columns={"dolar_oficial": "oficial", "dolar_mep": "mep"})
+    serie["fecha"] = pd.to_datetime(serie["fecha"]).dt.normalize()
+    return serie.groupby("fecha").last().sort_index()
+
+
+## SERIE DEL DÓLAR EN EL FORMATO DE LA TABLA historico_dolar
+def dolar_formato_tabla(df_dolar):
+    df_largo = df_dolar.rename(columns={"oficial": "Oficial", "mep": "MEP"}).reset_index()
+    df_largo = df_largo.melt(id_vars="fecha", value_vars=["Oficial", "MEP"], var_name="tipo", value_name="valor")
+    df_largo["fecha"] = pd.to_datetime(df_largo["fecha"]).dt.date
+    return df_largo.dropna(subset=["valor"])
+
+
+## VALUACIÓN DIARIA DE LA CARTERA
+# cierres: DATAFRAME (FECHA x TICKER) CON LOS PRECIOS DE CIERRE
+# df_dolar: DATAFRAME INDEXADO POR FECHA CON LAS COLUMNAS oficial Y mep
+# DEVUELVE EL MISMO FORMATO LARGO (ars/usd) QUE valuacion.valuar_lotes, CON UNA FILA POR FECHA, TICKER Y MONEDA
+def reconstruir_historico(df_cedears, cierres, df_dolar):
+    codigos, categorias = codificar_tickers(df_cedears)
+    cierres = cierres.sort_index().reindex(columns=categorias).ffill()
+    fechas = cierres.index.to_numpy(dtype="datetime64[ns]")
+    cantidad_fechas, cantidad_tickers = len(fechas), len(categorias)
+
+    ## TENENCIA ACUMULADA: CADA LOTE SUMA DESDE LA PRIMERA RUEDA IGUAL O POSTERIOR A SU FECHA
+    fechas_lote = pd.to_datetime(df_cedears["fecha"]).dt.normalize().to_numpy(dtype="datetime64[ns]")
+    posiciones = np.searchsorted(fechas, fechas_lote, side="left")
+    validos = (posiciones < cantidad_fechas) & (codigos >= 0)
+    filas, columnas = posiciones[validos], codigos[validos]
+
+    acumulados = {}
+    for nombre in ["cantidad", "costo_ars", "costo_usd"]:
+        matriz = np.zeros((cantidad_fechas, cantidad_tickers))
+        np.add.at(matriz, (filas, columnas), np.nan_to_num(columna_float(df_cedears, nombre)[validos]))
+        acumulados[nombre] = np.cumsum(matriz, axis=0)
+
+    ## DÓLAR DE CADA RUEDA: ÚLTIMO VALOR CONOCIDO A ESA FECHA (AS-OF). LAS RUEDAS ANTERIORES AL PRIMER VALOR QUEDAN
+    # SIN DÓLAR Y NO SE GUARDAN (NO SE USA UN VALOR POSTERIOR A LA FECHA)
+    df_fechas = pd.DataFrame({"fecha": fechas})
+    df_dolar = df_dolar.reset_index().rename(columns={"index": "fecha"})
+    df_dolar["fecha"] = pd.to_datetime(df_dolar["fecha"]).astype("datetime64[ns]")
+    df_dolar = df_dolar.sort_values("fecha").ffill()
+    dolar_por_fecha = pd.merge_asof(df_fechas, df_dolar, on="fecha", direction="backward")
+    dolar_venta = np.minimum(dolar_por_fecha["oficial"].to_numpy(dtype="float64"),
+                             dolar_por_fecha["mep"].to_numpy(dtype="float64"))
+
+    ## VALUACIÓN DE TODAS LAS FECHAS A LA VEZ (MATRICES FECHA x TICKER)
+    precios = cierres.to_numpy(dtype="float64")
+    cantidad = acumulados["cantidad"]
+    costo_ars = np.round(acumulados["costo_ars"], 2)
+    costo_usd = np.round(acumulados["costo_usd"], 2)
+    tenencia_ars_sin_redondeo = cantidad * precios * (1 - COMISION_VENTA)
+    tenencia_ars = np.round(tenencia_ars_sin_redondeo, 2)
+    tenencia_usd = np.round(tenencia_ars_sin_redondeo / dolar_venta[:, None], 2)
+    resultados_ars = np.round(tenencia_ars - costo_ars, 2)
+    resultados_usd = np.round(tenencia_usd - costo_usd, 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rendimiento_ars = resultados_ars / costo_ars
+        rendimiento_usd = resultados_usd / costo_usd
+
+    ## SOLO FECHAS CON TENENCIA, PRECIO Y DÓLAR CONOCIDOS
+    presentes = (cantidad > 0) & ~np.isnan(precios) & ~np.isnan(dolar_venta)[:, None]
+    indice_fecha, indice_ticker = np.nonzero(presentes)
+
+    def tomar(matriz):
+        return matriz[indice_fecha, indice_ticker]
+
+    cantidad_filas = len(indice_fecha)
+    tickers = np.tile(categorias.to_numpy()[indice_ticker], 2)
+    return pd.DataFrame({
+        "ticker": pd.Categorical(tickers, categories=categorias),
+        "cantidad": np.tile(np.round(tomar(cantidad), 2), 2),
+        "fecha_ejecucion": np.tile(fechas[indice_fecha], 2),
+        "moneda": pd.Categorical.from_codes(np.repeat([0, 1], cantidad_filas), categories=["ars", "usd"]),
+        "costo": np.concatenate([tomar(costo_ars), tomar(costo_usd)]),
+        "tenencia": np.concatenate([tomar(tenencia_ars), tomar(tenencia_usd)]),
+        "resultados": np.concatenate([tomar(resultados_ars), tomar(resultados_usd)]),
+        "rendimiento": np.concatenate([tomar(rendimiento_ars), tomar(rendimiento_usd)])
+    })
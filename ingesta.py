@@ -0,0 +1,110 @@
+## IMPORTACION DE BIBLIOTECAS
+import pandas as pd
+from openpyxl import load_workbook
+
+## LECTOR RÁPIDO OPCIONAL (python-calamine). SI NO ESTÁ INSTALADO SE USA OPENPYXL EN MODO STREAMING
+try:
+    import python_calamine  # noqa: F401
+    CALAMINE_DISPONIBLE = True
+except ImportError:
+    CALAMINE_DISPONIBLE = False
+
+## HOJA DEL REPORTE DE BALANZ CON LOS LOTES
+HOJA_LOTES = "resultados_por_lotes_finales"
+
+## COLUMNAS DEL REPORTE QUE UTILIZA EL PROCESO Y SU NOMBRE EN LA BASE DE DATOS
+# (DolarCCL Y Operacion NO SE LEEN)
+COLUMNAS_REPORTE = {
+    "Cantidad": "cantidad",
+    "Descripcion": "descripcion",
+    "Fecha": "fecha",
+    "Fecha Lote": "fecha_descarga",
+    "Gastos": "gastos",
+    "Moneda": "moneda",
+    "Precio Compra": "precio_compra",
+    "Ticker": "ticker",
+    "Tipo": "tipo",
+    "DolarMEP": "dolar_mep",
+    "DolarOficial": "dolar_oficial"
+}
+
+## TIPO DE ACTIVO A CONSERVAR
+TIPO_CEDEARS = "Cedears"
+
+## TIPOS DE DATO COMPACTOS
+COLUMNAS_NUMERICAS = ["cantidad", "gastos", "precio_compra", "dolar_mep", "dolar_oficial"]
+COLUMNAS_FECHA = ["fecha", "fecha_descarga"]
+COLUMNAS_CATEGORICAS = ["ticker", "moneda", "tipo", "descripcion"]
+
+
+## ERROR CON EL MISMO TEXTO QUE PANDAS PARA QUE SE MUESTRE EL MENSAJE DE HOJA FALTANTE
+def error_hoja_faltante():
+    return ValueError(f"Worksheet named '{HOJA_LOTES}' not found")
+
+
+## LECTURA EN STREAMING: SOLO LAS COLUMNAS NECESARIAS Y SOLO LAS FILAS DE CEDEARS
+def leer_con_openpyxl(archivo):
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        if HOJA_LOTES not in libro.sheetnames:
+            raise error_hoja_faltante()
+        hoja = libro[HOJA_LOTES]
+        filas = hoja.iter_rows(values_only=True)
+        encabezado = next(filas, ())
+
+        # POSICIÓN DE CADA COLUMNA UTILIZADA
+        posiciones = {COLUMNAS_REPORTE[nombre]: i for i, nombre in enumerate(encabezado) if nombre in COLUMNAS_REPORTE}
+        if "tipo" not in posiciones:
+            raise ValueError("El reporte no tiene la columna 'Tipo'.")
+        posicion_tipo = posiciones["tipo"]
+
+        # SE ACUMULA POR COLUMNA PARA NO GUARDAR LAS FILAS COMPLETAS
+        datos = {columna: [] for columna in posiciones}
+        for fila in filas:
+            if len(fila) <= posicion_tipo or fila[posicion_tipo] != TIPO_CEDEARS:
+                continue
+            for columna, i in posiciones.items():
+                datos[columna].append(fila[i] if i < len(fila) else None)
+    finally:
+        libro.close()
+    return pd.DataFrame(datos)
+
+
+## LECTURA CON CALAMINE (MOTOR EN RUST) LIMITADA A LAS COLUMNAS NECESARIAS
+def leer_con_calamine(archivo):
+    try:
+        df = pd.read_excel(archivo, sheet_name=HOJA_LOTES, engine="calamine",
+                           usecols=lambda nombre: nombre in COLUMNAS_REPORTE)
+    except ValueError as e:
+        if "not found" in str(e).lower():
+            raise error_hoja_faltante()
+        raise
+    df.rename(columns=COLUMNAS_REPORTE, inplace=True)
+    if "tipo" not in df.columns:
+        raise ValueError("El reporte no tiene la columna 'Tipo'.")
+    return df[df.tipo == TIPO_CEDEARS].reset_index(drop=True)
+
+
+## APLICACIÓN DE TIPOS DE DATO COMPACTOS
+def tipar_columnas(df):
+    for columna in COLUMNAS_NUMERICAS:
+        if columna in df.columns:
+            df[columna] = pd.to_numeric(df[columna], errors="coerce").astype("float64")
+    for columna in COLUMNAS_FECHA:
+        if columna in df.columns:
+            df[columna] = pd.to_datetime(df[columna])
+    for columna in COLUMNAS_CATEGORICAS:
+        if columna in df.columns:
+            df[columna] = df[columna].astype("category")
+    return df
+
+
+## LECTURA DEL REPORTE DE BALANZ: DEVUELVE SOLO LOS LOTES DE CEDEARS CON LAS COLUMNAS YA RENOMBRADAS
+def leer_reporte(archivo):
+    if hasattr(archivo, "seek"):
+        archivo.seek(0)
+    if CALAMINE_DISPONIBLE:
+        df = leer_con_calamine(archivo)
+    else:
+        df = leer_con_openpyxl(archivo)
+    return tipar_columnas(df)
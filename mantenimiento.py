@@ -0,0 +1,189 @@
+## MANTENIMIENTO DE LAS TABLAS HISTÓRICAS (SOLO POSTGRES)
+# CADA EJECUCIÓN AGREGA UNA FILA POR TICKER, MONEDA Y DÍA. PARA QUE EL COSTO DE LAS CONSULTAS DEPENDA DE LA VENTANA
+# QUE SE INFORMA Y NO DE TODO EL HISTÓRICO:
+#   - LAS FILAS DIARIAS MÁS VIEJAS QUE LA VENTANA DE RETENCIÓN SE RESUMEN EN LAS TABLAS *_semanal Y *_mensual
+#     (ÚLTIMO VALOR DEL PERÍODO Y PROMEDIOS) Y SE BORRAN, TODO EN LA MISMA TRANSACCIÓN.
+#   - OPCIONALMENTE LAS TABLAS DIARIAS SE CONVIERTEN EN TABLAS PARTICIONADAS POR MES (UNA VEZ) Y EN CADA EJECUCIÓN
+#     SE CREAN LAS PARTICIONES DEL MES ACTUAL Y DEL SIGUIENTE Y LAS DE LOS MESES QUE HAYAN CAÍDO EN LA PARTICIÓN DEFAULT.
+# EL CORTE SOLO AVANZA, ASÍ QUE UN DÍA ANTERIOR O IGUAL A LA ultima_fecha DE SU PERÍODO YA ESTÁ RESUMIDO: SI UNA FILA
+# ASÍ VUELVE A APARECER (POR EJEMPLO AL RECONSTRUIR EL HISTÓRICO) SE BORRA SIN VOLVER A SUMARLA. LOS DÍAS NUEVOS DE UN
+# PERÍODO YA RESUMIDO SE COMBINAN: PROMEDIOS PONDERADOS POR dias Y EL ÚLTIMO VALOR ES EL DE LA FECHA MÁS RECIENTE.
+# LA RECONSTRUCCIÓN DEL HISTÓRICO TAMPOCO DESCARGA DÍAS ANTERIORES AL CORTE (VER inicio_retencion).
+# CONFIGURACIÓN: HISTORICO_RETENCION_DIAS (730 POR DEFECTO; 0 DESACTIVA LA RETENCIÓN) E HISTORICO_PARTICIONADO=1.
+
+## IMPORTACION DE BIBLIOTECAS
+import os
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from base_datos import (VISTAS_MATERIALIZADAS, historico_dolar_mensual_table, historico_dolar_semanal_table,
+                        historico_dolar_table, historico_mensual_table, historico_semanal_table, historico_table)
+from esquema import agregar_indices_cobertura, crear_vistas_materializadas
+
+RETENCION_DIAS = int(os.getenv("HISTORICO_RETENCION_DIAS", "730"))
+PARTICIONAR = os.getenv("HISTORICO_PARTICIONADO", "0") == "1"
+
+
+## TABLAS DIARIAS Y SUS RESÚMENES
+# tabla: (COLUMNA DE FECHA, CLAVE SIN LA FECHA, COLUMNAS CON EL ÚLTIMO VALOR, [(COLUMNA, COLUMNA PROMEDIO)], RESÚMENES)
+TABLAS_HISTORICAS = {
+    historico_table.name: (
+        'fecha_ejecucion',
+        ['ticker', 'moneda'],
+        ['cantidad', 'costo', 'tenencia', 'resultados', 'rendimiento'],
+        [('tenencia', 'tenencia_promedio'), ('rendimiento', 'rendimiento_promedio')],
+        {'week': historico_semanal_table.name, 'month': historico_mensual_table.name}
+    ),
+    historico_dolar_table.name: (
+        'fecha',
+        ['tipo'],
+        ['valor'],
+        [('valor', 'valor_promedio')],
+        {'week': historico_dolar_semanal_table.name, 'month': historico_dolar_mensual_table.name}
+    )
+}
+
+
+## PRIMER DÍA QUE SE CONSERVA EN LAS TABLAS DIARIAS (None SI NO HAY RETENCIÓN)
+def inicio_retencion(engine, retencion_dias=None):
+    retencion_dias = RETENCION_DIAS if retencion_dias is None else retencion_dias
+    if engine.dialect.name != "postgresql" or retencion_dias <= 0:
+        return None
+    return date.today() - timedelta(days=retencion_dias)
+
+
+## INSERT ... SELECT QUE RESUME LAS FILAS DIARIAS ANTERIORES A :corte EN LA TABLA resumen (unidad: 'week' O 'month')
+# SE SALTEAN LOS DÍAS QUE EL RESUMEN YA INCLUYE (ANTERIORES O IGUALES A LA ultima_fecha DE SU PERÍODO)
+def sentencia_resumen(tabla, resumen, unidad):
+    columna_fecha, clave, ultimos, promedios, _ = TABLAS_HISTORICAS[tabla]
+    ya_resumido = (
+        f"SELECT 1 FROM {resumen} p WHERE "
+        + " AND ".join([f"p.{c} = d.{c}" for c in clave])
+        + f" AND p.periodo = date_trunc('{unidad}', d.{columna_fecha})::date AND p.ultima_fecha >= d.{columna_fecha}"
+    )
+    seleccion = (
+        clave
+        + [f"date_trunc('{unidad}', {columna_fecha})::date AS periodo"]
+        + [f"(array_agg({c} ORDER BY {columna_fecha} DESC))[1] AS {c}" for c in ultimos]
+        + [f"avg({origen}) AS {destino}" for origen, destino in promedios]
+        + ["count(*) AS dias", f"max({columna_fecha}) AS ultima_fecha"]
+    )
+    columnas = clave + ['periodo'] + ultimos + [destino for _, destino in promedios] + ['dias', 'ultima_fecha']
+    actualizaciones = (
+        [f"{c} = CASE WHEN EXCLUDED.ultima_fecha >= r.ultima_fecha THEN EXCLUDED.{c} ELSE r.{c} END" for c in ultimos]
+        + [f"{d} = (r.{d} * r.dias + EXCLUDED.{d} * EXCLUDED.dias) / (r.dias + EXCLUDED.dias)" for _, d in promedios]
+        + ["dias = r.dias + EXCLUDED.dias", "ultima_fecha = GREATEST(r.ultima_fecha, EXCLUDED.ultima_fecha)"]
+    )
+    return (
+        f"INSERT INTO {resumen} AS r ({', '.join(columnas)}) "
+        f"SELECT {', '.join(seleccion)} FROM {tabla} d WHERE {columna_fecha} < :corte AND NOT EXISTS ({ya_resumido}) "
+        f"GROUP BY {', '.join(clave)}, periodo "
+        f"ON CONFLICT ({', '.join(clave)}, periodo) DO UPDATE SET {', '.join(actualizaciones)}"
+    )
+
+
+## RESUME Y BORRA LAS FILAS DIARIAS ANTERIORES A corte. DEVUELVE LAS FILAS DIARIAS BORRADAS
+def compactar(connection, tabla, corte):
+    columna_fecha, _, _, _, resumenes = TABLAS_HISTORICAS[tabla]
+    for unidad, resumen in resumenes.items():
+        connection.execute(text(sentencia_resumen(tabla, resumen, unidad)), {"corte": corte})
+    return connection.execute(text(f"DELETE FROM {tabla} WHERE {columna_fecha} < :corte"), {"corte": corte}).rowcount
+
+
+## PARTICIONADO MENSUAL
+def primer_dia_mes(fecha):
+    return fecha.replace(day=1)
+
+
+def mes_siguiente(fecha):
+    return (fecha.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def esta_particionada(connection, tabla):
+    return connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :tabla)"
+    ), {"tabla": tabla}).scalar()
+
+
+## CREA LAS PARTICIONES MENSUALES QUE FALTAN DE desde A hasta (INCLUSIVE)
+# POSTGRES NO PERMITE CREAR LA PARTICIÓN DE UN MES SI LA PARTICIÓN DEFAULT TIENE FILAS DE ESE MES: ESAS FILAS SE
+# SACAN DE DEFAULT, SE CREA LA PARTICIÓN Y SE VUELVEN A INSERTAR (YA EN SU PARTICIÓN), EN LA MISMA TRANSACCIÓN
+def asegurar_particiones(connection, tabla, desde, hasta):
+    columna_fecha = TABLAS_HISTORICAS[tabla][0]
+    mes = primer_dia_mes(desde)
+    while mes <= hasta:
+        siguiente = mes_siguiente(mes)
+        particion = f"{tabla}_{mes:%Y_%m}"
+        if connection.execute(text("SELECT to_regclass(:particion) IS NULL"), {"particion": particion}).scalar():
+            rango = {"desde": mes, "hasta": siguiente}
+            connection.execute(text(f"CREATE TEMP TABLE {tabla}_mover (LIKE {tabla})"))
+            connection.execute(text(
+                f"WITH movidas AS (DELETE FROM {tabla}_default WHERE {columna_fecha} >= :desde "
+                f"AND {columna_fecha} < :hasta RETURNING *) INSERT INTO {tabla}_mover SELECT * FROM movidas"
+            ), rango)
+            connection.execute(text(
+                f"CREATE TABLE {particion} PARTITION OF {tabla} "
+                f"FOR VALUES FROM ('{mes:%Y-%m-%d}') TO ('{siguiente:%Y-%m-%d}')"
+            ))
+            connection.execute(text(f"INSERT INTO {tabla} SELECT * FROM {tabla}_mover"))
+            connection.execute(text(f"DROP TABLE {tabla}_mover"))
+        mes = siguiente
+
+
+## CONVIERTE UNA TABLA DIARIA EN TABLA PARTICIONADA POR MES, CON LAS MISMAS COLUMNAS, CLAVE Y FILAS
+# LAS VISTAS MATERIALIZADAS Y LOS ÍNDICES DE COBERTURA DEPENDEN DE LA TABLA: LOS RECREA particionar_historicos
+def particionar_por_mes(connection, tabla):
+    columna_fecha, clave, _, _, _ = TABLAS_HISTORICAS[tabla]
+    anterior = f"{tabla}_sin_particionar"
+    connection.execute(text(f"ALTER TABLE {tabla} RENAME TO {anterior}"))
+    connection.execute(text(f"ALTER TABLE {anterior} RENAME CONSTRAINT {tabla}_pkey TO {anterior}_pkey"))
+    connection.execute(text(
+        f"CREATE TABLE {tabla} (LIKE {anterior} INCLUDING DEFAULTS, "
+        f"PRIMARY KEY ({', '.join(clave + [columna_fecha])})) PARTITION BY RANGE ({columna_fecha})"
+    ))
+    connection.execute(text(f"CREATE TABLE {tabla}_default PARTITION OF {tabla} DEFAULT"))
+    primera = connection.execute(text(f"SELECT min({columna_fecha}) FROM {anterior}")).scalar()
+    hoy = date.today()
+    asegurar_particiones(connection, tabla, primera or hoy, mes_siguiente(hoy))
+    connection.execute(text(f"INSERT INTO {tabla} SELECT * FROM {anterior}"))
+    connection.execute(text(f"DROP TABLE {anterior}"))
+
+
+## PARTICIONA LAS TABLAS DIARIAS QUE TODAVÍA NO LO ESTÁN Y CREA LAS PARTICIONES DE ESTE MES Y EL SIGUIENTE, MÁS LAS
+# DE LOS MESES CON FILAS EN DEFAULT (POR EJEMPLO LAS DEL HISTÓRICO RECONSTRUIDO). DEVUELVE LAS TABLAS CONVERTIDAS
+def particionar_historicos(connection):
+    pendientes = [tabla for tabla in TABLAS_HISTORICAS if not esta_particionada(connection, tabla)]
+    if pendientes:
+        for nombre in VISTAS_MATERIALIZADAS:
+            connection.execute(text(f"DROP MATERIALIZED VIEW IF EXISTS {nombre}"))
+        for tabla in pendientes:
+            particionar_por_mes(connection, tabla)
+        agregar_indices_cobertura(connection)
+        crear_vistas_materializadas(connection)
+    hoy = date.today()
+    for tabla, (columna_fecha, *_) in TABLAS_HISTORICAS.items():
+        primera = connection.execute(text(f"SELECT min({columna_fecha}) FROM {tabla}_default")).scalar()
+        asegurar_particiones(connection, tabla, min(primera or hoy, hoy), mes_siguiente(hoy))
+    return pendientes
+
+
+## ETAPA DE MANTENIMIENTO: DEVUELVE {"particionadas": [...], "corte": FECHA, "compactadas": {TABLA: FILAS BORRADAS}}
+# SI OTRO PROCESO YA ESTÁ MANTENIENDO LA MISMA BASE, ESTA EJECUCIÓN NO HACE NADA (LOCK DE LA TRANSACCIÓN)
+def mantener_historicos(engine, retencion_dias=None, particionar=None):
+    if engine.dialect.name != "postgresql":
+        return {}
+    particionar = PARTICIONAR if particionar is None else particionar
+    resumen = {"particionadas": [], "corte": None, "compactadas": {}}
+    with engine.begin() as connection:
+        if not connection.execute(text("SELECT pg_try_advisory_xact_lock(hashtext('mantenimiento_cedears'))")).scalar():
+            return {}
+        if particionar:
+            resumen["particionadas"] = particionar_historicos(connection)
+        corte = inicio_retencion(engine, retencion_dias)
+        if corte is not None:
+            resumen["corte"] = corte
+            for tabla in TABLAS_HISTORICAS:
+                resumen["compactadas"][tabla] = compactar(connection, tabla, corte)
+    return resumen
@@ -0,0 +1,63 @@
+## IMPORTACION DE BIBLIOTECAS
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+## ETAPAS DEL PROCESO EN EL ORDEN EN QUE SE MUESTRAN
+ETAPAS = ["lectura", "cotizaciones", "dolar", "valuacion", "guardado", "historico", "mantenimiento", "analitica"]
+
+
+## MEDICIÓN DE UNA EJECUCIÓN: TIEMPO POR ETAPA Y CONTADORES
+# CON medir_memoria=True TAMBIÉN SE REGISTRA EL PICO DE MEMORIA DE CADA ETAPA (tracemalloc, MÁS LENTO)
+class MedicionEjecucion:
+
+    def __init__(self, medir_memoria=False):
+        self.fecha_inicio = datetime.now()
+        self.inicio = time.perf_counter()
+        self.etapas = {}
+        self.contadores = {}
+        self.medir_memoria = medir_memoria
+        self.memoria = {}
+
+    ## MIDE EL TIEMPO DE UN BLOQUE (SI UNA ETAPA SE REPITE SE ACUMULA)
+    @contextmanager
+    def etapa(self, nombre):
+        if self.medir_memoria:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            memoria_inicial = tracemalloc.get_traced_memory()[0]
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.etapas[nombre] = self.etapas.get(nombre, 0.0) + time.perf_counter() - inicio
+            if self.medir_memoria:
+                pico = tracemalloc.get_traced_memory()[1] - memoria_inicial
+                self.memoria[nombre] = max(self.memoria.get(nombre, 0), pico)
+
+    def registrar(self, **valores):
+        self.contadores.update(valores)
+
+    def segundos_total(self):
+        return time.perf_counter() - self.inicio
+
+    ## FILA PARA LA TABLA pipeline_runs
+    def como_fila(self, exito, mensaje):
+        fila = {
+            "fecha_inicio": self.fecha_inicio,
+            "segundos_total": round(self.segundos_total(), 3),
+            "exito": exito,
+            "mensaje": mensaje
+        }
+        for nombre in ETAPAS:
+            fila[f"segundos_{nombre}"] = round(self.etapas.get(nombre, 0.0), 3)
+        fila.update(self.contadores)
+        return fila
+
+    ## RESUMEN LEGIBLE: [(ETAPA, SEGUNDOS), ...] INCLUYENDO EL TOTAL
+    def resumen(self):
+        filas = [(nombre, round(self.etapas[nombre], 2)) for nombre in ETAPAS if nombre in self.etapas]
+        filas.append(("total", round(self.segundos_total(), 2)))
+        return filas
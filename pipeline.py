@@ -0,0 +1,532 @@
+## IMPORTACION DE BIBLIOTECAS
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+
+import pandas as pd
+
+from analitica import calcular_metricas
+from base_datos import huella_lotes, obtener_engine
+from cotizaciones import descargar_cierres, obtener_cotizaciones
+from destinos import DestinoSQL
+from dolar import proveedor_dolar
+from historico import dolar_formato_tabla, reconstruir_historico, serie_dolar_de_lotes
+from ingesta import leer_reporte
+from metricas import MedicionEjecucion
+from progreso import Progreso
+from valuacion import calcular_costos, valuar_lotes
+
+## ERROR CON UN MENSAJE LISTO PARA MOSTRAR AL USUARIO
+class ErrorProceso(Exception):
+    pass
+
+
+## NOMBRE PARA MOSTRAR DE UN ARCHIVO SUBIDO O DE UNA RUTA
+def nombre_archivo(archivo):
+    return getattr(archivo, "name", str(archivo))
+
+
+## UNIÓN DE LOTES DE VARIOS REPORTES (UNO POR CUENTA)
+# DOS COMPRAS IDÉNTICAS EN CUENTAS DISTINTAS SON LOTES DISTINTOS: NO SE ELIMINAN DUPLICADOS ENTRE REPORTES.
+# EL MISMO ARCHIVO SUBIDO DOS VECES SE DESCARTA ANTES DE LEERLO (VER preparar_lotes)
+def unir_lotes(partes):
+    if len(partes) == 1:
+        return partes[0]
+    df_unido = pd.concat(partes, ignore_index=True)
+    # AL UNIR CATEGORÍAS DISTINTAS PANDAS VUELVE A TEXTO
+    for columna in ["ticker", "moneda", "tipo", "descripcion"]:
+        if columna in df_unido.columns:
+            df_unido[columna] = df_unido[columna].astype("category")
+    return df_unido
+
+
+## SHA-256 DE LOS BYTES DE UN ARCHIVO SUBIDO O DE UNA RUTA
+def huella_archivo(archivo):
+    if isinstance(archivo, (str, os.PathLike)):
+        with open(archivo, "rb") as f:
+            contenido = f.read()
+    elif hasattr(archivo, "getvalue"):
+        contenido = archivo.getvalue()
+    else:
+        archivo.seek(0)
+        contenido = archivo.read()
+        archivo.seek(0)
+    return hashlib.sha256(contenido).digest()
+
+
+## HUELLA DEL CONTENIDO DE LOS ARCHIVOS (EN EL ORDEN RECIBIDO)
+def huella_archivos(archivos):
+    huella = hashlib.sha256()
+    for archivo in archivos:
+        huella.update(huella_archivo(archivo))
+    return huella.hexdigest()
+
+
+## ARCHIVOS SIN REPETIR: SI EL MISMO REPORTE SE SUBIÓ MÁS DE UNA VEZ SE LEE SOLO LA PRIMERA
+def archivos_distintos(archivos, progreso):
+    vistos = set()
+    distintos = []
+    for archivo in archivos:
+        huella = huella_archivo(archivo)
+        if huella in vistos:
+            nombre = nombre_archivo(archivo)
+            progreso.archivo(nombre, 1.0, f"{nombre}: mismo contenido que otro reporte, se omite")
+            continue
+        vistos.add(huella)
+        distintos.append(archivo)
+    return distintos
+
+
+## CACHE DE LOTES YA LEÍDOS Y COSTEADOS, POR HUELLA DE LOS ARCHIVOS
+# LRU ACOTADA POR CANTIDAD DE ENTRADAS Y POR MEMORIA. SE GUARDAN Y ENTREGAN COPIAS (EL PROCESO MODIFICA EL DATAFRAME)
+class CacheLotes:
+
+    def __init__(self, max_entradas=8, max_bytes=256 * 2 ** 20):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.entradas = OrderedDict()
+        self.bytes_totales = 0
+        self.lock = threading.Lock()
+
+    def obtener(self, huella):
+        with self.lock:
+            entrada = self.entradas.get(huella)
+            if entrada is None:
+                return None
+            self.entradas.move_to_end(huella)
+            return entrada[0].copy()
+
+    def guardar(self, huella, df):
+        df = df.copy()
+        tamanio = int(df.memory_usage(deep=True).sum())
+        if tamanio > self.max_bytes:
+            return
+        with self.lock:
+            anterior = self.entradas.pop(huella, None)
+            if anterior is not None:
+                self.bytes_totales -= anterior[1]
+            self.entradas[huella] = (df, tamanio)
+            self.bytes_totales += tamanio
+            while len(self.entradas) > self.max_entradas or self.bytes_totales > self.max_bytes:
+                _, (_, tamanio_descartado) = self.entradas.popitem(last=False)
+                self.bytes_totales -= tamanio_descartado
+
+    def limpiar(self):
+        with self.lock:
+            self.entradas.clear()
+            self.bytes_totales = 0
+
+
+## CACHE COMPARTIDA POR TODO EL PROCESO (CONFIGURABLE CON VARIABLES DE ENTORNO)
+cache_lotes = CacheLotes(
+    max_entradas=int(os.getenv("LOTES_CACHE_MAX_ENTRADAS", "8")),
+    max_bytes=int(os.getenv("LOTES_CACHE_MAX_MB", "256")) * 2 ** 20
+)
+
+
+## LECTURA DE UNO O VARIOS REPORTES EN PARALELO Y CÁLCULO DE COSTOS (NO DEPENDE DEL MERCADO)
+# SI LOS MISMOS ARCHIVOS YA SE PROCESARON SE REUTILIZAN LOS LOTES DE cache (None = cache_lotes, False = SIN CACHE)
+def preparar_lotes(archivos, progreso=None, max_workers=4, cache=None):
+    progreso = progreso or Progreso()
+    if not isinstance(archivos, (list, tuple)):
+        archivos = [archivos]
+    cache = cache_lotes if cache is None else cache
+
+    if cache:
+        huella = huella_archivos(archivos)
+        df_cedears = cache.obtener(huella)
+        if df_cedears is not None:
+            for archivo in archivos:
+                nombre = nombre_archivo(archivo)
+                progreso.archivo(nombre, 1.0, f"{nombre}: reporte ya procesado, se reutilizan sus lotes")
+            return df_cedears
+
+    archivos = archivos_distintos(archivos, progreso)
+    partes = []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(archivos)))) as pool:
+        futuros = {}
+        for archivo in archivos:
+            nombre = nombre_archivo(archivo)
+            progreso.archivo(nombre, 0, f"Leyendo archivo: {nombre}...")
+            futuros[pool.submit(leer_reporte, archivo)] = nombre
+        for futuro in as_completed(futuros):
+            nombre = futuros[futuro]
+            df = futuro.result()
+            progreso.archivo(nombre, 1.0, f"{nombre}: {len(df)} lotes de CEDEARs")
+            partes.append(df)
+    df_cedears = unir_lotes(partes)
+
+    # ORDENAR POR FECHA
+    if "fecha" in df_cedears.columns:
+        df_cedears.sort_values(by="fecha", inplace=True)
+        df_cedears.reset_index(drop=True, inplace=True)
+    else:
+        progreso.advertencia("Error: No se pudo ordenar por fecha")
+
+    ## CALCULO DE COSTO EN PESOS ARGENTINOS Y EN USD (SEGÚN FECHA)
+    df_cedears = calcular_costos(df_cedears)
+    if cache:
+        cache.guardar(huella, df_cedears)
+    return df_cedears
+
+
+## OBTENCIÓN DE COTIZACIONES (SOLO LAS QUE NO SE RECIBIERON YA) Y DEL VALOR DEL DÓLAR
+# fuente_cotizaciones: FUNCIÓN CON LA FIRMA DE cotizaciones.obtener_cotizaciones
+# fuente_dolar: OBJETO CON EL MÉTODO obtener(engine, estadisticas) COMO dolar.ProveedorDolar
+# respaldo: FUNCIÓN tickers -> {ticker: último precio conocido} PARA LOS TICKERS SIN COTIZACIÓN (VER destinos.Destino)
+def obtener_datos_mercado(tickers, engine=None, progreso=None, cotizaciones=None, dolar=None, medicion=None,
+                          fuente_cotizaciones=None, fuente_dolar=None, respaldo=None):
+    progreso = progreso or Progreso()
+    medicion = medicion or MedicionEjecucion()
+    fuente_cotizaciones = fuente_cotizaciones or obtener_cotizaciones
+    fuente_dolar = fuente_dolar or proveedor_dolar
+    cotizaciones = dict(cotizaciones or {})
+
+    progreso.mensaje("Obteniendo cotizaciones...")
+    faltantes = [t for t in tickers if t not in cotizaciones]
+
+    def actualizar_progreso_cotizacion(completados, total, ticker):
+        avance = completados / total
+        progreso.avance(0.10 + (avance * 0.60), f"Cotización de {ticker} ({completados}/{total})")
+
+    estadisticas = {"cache": len(tickers) - len(faltantes), "red": 0}
+    if faltantes:
+        with medicion.etapa("cotizaciones"):
+            estadisticas_red = {}
+            nuevas, errores_cotizacion = fuente_cotizaciones(faltantes, progreso=actualizar_progreso_cotizacion,
+                                                             estadisticas=estadisticas_red, respaldo=respaldo)
+            estadisticas["cache"] += estadisticas_red.get("cache", 0)
+            estadisticas["red"] += estadisticas_red.get("red", 0)
+        cotizaciones.update(nuevas)
+        if estadisticas_red.get("respaldo"):
+            progreso.advertencia(f"{estadisticas_red['respaldo']} tickers sin cotización actual se valuaron con su último precio guardado.")
+
+        ## UN TICKER SIN PRECIO NO DETIENE EL PROCESO (SUS LOTES QUEDAN SIN VALUAR Y NO ENTRA EN LA FOTO DEL DÍA);
+        # SOLO SE DETIENE SI NO HUBO NINGUNA COTIZACIÓN
+        for ticker, error in errores_cotizacion.items():
+            progreso.advertencia(f"Error al obtener la cotización de {ticker}: {error}")
+        if errores_cotizacion and not cotizaciones:
+            raise ErrorProceso("Error al obtener las cotizaciones. Proceso detenido.")
+    consultas = estadisticas["cache"] + estadisticas["red"]
+    medicion.registrar(
+        tickers=len(tickers),
+        aciertos_cache_cotizaciones=round(estadisticas["cache"] / consultas, 4) if consultas else None
+    )
+
+    progreso.mensaje("Obteniendo valor del dólar...")
+    if dolar is None:
+        try:
+            estadisticas_dolar = {}
+            with medicion.etapa("dolar"):
+                dolar = fuente_dolar.obtener(engine, estadisticas_dolar)
+            medicion.registrar(origen_dolar=estadisticas_dolar.get("origen"))
+        except Exception as e:
+            progreso.error(f"Error al cargar valores de dólar: {e}")
+            raise Exception("No se pudo obtener el valor del dólar, el proceso no puede continuar.")
+
+    progreso.avance(0.70, "Cotizaciones obtenidas.")
+    return cotizaciones, dolar
+
+
+## DATOS HISTORICOS DEL DOLAR
+def armar_historico_dolar(dolar_oficial, dolar_mep):
+    datos_dolar = [
+        {'fecha': date.today(), 'tipo': 'Oficial', 'valor': dolar_oficial},
+        {'fecha': date.today(), 'tipo': 'MEP', 'valor': dolar_mep}
+    ]
+    return pd.DataFrame(datos_dolar)
+
+
+## GUARDADO DE LAS TRES TABLAS E INFORME DEL RESULTADO
+# destino: destinos.Destino (BASE SQL, DUCKDB O PARQUET)
+# solo_mercado=True: LOS LOTES YA ESTÁN GUARDADOS; SE ACTUALIZAN SUS COLUMNAS DE MERCADO Y SE AGREGA LA FOTO DEL DÍA
+def guardar_resultados(destino, df_cedears, df_final_listo, df_historico_dolar, progreso=None, solo_mercado=False):
+    progreso = progreso or Progreso()
+    progreso.avance(0.80, "Guardando en Base de Datos...")
+    progreso.mensaje("Conectando a la base de datos...")
+
+    if solo_mercado:
+        resumen_carga = destino.guardar_mercado(df_cedears, df_final_listo, df_historico_dolar)
+    else:
+        resumen_carga = destino.guardar_tablas(df_cedears, df_final_listo, df_historico_dolar)
+    for table_name, detalle in resumen_carga.items():
+        if solo_mercado and table_name == 'cedears':
+            progreso.mensaje(f"Tabla 'cedears': {detalle['filas']} lotes revaluados.")
+        else:
+            progreso.mensaje(f"Tabla '{table_name}': {detalle['filas']} filas cargadas.")
+    if 'insertadas' in resumen_carga['cedears']:
+        detalle = resumen_carga['cedears']
+        progreso.mensaje(f"Lotes nuevos: {detalle['insertadas']} | actualizados: {detalle['actualizadas']} | eliminados: {detalle['eliminadas']}")
+    if resumen_carga['datos_historicos_cedears']['filas'] == 0:
+        progreso.advertencia("Advertencia: Datos ya cargados el día de hoy en 'datos_historicos_cedears'.")
+    if resumen_carga['historico_dolar']['filas'] == 0:
+        progreso.advertencia("Cotización del dólar ya cargada el día de hoy")
+
+    progreso.avance(0.95, "Guardando en Base de Datos...")
+    return resumen_carga
+
+
+## DÍAS SEGUIDOS QUE PUEDE NO HABER RUEDA (FIN DE SEMANA LARGO)
+DIAS_SIN_RUEDA = 7
+
+
+## RECONSTRUCCIÓN DEL HISTÓRICO DIARIO DESDE LA PRIMERA COMPRA
+# SI EL DESTINO COMPACTA LOS DÍAS VIEJOS (destino.inicio_historico) LA RECONSTRUCCIÓN EMPIEZA EN EL CORTE: LOS LOTES
+# ANTERIORES SE ACUMULAN EN LA PRIMERA RUEDA DESCARGADA.
+# SI EL HISTÓRICO GUARDADO YA LLEGA HASTA ESE INICIO (SALVO LOS DÍAS SIN RUEDA, VER DIAS_SIN_RUEDA) SOLO SE DESCARGAN
+# LOS DÍAS DESDE LA ÚLTIMA FOTO ANTERIOR A HOY: LA FOTO DE HOY ES LA DE ESTA MISMA EJECUCIÓN
+# fuente_cierres: FUNCIÓN CON LA FIRMA DE cotizaciones.descargar_cierres
+def completar_historico(df_cedears, destino, progreso=None, fuente_cierres=None, fuente_dolar=None):
+    progreso = progreso or Progreso()
+    fuente_cierres = fuente_cierres or descargar_cierres
+    fuente_dolar = fuente_dolar or proveedor_dolar
+
+    desde = pd.to_datetime(df_cedears["fecha"]).min().date()
+    inicio = destino.inicio_historico()
+    if inicio is not None and inicio > desde:
+        desde = inicio
+    primera, ultima = destino.rango_historico(date.today())
+    if ultima is not None and primera <= desde + timedelta(days=DIAS_SIN_RUEDA):
+        desde = max(desde, ultima)
+    tickers = list(df_cedears["ticker"].unique())
+    progreso.mensaje(f"Descargando cierres diarios desde {desde} para {len(tickers)} tickers...")
+    cierres = fuente_cierres(tickers, desde)
+    if cierres.empty:
+        progreso.advertencia("No se obtuvieron cierres históricos; se omite la reconstrucción del histórico.")
+        return None
+
+    # LA SERIE DEL DÓLAR SE COMPLETA CON LOS VALORES INFORMADOS EN LOS LOTES; EMPIEZA UNOS DÍAS ANTES PARA TENER
+    # UN VALOR CONOCIDO EN LA PRIMERA RUEDA
+    df_dolar = fuente_dolar.historico(desde - timedelta(days=DIAS_SIN_RUEDA), destino.engine)
+    df_dolar = df_dolar.combine_first(serie_dolar_de_lotes(df_cedears)) if not df_dolar.empty else serie_dolar_de_lotes(df_cedears)
+
+    df_historico = reconstruir_historico(df_cedears, cierres, df_dolar)
+    df_dolar_tabla = dolar_formato_tabla(df_dolar)
+    df_dolar_tabla = df_dolar_tabla[df_dolar_tabla["fecha"] >= desde]
+    resumen = destino.guardar_historico(df_historico, df_dolar_tabla)
+    progreso.mensaje(
+        f"Histórico reconstruido: {resumen['datos_historicos_cedears']['filas']} filas nuevas en "
+        f"'datos_historicos_cedears' y {resumen['historico_dolar']['filas']} en 'historico_dolar'."
+    )
+    return resumen
+
+
+## TRADUCCIÓN DE ERRORES A MENSAJES PARA EL USUARIO
+def describir_error(e, progreso=None):
+    progreso = progreso or Progreso()
+    if isinstance(e, ErrorProceso):
+        return str(e)
+
+    error_message = str(e).lower()
+
+    if "authentication failed" in error_message or "connection to server" in error_message or "duplicate sasl authentication" in error_message:
+        return "❌ ¡Error de conexión! Revisa tu Host, Usuario, Contraseña y Nombre de Base de Datos."
+
+    elif "worksheet named" in error_message and "not found" in error_message:
+        return "❌ Error de Excel: No se encontró la hoja 'resultados_por_lotes_finales' en el archivo que subiste. Por favor, revisa el archivo."
+
+    elif "specify an engine manually" in error_message:
+        return "❌ Error de Archivo: El formato de Excel .xls no es compatible. Por favor, abre el archivo en Excel y guárdalo como .xlsx antes de subirlo."
+
+    elif "relation" in error_message and "does not exist" in error_message:
+        return f"❌ Error de Base de Datos: Una de las tablas no existe. (Detalle: {e})"
+
+    else:
+        progreso.error(f"Error detallado: {e}")
+        return f"Error general en el procesamiento: {e}"
+
+
+## RETENCIÓN Y RESÚMENES DE LOS HISTÓRICOS (UN ERROR NO AFECTA EL RESULTADO DE LA CARGA)
+def mantener_historicos(destino, progreso):
+    try:
+        resumen = destino.mantener()
+    except Exception as e:
+        progreso.advertencia(f"No se pudo compactar el histórico: {e}")
+        return
+    for tabla in resumen.get("particionadas", []):
+        progreso.mensaje(f"La tabla {tabla} ahora está particionada por mes.")
+    filas = sum(resumen.get("compactadas", {}).values())
+    if filas:
+        progreso.mensaje(f"Histórico compactado: {filas} filas diarias anteriores al {resumen['corte']:%d/%m/%Y} "
+                         "pasaron a los resúmenes semanales y mensuales.")
+
+
+## MÉTRICAS DE RENDIMIENTO PARA EL INFORME (UN ERROR NO AFECTA EL RESULTADO DE LA CARGA)
+# SE CALCULAN CON LOS LOTES YA VALUADOS Y LAS FOTOS DIARIAS GUARDADAS (INCLUIDA LA DEL DÍA)
+def calcular_analitica(destino, df_cedears, progreso):
+    try:
+        df_metricas = calcular_metricas(df_cedears, destino.leer_historico())
+        destino.guardar_metricas_rendimiento(df_metricas)
+    except Exception as e:
+        progreso.advertencia(f"No se pudieron calcular las métricas de rendimiento: {e}")
+
+
+## REGISTRO DE LA EJECUCIÓN EN pipeline_runs (UN ERROR AL REGISTRAR NO AFECTA EL RESULTADO)
+def registrar_ejecucion(destino, medicion, exito, mensaje, progreso):
+    progreso.tiempos(medicion)
+    if destino is None:
+        return
+    try:
+        destino.guardar_metricas(medicion.como_fila(exito, mensaje))
+    except Exception as e:
+        progreso.advertencia(f"No se pudieron guardar las métricas de la ejecución: {e}")
+
+
+## DESTINO DONDE REGISTRAR UNA EJECUCIÓN QUE FALLÓ ANTES DE CONECTARSE (POR EJEMPLO AL LEER EL REPORTE)
+# None SI TAMPOCO SE PUEDE CONECTAR: EN ESE CASO NO HAY DÓNDE REGISTRARLA
+def destino_para_registro(db_host, db_name, db_user, db_pass, progreso, engine=None, destino=None):
+    try:
+        if destino is None:
+            destino = DestinoSQL(engine or obtener_engine(db_host, db_name, db_user, db_pass))
+        destino.preparar()
+        return destino
+    except Exception as e:
+        progreso.advertencia(f"No se pudo registrar la ejecución fallida: {e}")
+        return None
+
+
+## PROCESO COMPLETO PARA UNO O VARIOS REPORTES Y UNA BASE DE DATOS
+# LOS REPORTES SE UNEN EN UN SOLO CONJUNTO DE LOTES Y SE VALÚAN CON UNA ÚNICA PASADA DE COTIZACIONES
+# cotizaciones Y dolar PERMITEN REUTILIZAR DATOS DE MERCADO YA OBTENIDOS (POR EJEMPLO EN PROCESOS POR LOTES)
+# opciones: engine, destino, fuente_cotizaciones Y fuente_dolar PARA REEMPLAZAR LOS SERVICIOS EXTERNOS (VER valuar_y_guardar)
+def procesar_reporte(archivos, db_host, db_name, db_user, db_pass, progreso=None, cotizaciones=None, dolar=None,
+                     medicion=None, **opciones):
+    progreso = progreso or Progreso()
+    medicion = medicion or MedicionEjecucion()
+    try:
+        progreso.avance(0, "Iniciando:")
+        with medicion.etapa("lectura"):
+            df_cedears = preparar_lotes(archivos, progreso)
+        medicion.registrar(archivos=len(archivos) if isinstance(archivos, (list, tuple)) else 1)
+        progreso.avance(0.10)
+    except Exception as e:
+        mensaje = describir_error(e, progreso)
+        destino = destino_para_registro(db_host, db_name, db_user, db_pass, progreso,
+                                        opciones.get("engine"), opciones.get("destino"))
+        registrar_ejecucion(destino, medicion, False, mensaje, progreso)
+        return False, mensaje
+    return valuar_y_guardar(df_cedears, db_host, db_name, db_user, db_pass, progreso, cotizaciones, dolar, medicion, **opciones)
+
+
+## VALUACIÓN Y GUARDADO DE LOTES YA PREPARADOS
+# engine PERMITE USAR UNA BASE YA CREADA (POR EJEMPLO SQLITE LOCAL) EN LUGAR DE LAS CREDENCIALES
+# destino PERMITE ESCRIBIR EN OTRO DESTINO (destinos.DestinoDuckDB, destinos.DestinoParquet); SIN ÉL SE USA LA BASE SQL
+# historico_diario=True RECONSTRUYE ADEMÁS EL HISTÓRICO DIARIO DESDE LA PRIMERA COMPRA
+def valuar_y_guardar(df_cedears, db_host, db_name, db_user, db_pass, progreso=None, cotizaciones=None, dolar=None, medicion=None,
+                     engine=None, fuente_cotizaciones=None, fuente_dolar=None, historico_diario=False, fuente_cierres=None,
+                     destino=None):
+    progreso = progreso or Progreso()
+    medicion = medicion or MedicionEjecucion()
+    try:
+        if destino is None:
+            destino = DestinoSQL(engine or obtener_engine(db_host, db_name, db_user, db_pass))
+
+        ## ESQUEMA: SOLO CONSULTA LA BASE LA PRIMERA VEZ EN EL PROCESO
+        with medicion.etapa("guardado"):
+            for version in destino.preparar():
+                progreso.mensaje(f"Esquema actualizado a la versión {version}.")
+
+        ## SI LOS LOTES SON LOS MISMOS DE LA ÚLTIMA CARGA EXITOSA NO SE VUELVE A ESCRIBIR cedears (SOLO SE REVALÚA)
+        huella = huella_lotes(df_cedears)
+        with medicion.etapa("guardado"):
+            lotes_sin_cambios = huella == destino.ultima_huella()
+        medicion.registrar(lotes=len(df_cedears), huella_lotes=huella)
+        tickers_unicos = df_cedears.ticker.unique()
+        cotizaciones, (dolar_oficial, dolar_mep) = obtener_datos_mercado(
+            tickers_unicos, destino.engine, progreso, cotizaciones, dolar, medicion,
+            fuente_cotizaciones=fuente_cotizaciones, fuente_dolar=fuente_dolar, respaldo=destino.ultimos_precios
+        )
+        with medicion.etapa("valuacion"):
+            df_cedears, df_final_listo = valuar_lotes(df_cedears, cotizaciones, dolar_oficial, dolar_mep)
+            df_historico_dolar = armar_historico_dolar(dolar_oficial, dolar_mep)
+        with medicion.etapa("guardado"):
+            if lotes_sin_cambios:
+                progreso.mensaje("Los lotes no cambiaron desde la última carga: solo se actualizan los valores de mercado.")
+            resumen_carga = guardar_resultados(destino, df_cedears, df_final_listo, df_historico_dolar, progreso,
+                                               solo_mercado=lotes_sin_cambios)
+        if historico_diario:
+            progreso.avance(0.96, "Reconstruyendo histórico...")
+            with medicion.etapa("historico"):
+                resumen_historico = completar_historico(df_cedears, destino, progreso, fuente_cierres, fuente_dolar)
+            if resumen_historico:
+                for tabla, detalle in resumen_historico.items():
+                    resumen_carga[f"{tabla}_reconstruido"] = detalle
+
+        ## MANTENIMIENTO DE LOS HISTÓRICOS Y VISTAS MATERIALIZADAS PARA EL INFORME DE POWER BI
+        with medicion.etapa("mantenimiento"):
+            mantener_historicos(destino, progreso)
+        with medicion.etapa("analitica"):
+            calcular_analitica(destino, df_cedears, progreso)
+        with medicion.etapa("guardado"):
+            destino.actualizar_vistas()
+        medicion.registrar(
+            filas_escritas=sum(detalle['filas'] for detalle in resumen_carga.values()),
+            bytes_escritos=sum(detalle['bytes'] for detalle in resumen_carga.values())
+        )
+
+        ## FINALIZACIÓN EXITOSA
+        mensaje = "¡Proceso completado con éxito!"
+        registrar_ejecucion(destino, medicion, True, mensaje, progreso)
+        progreso.avance(1.0)
+        return True, mensaje
+    except Exception as e:
+        mensaje = describir_error(e, progreso)
+        registrar_ejecucion(destino, medicion, False, mensaje, progreso)
+        return False, mensaje
+
+
+## REVALUACIÓN SIN REPORTE: TOMA LOS LOTES YA GUARDADOS, OBTIENE COTIZACIONES Y DÓLAR SOLO PARA SUS TICKERS,
+# ACTUALIZA LAS COLUMNAS DE MERCADO DE cedears Y AGREGA LA FOTO DEL DÍA (PENSADO PARA EJECUTARSE SEGUIDO)
+# opciones: engine, destino, fuente_cotizaciones Y fuente_dolar (VER valuar_y_guardar)
+def revaluar(db_host, db_name, db_user, db_pass, progreso=None, cotizaciones=None, dolar=None, medicion=None,
+             engine=None, destino=None, fuente_cotizaciones=None, fuente_dolar=None):
+    progreso = progreso or Progreso()
+    medicion = medicion or MedicionEjecucion()
+    try:
+        progreso.avance(0, "Iniciando:")
+        if destino is None:
+            destino = DestinoSQL(engine or obtener_engine(db_host, db_name, db_user, db_pass))
+        with medicion.etapa("guardado"):
+            for version in destino.preparar():
+                progreso.mensaje(f"Esquema actualizado a la versión {version}.")
+
+        progreso.mensaje("Leyendo los lotes guardados...")
+        with medicion.etapa("lectura"):
+            df_cedears = destino.leer_lotes()
+        if df_cedears.empty:
+            raise ErrorProceso("❌ No hay lotes guardados para revaluar. Sube primero tu reporte de Balanz.")
+        medicion.registrar(lotes=len(df_cedears))
+        progreso.avance(0.10)
+
+        cotizaciones, (dolar_oficial, dolar_mep) = obtener_datos_mercado(
+            df_cedears.ticker.unique(), destino.engine, progreso, cotizaciones, dolar, medicion,
+            fuente_cotizaciones=fuente_cotizaciones, fuente_dolar=fuente_dolar, respaldo=destino.ultimos_precios
+        )
+        with medicion.etapa("valuacion"):
+            df_cedears, df_final_listo = valuar_lotes(df_cedears, cotizaciones, dolar_oficial, dolar_mep)
+            df_historico_dolar = armar_historico_dolar(dolar_oficial, dolar_mep)
+        with medicion.etapa("guardado"):
+            resumen_carga = guardar_resultados(destino, df_cedears, df_final_listo, df_historico_dolar, progreso,
+                                               solo_mercado=True)
+        with medicion.etapa("mantenimiento"):
+            mantener_historicos(destino, progreso)
+        with medicion.etapa("analitica"):
+            calcular_analitica(destino, df_cedears, progreso)
+        with medicion.etapa("guardado"):
+            destino.actualizar_vistas()
+        medicion.registrar(
+            filas_escritas=sum(detalle['filas'] for detalle in resumen_carga.values()),
+            bytes_escritos=sum(detalle['bytes'] for detalle in resumen_carga.values())
+        )
+
+        mensaje = "¡Valores de mercado actualizados con éxito!"
+        registrar_ejecucion(destino, medicion, True, mensaje, progreso)
+        progreso.avance(1.0)
+        return True, mensaje
+    except Exception as e:
+        mensaje = describir_error(e, progreso)
+        registrar_ejecucion(destino, medicion, False, mensaje, progreso)
+        return False, mensaje
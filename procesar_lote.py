@@ -0,0 +1,167 @@
+## PROCESAMIENTO POR LOTES SIN INTERFAZ (PARA EJECUTAR DE FORMA PROGRAMADA, POR EJEMPLO CON CRON)
+#
+# USO:
+#   python procesar_lote.py --reportes carpeta_reportes --destinos destinos.json [--procesos 4] [--historico]
+#   python procesar_lote.py --revaluar --destinos destinos.json    (SOLO ACTUALIZA PRECIOS DE LOS LOTES YA GUARDADOS)
+#
+# destinos.json ES UNA LISTA DE BASES DE DATOS. CADA DESTINO SE ASOCIA AL REPORTE <nombre>.xlsx DE LA CARPETA:
+#   [{"nombre": "cuenta1", "host": "...", "base": "postgres", "usuario": "...", "clave_env": "CLAVE_CUENTA1"}]
+# LA CONTRASEÑA PUEDE INDICARSE CON "clave" O, PREFERENTEMENTE, CON EL NOMBRE DE UNA VARIABLE DE ENTORNO EN "clave_env".
+
+## IMPORTACION DE BIBLIOTECAS
+import argparse
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from cotizaciones import obtener_cotizaciones
+from dolar import proveedor_dolar
+from pipeline import Progreso, describir_error, preparar_lotes, revaluar, valuar_y_guardar
+
+logger = logging.getLogger("procesar_lote")
+
+
+## PROGRESO MOSTRADO EN EL LOG, IDENTIFICADO POR DESTINO
+class ProgresoConsola(Progreso):
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+
+    def mensaje(self, texto):
+        logger.info("[%s] %s", self.nombre, texto)
+
+    def advertencia(self, texto):
+        logger.warning("[%s] %s", self.nombre, texto)
+
+    def error(self, texto):
+        logger.error("[%s] %s", self.nombre, texto)
+
+    def tiempos(self, medicion):
+        logger.info("[%s] Tiempos: %s", self.nombre, ", ".join(f"{etapa}={segundos}s" for etapa, segundos in medicion.resumen()))
+
+
+## LECTURA DE LOS DESTINOS Y ASOCIACIÓN CON SU REPORTE
+def cargar_destinos(ruta_destinos, carpeta_reportes=None):
+    with open(ruta_destinos, encoding="utf-8") as f:
+        destinos = json.load(f)
+    for destino in destinos:
+        if "clave_env" in destino:
+            destino["clave"] = os.environ.get(destino["clave_env"], "")
+        if carpeta_reportes:
+            destino["reporte"] = os.path.join(carpeta_reportes, destino.get("reporte", f"{destino['nombre']}.xlsx"))
+    return destinos
+
+
+## TAREA DE CADA PROCESO: LECTURA DEL REPORTE Y CÁLCULO DE COSTOS
+def tarea_preparar(destino):
+    progreso = ProgresoConsola(destino["nombre"])
+    try:
+        return destino["nombre"], preparar_lotes(destino["reporte"], progreso), None
+    except Exception as e:
+        return destino["nombre"], None, describir_error(e, progreso)
+
+
+## TAREA DE CADA PROCESO: VALUACIÓN Y GUARDADO CON LOS DATOS DE MERCADO COMPARTIDOS
+def tarea_guardar(destino, df_cedears, cotizaciones, dolar, historico_diario=False):
+    progreso = ProgresoConsola(destino["nombre"])
+    exito, mensaje = valuar_y_guardar(
+        df_cedears,
+        destino["host"],
+        destino.get("base", "postgres"),
+        destino["usuario"],
+        destino["clave"],
+        progreso,
+        cotizaciones,
+        dolar,
+        historico_diario=historico_diario
+    )
+    return destino["nombre"], exito, mensaje
+
+
+## EJECUCIÓN DEL LOTE COMPLETO. DEVUELVE {NOMBRE: (EXITO, MENSAJE)}
+def procesar_lote(destinos, procesos=None, historico_diario=False):
+    resultados = {}
+    por_nombre = {destino["nombre"]: destino for destino in destinos}
+
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+
+        ## 1. LECTURA DE TODOS LOS REPORTES EN PARALELO
+        lotes = {}
+        futuros = [pool.submit(tarea_preparar, destino) for destino in destinos]
+        for futuro in as_completed(futuros):
+            nombre, df_cedears, error = futuro.result()
+            if error is not None:
+                resultados[nombre] = (False, error)
+            else:
+                lotes[nombre] = df_cedears
+
+        if not lotes:
+            return resultados
+
+        ## 2. COTIZACIONES UNA SOLA VEZ PARA TODOS LOS TICKERS DEL LOTE
+        tickers = sorted({ticker for df in lotes.values() for ticker in df.ticker.unique()})
+        logger.info("Obteniendo %d cotizaciones para %d reportes...", len(tickers), len(lotes))
+        cotizaciones, errores = obtener_cotizaciones(tickers)
+        for ticker, error in errores.items():
+            logger.warning("Error al obtener la cotización de %s: %s", ticker, error)
+        try:
+            dolar = proveedor_dolar.obtener()
+        except Exception as e:
+            # CADA DESTINO VOLVERÁ A INTENTARLO (Y PUEDE LEERLO DE SU TABLA historico_dolar)
+            logger.warning("Error al cargar valores de dólar: %s", e)
+            dolar = None
+
+        ## 3. VALUACIÓN Y GUARDADO EN PARALELO (LOS TICKERS SIN COTIZACIÓN SE REINTENTAN EN CADA DESTINO)
+        futuros = [
+            pool.submit(tarea_guardar, por_nombre[nombre], df_cedears, cotizaciones, dolar, historico_diario)
+            for nombre, df_cedears in lotes.items()
+        ]
+        for futuro in as_completed(futuros):
+            nombre, exito, mensaje = futuro.result()
+            resultados[nombre] = (exito, mensaje)
+
+    return resultados
+
+
+## REVALUACIÓN DE TODOS LOS DESTINOS (SIN REPORTES). DEVUELVE {NOMBRE: (EXITO, MENSAJE)}
+# ES TRABAJO DE RED: SE USAN HILOS, ASÍ LOS DESTINOS COMPARTEN LA CACHE DE COTIZACIONES Y EL VALOR DEL DÓLAR
+def revaluar_lote(destinos, procesos=None):
+    def tarea_revaluar(destino):
+        return revaluar(destino["host"], destino.get("base", "postgres"), destino["usuario"], destino["clave"],
+                        ProgresoConsola(destino["nombre"]))
+
+    resultados = {}
+    with ThreadPoolExecutor(max_workers=procesos or 4) as pool:
+        futuros = {pool.submit(tarea_revaluar, destino): destino["nombre"] for destino in destinos}
+        for futuro in as_completed(futuros):
+            resultados[futuros[futuro]] = futuro.result()
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Procesa reportes de Balanz y los guarda en varias bases de datos.")
+    parser.add_argument("--reportes", default=None, help="Carpeta con los reportes .xlsx")
+    parser.add_argument("--destinos", required=True, help="Archivo JSON con las bases de datos de destino")
+    parser.add_argument("--procesos", type=int, default=None, help="Cantidad máxima de procesos en paralelo")
+    parser.add_argument("--historico", action="store_true", help="Completar el histórico diario desde la primera compra")
+    parser.add_argument("--revaluar", action="store_true", help="Solo actualizar precios de los lotes ya guardados (sin reportes)")
+    args = parser.parse_args(argv)
+    if not args.revaluar and not args.reportes:
+        parser.error("--reportes es obligatorio salvo con --revaluar")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    destinos = cargar_destinos(args.destinos, args.reportes)
+    if args.revaluar:
+        resultados = revaluar_lote(destinos, args.procesos)
+    else:
+        resultados = procesar_lote(destinos, args.procesos, args.historico)
+
+    for nombre, (exito, mensaje) in sorted(resultados.items()):
+        logger.info("[%s] %s %s", nombre, "OK" if exito else "ERROR", mensaje)
+    return 0 if all(exito for exito, _ in resultados.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+## INTERFAZ DE PROGRESO DEL PROCESO
+# MÓDULO SIN DEPENDENCIAS PESADAS: LO PUEDEN IMPORTAR LA INTERFAZ Y LOS TRABAJOS SIN CARGAR PANDAS NI SQLALCHEMY.
+# pipeline LO VUELVE A EXPORTAR (from pipeline import Progreso SIGUE FUNCIONANDO).
+
+## INTERFAZ DE PROGRESO: LA INTERFAZ (STREAMLIT, CONSOLA, ETC.) REDEFINE LOS MÉTODOS QUE NECESITE
+class Progreso:
+
+    def avance(self, fraccion, texto=None):
+        pass
+
+    def archivo(self, nombre, fraccion, texto=None):
+        pass
+
+    def mensaje(self, texto):
+        pass
+
+    def advertencia(self, texto):
+        pass
+
+    def error(self, texto):
+        pass
+
+    ## RECIBE LA MEDICIÓN DE LA EJECUCIÓN AL TERMINAR (VER metricas.MedicionEjecucion)
+    def tiempos(self, medicion):
+        pass
@@ -0,0 +1,5 @@
+## LOS MÓDULOS DEL PROYECTO ESTÁN EN LA RAÍZ DEL REPOSITORIO
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,55 @@
+## DATOS Y SERVICIOS DE MERCADO FALSOS COMPARTIDOS POR LAS PRUEBAS (SIN RED)
+import pandas as pd
+
+from ingesta import tipar_columnas
+from valuacion import calcular_costos
+
+
+## DÓLAR CONSTANTE CON LA INTERFAZ DE dolar.ProveedorDolar
+class DolarFijo:
+
+    def __init__(self, oficial=1000.0, mep=1200.0):
+        self.oficial = oficial
+        self.mep = mep
+
+    def obtener(self, engine=None, estadisticas=None):
+        return self.oficial, self.mep
+
+    def historico(self, desde, engine=None):
+        fechas = pd.date_range(desde, pd.Timestamp.today().normalize(), freq="D", name="fecha")
+        return pd.DataFrame({"oficial": self.oficial, "mep": self.mep}, index=fechas)
+
+
+## FUENTE DE COTIZACIONES CON LA FIRMA DE cotizaciones.obtener_cotizaciones (sin_precio: TICKERS QUE NO COTIZAN)
+def cotizaciones_fijas(precio, sin_precio=()):
+    def fuente(tickers, progreso=None, estadisticas=None, respaldo=None):
+        precios = {ticker: precio for ticker in tickers if ticker not in sin_precio}
+        errores = {ticker: ValueError("Sin precio disponible") for ticker in tickers if ticker in sin_precio}
+        return precios, errores
+    return fuente
+
+
+## CIERRES DIARIOS CONSTANTES CON LA FIRMA DE cotizaciones.descargar_cierres; ANOTA CADA desde PEDIDO
+def cierres_fijos(precio, pedidos):
+    def fuente(tickers, desde):
+        pedidos.append(desde)
+        fechas = pd.bdate_range(desde, pd.Timestamp.today().normalize() - pd.Timedelta(days=1), name="Date")
+        return pd.DataFrame(precio, index=fechas, columns=list(tickers))
+    return fuente
+
+
+def lotes_de_prueba():
+    df = pd.DataFrame({
+        "cantidad": [10, 5, 3],
+        "descripcion": ["Apple", "Apple", "Microsoft"],
+        "fecha": ["2022-02-06", "2023-05-10", "2025-06-01"],
+        "fecha_descarga": ["2022-02-06", "2023-05-10", "2025-06-01"],
+        "gastos": [10.0, 5.0, 3.0],
+        "moneda": ["Pesos", "Pesos", "Pesos"],
+        "precio_compra": [1000.0, 1500.0, 2000.0],
+        "ticker": ["AAPL", "AAPL", "MSFT"],
+        "tipo": ["Cedears", "Cedears", "Cedears"],
+        "dolar_mep": [200.0, 450.0, 1150.0],
+        "dolar_oficial": [110.0, 230.0, 1100.0]
+    })
+    return calcular_costos(tipar_columnas(df))
@@ -0,0 +1,95 @@
+## MÉTRICAS DE RENDIMIENTO CON RESULTADOS CONOCIDOS
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analitica import TICKER_CARTERA, metricas_historico, metricas_retornos, retornos_series, xirr, xirr_lotes
+
+
+def columna(valores):
+    return np.array(valores, dtype="float64")[:, None]
+
+
+def fotos(filas):
+    return pd.DataFrame(filas, columns=["ticker", "fecha_ejecucion", "moneda", "costo", "tenencia"])
+
+
+def test_xirr_con_dos_flujos():
+    tasas = xirr(np.array([0, 0]), np.array([-100.0, 110.0]), np.array([0.0, 1.0]), 1)
+    assert tasas[0] == pytest.approx(0.10)
+
+
+def test_xirr_sin_flujos_de_ambos_signos_es_nan():
+    tasas = xirr(np.array([0, 0]), np.array([-100.0, -50.0]), np.array([0.0, 1.0]), 1)
+    assert np.isnan(tasas[0])
+
+
+def test_xirr_lotes_por_ticker_y_cartera():
+    df_cedears = pd.DataFrame({
+        "ticker": ["AAPL", "MSFT"],
+        "fecha": ["2023-01-01", "2023-01-01"],
+        "costo_ars": [100.0, 200.0],
+        "costo_usd": [1.0, 2.0],
+        "tenencia_ars": [110.0, 220.0],
+        "tenencia_usd": [1.1, 2.2]
+    })
+    df_xirr = xirr_lotes(df_cedears, date(2024, 1, 1)).set_index(["ticker", "moneda"])["xirr"]
+    for ticker in ["AAPL", "MSFT", TICKER_CARTERA]:
+        for moneda in ["ars", "usd"]:
+            assert df_xirr[(ticker, moneda)] == pytest.approx(0.10)
+
+
+def test_xirr_lotes_deja_afuera_los_lotes_sin_cotizacion():
+    df_cedears = pd.DataFrame({
+        "ticker": ["AAPL", "MSFT"],
+        "fecha": ["2023-01-01", "2023-01-01"],
+        "costo_ars": [100.0, 200.0],
+        "costo_usd": [1.0, 2.0],
+        "tenencia_ars": [110.0, np.nan],
+        "tenencia_usd": [1.1, np.nan]
+    })
+    df_xirr = xirr_lotes(df_cedears, date(2024, 1, 1)).set_index(["ticker", "moneda"])["xirr"]
+    for moneda in ["ars", "usd"]:
+        assert df_xirr[("AAPL", moneda)] == pytest.approx(0.10)
+        assert df_xirr[(TICKER_CARTERA, moneda)] == pytest.approx(0.10)
+        assert np.isnan(df_xirr[("MSFT", moneda)])
+
+
+def test_serie_constante_tiene_twr_cero():
+    tenencia = columna([100.0] * 5)
+    twr, max_drawdown, _ = metricas_retornos(retornos_series(tenencia, tenencia.copy()), ventana=4)
+    assert twr[0] == pytest.approx(0.0)
+    assert max_drawdown[0] == pytest.approx(0.0)
+
+
+def test_maxima_caida_conocida():
+    tenencia = columna([100.0, 120.0, 90.0, 110.0])
+    twr, max_drawdown, _ = metricas_retornos(retornos_series(tenencia, columna([100.0] * 4)), ventana=4)
+    assert twr[0] == pytest.approx(0.10)
+    assert max_drawdown[0] == pytest.approx(-0.25)
+
+
+def test_las_compras_no_son_rendimiento():
+    tenencia = columna([100.0, 210.0, 231.0])
+    costo = columna([100.0, 200.0, 200.0])
+    twr, _, _ = metricas_retornos(retornos_series(tenencia, costo), ventana=4)
+    assert twr[0] == pytest.approx(1.10 * 1.10 - 1)
+
+
+def test_ticker_sin_cotizacion_no_afecta_a_la_cartera():
+    df_historico = fotos([
+        ("AAPL", "2024-01-01", "ars", 100.0, 100.0),
+        ("AAPL", "2024-01-02", "ars", 100.0, 110.0),
+        ("AAPL", "2024-01-03", "ars", 100.0, 121.0),
+        ("MSFT", "2024-01-01", "ars", 100.0, 100.0),
+        ("MSFT", "2024-01-02", "ars", 100.0, 0.0),
+        ("MSFT", "2024-01-03", "ars", 100.0, 100.0)
+    ])
+    df_metricas = metricas_historico(df_historico, ventana=4).set_index("ticker")
+    assert df_metricas.loc["AAPL", "twr"] == pytest.approx(0.21)
+    assert df_metricas.loc["MSFT", "twr"] == pytest.approx(0.0)
+    assert df_metricas.loc["MSFT", "max_drawdown"] == pytest.approx(0.0)
+    assert df_metricas.loc[TICKER_CARTERA, "twr"] == pytest.approx(221.0 / 200.0 - 1)
+    assert df_metricas.loc[TICKER_CARTERA, "max_drawdown"] == pytest.approx(0.0)
@@ -0,0 +1,166 @@
+## MOTOR DE COTIZACIONES: CORTOCIRCUITO, SOLICITUDES CUBIERTAS, CACHE Y PROVEEDORES (SIN RED)
+import threading
+
+import pandas as pd
+import pytest
+
+import cotizaciones
+from cotizaciones import (CacheCotizaciones, Cortocircuito, LimitadorTokens, ProveedorYahooIndividual,
+                          ProveedorYahooLote, solicitud_cubierta)
+
+
+## RELOJ FALSO QUE REEMPLAZA AL MÓDULO time DE cotizaciones
+class RelojFalso:
+
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def time(self):
+        return self.ahora
+
+    def monotonic(self):
+        return self.ahora
+
+    def sleep(self, segundos):
+        self.ahora += segundos
+
+    def avanzar(self, segundos):
+        self.ahora += segundos
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = RelojFalso()
+    monkeypatch.setattr(cotizaciones, "time", reloj)
+    return reloj
+
+
+## yfinance FALSO: fast_info DEVUELVE precios[SÍMBOLO] O LANZA error; download DEVUELVE UN DATAFRAME VACÍO
+class YahooFalso:
+
+    def __init__(self, precios=None, error=None):
+        self.precios = precios or {}
+        self.error = error
+
+    def Ticker(self, simbolo):
+        yahoo = self
+
+        class Ticker:
+            info = {}
+
+            @property
+            def fast_info(self):
+                if yahoo.error is not None:
+                    raise yahoo.error
+                return {"last_price": yahoo.precios.get(simbolo)}
+
+        return Ticker()
+
+    def download(self, simbolos, **opciones):
+        if self.error is not None:
+            raise self.error
+        return pd.DataFrame()
+
+
+def limitador_libre():
+    return LimitadorTokens(tasa=1000.0, capacidad=1000)
+
+
+def test_cortocircuito_deja_pasar_una_sola_prueba_y_se_reabre_si_falla(reloj):
+    cortocircuito = Cortocircuito(umbral_fallos=3, espera=60.0)
+    for _ in range(3):
+        assert cortocircuito.permite()
+        cortocircuito.fallo()
+    assert not cortocircuito.permite()
+    assert cortocircuito.abierto()
+
+    reloj.avanzar(60)
+    assert not cortocircuito.abierto()
+    assert cortocircuito.permite()
+    assert not cortocircuito.permite()
+    cortocircuito.fallo()
+    assert not cortocircuito.permite()
+
+    reloj.avanzar(60)
+    assert cortocircuito.permite()
+    cortocircuito.exito()
+    assert cortocircuito.cerrado()
+    assert cortocircuito.permite() and cortocircuito.permite()
+
+
+def test_solicitud_cubierta_usa_la_copia_si_la_primera_demora():
+    liberar = threading.Event()
+    llamadas = []
+
+    def consulta(ticker):
+        llamadas.append(ticker)
+        if len(llamadas) == 1:
+            liberar.wait(5)
+            return "primera"
+        return "copia"
+
+    try:
+        assert solicitud_cubierta(consulta, "AAPL", demora=0.05) == "copia"
+    finally:
+        liberar.set()
+    assert len(llamadas) == 2
+
+
+def test_solicitud_cubierta_sin_token_libre_espera_a_la_primera():
+    llamadas = []
+
+    def consulta(ticker):
+        llamadas.append(ticker)
+        threading.Event().wait(0.2)
+        return "primera"
+
+    assert solicitud_cubierta(consulta, "AAPL", demora=0.05, permitir_copia=lambda: False) == "primera"
+    assert len(llamadas) == 1
+
+
+def test_cache_devuelve_fresco_obsoleto_y_luego_nada(reloj):
+    cache = CacheCotizaciones(ttl=10, ventana_obsoleta=20)
+    cache.guardar({"AAPL": 100.0})
+    assert cache.obtener("AAPL") == (100.0, "fresco")
+    reloj.avanzar(15)
+    assert cache.obtener("AAPL") == (100.0, "obsoleto")
+    reloj.avanzar(20)
+    assert cache.obtener("AAPL") == (None, None)
+
+
+def test_simbolos_sin_precio_no_abren_el_cortocircuito(monkeypatch):
+    monkeypatch.setattr(cotizaciones, "yf", YahooFalso())
+    proveedor = ProveedorYahooIndividual(max_workers=2, demora_cobertura=5.0,
+                                         cortocircuito=Cortocircuito(umbral_fallos=3))
+    precios, errores = proveedor.obtener(["AAA", "BBB", "CCC", "DDD"], limitador_libre(), lambda ticker: None)
+    assert precios == {}
+    assert set(errores) == {"AAA", "BBB", "CCC", "DDD"}
+    assert proveedor.cortocircuito.cerrado()
+
+    lote = ProveedorYahooLote(tamanio_lote=1, cortocircuito=Cortocircuito(umbral_fallos=3))
+    assert lote.obtener(["AAA", "BBB", "CCC", "DDD"], limitador_libre(), lambda ticker: None) == ({}, {})
+    assert lote.cortocircuito.cerrado()
+
+
+def test_errores_de_red_abren_el_cortocircuito(monkeypatch):
+    monkeypatch.setattr(cotizaciones, "yf", YahooFalso(error=ConnectionError("Connection reset by peer")))
+    proveedor = ProveedorYahooIndividual(max_workers=1, demora_cobertura=5.0,
+                                         cortocircuito=Cortocircuito(umbral_fallos=3))
+    _, errores = proveedor.obtener(["AAA", "BBB", "CCC", "DDD"], limitador_libre(), lambda ticker: None)
+    assert set(errores) == {"AAA", "BBB", "CCC", "DDD"}
+    assert proveedor.cortocircuito.abierto()
+
+    lote = ProveedorYahooLote(tamanio_lote=1, cortocircuito=Cortocircuito(umbral_fallos=3))
+    lote.obtener(["AAA", "BBB", "CCC", "DDD"], limitador_libre(), lambda ticker: None)
+    assert lote.cortocircuito.abierto()
+
+
+def test_ticker_sin_precio_usa_el_respaldo(monkeypatch):
+    monkeypatch.setattr(cotizaciones, "yf", YahooFalso(precios={"AAA.BA": 10.0}))
+    proveedores = [ProveedorYahooIndividual(max_workers=1, demora_cobertura=5.0)]
+    precios, errores = cotizaciones.obtener_cotizaciones(
+        ["AAA", "BBB"], limitador=limitador_libre(), cache=CacheCotizaciones(), proveedores=proveedores,
+        respaldo=lambda tickers: {"BBB": 20.0}
+    )
+    assert precios == {"AAA": 10.0, "BBB": 20.0}
+    assert errores == {}
@@ -0,0 +1,29 @@
+## ÚLTIMO PRECIO CONOCIDO EN LOS DESTINOS LOCALES (DUCKDB Y PARQUET)
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from datos_prueba import DolarFijo, cotizaciones_fijas, lotes_de_prueba
+from destinos import DestinoParquet
+from pipeline import valuar_y_guardar
+
+
+def destino_duckdb(tmp_path):
+    pytest.importorskip("duckdb")
+    from destinos import DestinoDuckDB
+    return DestinoDuckDB(str(tmp_path / "cedears.duckdb"))
+
+
+def destino_parquet(tmp_path):
+    return DestinoParquet(str(tmp_path / "parquet"))
+
+
+@pytest.mark.parametrize("crear_destino", [destino_duckdb, destino_parquet])
+def test_ultimos_precios_sale_de_la_ultima_foto_en_ars(tmp_path, crear_destino):
+    destino = crear_destino(tmp_path)
+    exito, mensaje = valuar_y_guardar(lotes_de_prueba(), None, None, None, None, destino=destino,
+                                      fuente_cotizaciones=cotizaciones_fijas(2500.0), fuente_dolar=DolarFijo())
+    assert exito, mensaje
+
+    precios = destino.ultimos_precios(["AAPL", "MSFT", "GOOGL"])
+    assert precios == {"AAPL": pytest.approx(2500.0), "MSFT": pytest.approx(2500.0)}
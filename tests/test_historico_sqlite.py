@@ -0,0 +1,45 @@
+## RECONSTRUCCIÓN DEL HISTÓRICO DIARIO SOBRE UNA BASE SQLITE LOCAL (SIN RED)
+from datetime import date, timedelta
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+from datos_prueba import DolarFijo, cierres_fijos, cotizaciones_fijas, lotes_de_prueba
+from historico import reconstruir_historico
+from pipeline import valuar_y_guardar
+
+
+def cargar(engine, pedidos):
+    return valuar_y_guardar(lotes_de_prueba(), None, None, None, None, engine=engine,
+                            fuente_cotizaciones=cotizaciones_fijas(2500.0), fuente_dolar=DolarFijo(),
+                            historico_diario=True, fuente_cierres=cierres_fijos(2400.0, pedidos))
+
+
+def test_historico_reconstruido_se_guarda_con_fechas_sin_hora_y_se_completa_desde_la_ultima_foto(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cedears.sqlite'}")
+    pedidos = []
+    for _ in range(2):
+        exito, mensaje = cargar(engine, pedidos)
+        assert exito, mensaje
+
+    assert pedidos[0] == date(2022, 2, 6)
+    assert date.today() - timedelta(days=7) <= pedidos[1] < date.today()
+
+    with engine.connect() as connection:
+        historico = pd.read_sql("SELECT ticker, fecha_ejecucion, moneda FROM datos_historicos_cedears", connection)
+        dolar = pd.read_sql("SELECT fecha FROM historico_dolar", connection)
+        metricas = pd.read_sql("SELECT ticker FROM metricas_rendimiento", connection)
+    assert historico["fecha_ejecucion"].str.len().eq(10).all()
+    assert dolar["fecha"].str.len().eq(10).all()
+    assert not historico.duplicated().any()
+    assert set(metricas["ticker"]) >= {"AAPL", "MSFT"}
+    engine.dispose()
+
+
+def test_las_ruedas_anteriores_al_primer_dolar_conocido_no_se_valuan():
+    df_cedears = lotes_de_prueba().iloc[:1]
+    cierres = pd.DataFrame({"AAPL": 1000.0}, index=pd.bdate_range("2022-02-07", "2022-02-18"))
+    df_dolar = pd.DataFrame({"oficial": [120.0], "mep": [210.0]}, index=pd.DatetimeIndex(["2022-02-14"], name="fecha"))
+
+    df_historico = reconstruir_historico(df_cedears, cierres, df_dolar)
+    assert pd.to_datetime(df_historico["fecha_ejecucion"]).min() == pd.Timestamp("2022-02-14")
@@ -0,0 +1,93 @@
+## RESÚMENES SEMANALES Y MENSUALES DEL HISTÓRICO: VOLVER A COMPACTAR FILAS YA RESUMIDAS NO CAMBIA LOS RESÚMENES
+# NECESITA UN POSTGRES DE PRUEBA EN PRUEBAS_POSTGRES_URL; TODO SE HACE EN UN ESQUEMA TEMPORAL QUE SE BORRA AL FINAL
+import os
+import uuid
+from datetime import date
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from base_datos import historico_mensual_table, historico_semanal_table, historico_table
+from mantenimiento import compactar
+
+URL_POSTGRES = os.getenv("PRUEBAS_POSTGRES_URL")
+
+pytestmark = pytest.mark.skipif(not URL_POSTGRES, reason="PRUEBAS_POSTGRES_URL no está definida")
+
+
+@pytest.fixture
+def engine():
+    esquema = f"pruebas_{uuid.uuid4().hex[:8]}"
+    with create_engine(URL_POSTGRES).begin() as connection:
+        connection.execute(text(f"CREATE SCHEMA {esquema}"))
+    engine = create_engine(URL_POSTGRES, connect_args={"options": f"-csearch_path={esquema}"})
+    with engine.begin() as connection:
+        for tabla in (historico_table, historico_semanal_table, historico_mensual_table):
+            tabla.create(connection)
+    yield engine
+    engine.dispose()
+    with create_engine(URL_POSTGRES).begin() as connection:
+        connection.execute(text(f"DROP SCHEMA {esquema} CASCADE"))
+
+
+## FOTOS DIARIAS DE AAPL EN ARS CON TENENCIA 100, 101, ... (DÍAS HÁBILES DE desde A hasta)
+def fotos(desde, hasta):
+    fechas = pd.bdate_range(desde, hasta).date
+    tenencia = [100.0 + i for i in range(len(fechas))]
+    return pd.DataFrame({
+        "ticker": "AAPL", "cantidad": 10.0, "fecha_ejecucion": fechas, "moneda": "ARS", "costo": 90.0,
+        "tenencia": tenencia, "resultados": [t - 90.0 for t in tenencia], "rendimiento": 0.1
+    })
+
+
+def insertar(engine, df):
+    with engine.begin() as connection:
+        df.to_sql(historico_table.name, connection, if_exists="append", index=False)
+
+
+def compactar_historico(engine, corte):
+    with engine.begin() as connection:
+        return compactar(connection, historico_table.name, corte)
+
+
+def resumen_mensual(engine):
+    with engine.connect() as connection:
+        return pd.read_sql(
+            f"SELECT periodo, tenencia, tenencia_promedio, dias, ultima_fecha FROM {historico_mensual_table.name} "
+            "ORDER BY periodo", connection
+        )
+
+
+def test_compactar_dos_veces_las_mismas_filas_no_las_vuelve_a_sumar(engine):
+    enero = fotos("2020-01-06", "2020-01-17")
+    insertar(engine, enero)
+    assert compactar_historico(engine, date(2020, 2, 1)) == len(enero)
+    antes = resumen_mensual(engine)
+    assert antes["dias"].tolist() == [len(enero)]
+    assert antes["tenencia_promedio"].iloc[0] == pytest.approx(enero["tenencia"].mean())
+
+    ## LA RECONSTRUCCIÓN DEL HISTÓRICO VUELVE A INSERTAR LOS MISMOS DÍAS: SE BORRAN SIN CAMBIAR EL RESUMEN
+    insertar(engine, enero)
+    assert compactar_historico(engine, date(2020, 2, 1)) == len(enero)
+    pd.testing.assert_frame_equal(resumen_mensual(engine), antes)
+
+
+def test_los_dias_nuevos_de_un_periodo_resumido_se_combinan(engine):
+    enero = fotos("2020-01-06", "2020-01-17")
+    primera_semana = enero[enero["fecha_ejecucion"] < date(2020, 1, 11)]
+    insertar(engine, primera_semana)
+    compactar_historico(engine, date(2020, 1, 11))
+
+    ## EL MES COMPLETO (CON LA PRIMERA SEMANA REPETIDA) DEJA EL MISMO RESUMEN QUE UNA SOLA COMPACTACIÓN
+    insertar(engine, enero)
+    compactar_historico(engine, date(2020, 2, 1))
+    resumen = resumen_mensual(engine)
+    assert resumen["dias"].tolist() == [len(enero)]
+    assert resumen["tenencia_promedio"].iloc[0] == pytest.approx(enero["tenencia"].mean())
+    assert resumen["tenencia"].iloc[0] == enero["tenencia"].iloc[-1]
+    assert resumen["ultima_fecha"].iloc[0] == enero["fecha_ejecucion"].iloc[-1]
+
+    with engine.connect() as connection:
+        semanas = pd.read_sql(f"SELECT dias FROM {historico_semanal_table.name} ORDER BY periodo", connection)
+    assert semanas["dias"].tolist() == [5, 5]
@@ -0,0 +1,23 @@
+## REGISTRO EN pipeline_runs DE LAS EJECUCIONES QUE FALLAN AL LEER EL REPORTE
+import io
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+from pipeline import procesar_reporte
+
+
+def test_reporte_ilegible_queda_registrado_como_fallido(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cedears.sqlite'}")
+    archivo = io.BytesIO(b"esto no es un Excel")
+    archivo.name = "reporte.xlsx"
+
+    exito, mensaje = procesar_reporte([archivo], None, None, None, None, engine=engine)
+    assert not exito
+
+    with engine.connect() as connection:
+        ejecuciones = pd.read_sql("SELECT exito, mensaje FROM pipeline_runs", connection)
+    assert len(ejecuciones) == 1
+    assert not ejecuciones["exito"].iloc[0]
+    assert ejecuciones["mensaje"].iloc[0] == mensaje
+    engine.dispose()
@@ -0,0 +1,48 @@
+## CARGA COMPLETA Y REVALUACIÓN SOBRE UNA BASE SQLITE LOCAL (SIN RED)
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from datos_prueba import DolarFijo, cotizaciones_fijas, lotes_de_prueba
+from pipeline import revaluar, valuar_y_guardar
+from valuacion import COMISION_VENTA
+
+
+def test_revaluar_lee_los_lotes_guardados_en_sqlite(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cedears.sqlite'}")
+    exito, mensaje = valuar_y_guardar(lotes_de_prueba(), None, None, None, None, engine=engine,
+                                      fuente_cotizaciones=cotizaciones_fijas(2500.0), fuente_dolar=DolarFijo())
+    assert exito, mensaje
+
+    exito, mensaje = revaluar(None, None, None, None, engine=engine,
+                              fuente_cotizaciones=cotizaciones_fijas(3000.0), fuente_dolar=DolarFijo())
+    assert exito, mensaje
+
+    with engine.connect() as connection:
+        lotes = pd.read_sql("SELECT fecha, cantidad, tenencia_ars FROM cedears ORDER BY fecha", connection)
+    assert list(lotes["fecha"]) == ["2022-02-06", "2023-05-10", "2025-06-01"]
+    assert lotes["tenencia_ars"].tolist() == pytest.approx((lotes["cantidad"] * 3000.0 * (1 - COMISION_VENTA)).tolist())
+    engine.dispose()
+
+
+def test_un_ticker_sin_cotizacion_conserva_sus_valores_y_no_entra_en_la_foto(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cedears.sqlite'}")
+    exito, mensaje = valuar_y_guardar(lotes_de_prueba(), None, None, None, None, engine=engine,
+                                      fuente_cotizaciones=cotizaciones_fijas(2500.0), fuente_dolar=DolarFijo())
+    assert exito, mensaje
+    with engine.connect() as connection:
+        connection.execute(text("DELETE FROM datos_historicos_cedears"))
+        connection.commit()
+
+    exito, mensaje = revaluar(None, None, None, None, engine=engine, fuente_dolar=DolarFijo(),
+                              fuente_cotizaciones=cotizaciones_fijas(3000.0, sin_precio={"MSFT"}))
+    assert exito, mensaje
+
+    with engine.connect() as connection:
+        lotes = pd.read_sql("SELECT ticker, cantidad, tenencia_ars FROM cedears", connection)
+        fotos = pd.read_sql("SELECT DISTINCT ticker FROM datos_historicos_cedears", connection)
+    precio = lotes["tenencia_ars"] / (lotes["cantidad"] * (1 - COMISION_VENTA))
+    assert precio[lotes["ticker"] == "AAPL"].tolist() == pytest.approx([3000.0, 3000.0])
+    assert precio[lotes["ticker"] == "MSFT"].tolist() == pytest.approx([2500.0])
+    assert fotos["ticker"].tolist() == ["AAPL"]
+    engine.dispose()
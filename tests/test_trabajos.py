@@ -0,0 +1,68 @@
+## COLA DE TRABAJOS: UN TRABAJO EN CURSO Y UNO EN ESPERA POR BASE, LA CARGA MÁS RECIENTE REEMPLAZA A LA QUE ESPERA
+import threading
+import time
+
+from trabajos import EN_ESPERA, FALLIDO, REEMPLAZADO, TERMINADO, GestorTrabajos
+
+ESPERA = 5
+
+
+## FUNCIÓN DE TRABAJO QUE NO TERMINA HASTA QUE SE LIBERA SU EVENTO
+def trabajo_bloqueado(iniciado, liberar, ejecutados, nombre):
+    def funcion(progreso=None):
+        ejecutados.append(nombre)
+        iniciado.set()
+        liberar.wait(ESPERA)
+        return True, nombre
+    return funcion
+
+
+def esperar_fin(gestor, id_trabajo):
+    limite = time.monotonic() + ESPERA
+    while not gestor.obtener(id_trabajo).terminado:
+        assert time.monotonic() < limite
+        time.sleep(0.01)
+    return gestor.obtener(id_trabajo)
+
+
+def test_una_carga_nueva_reemplaza_a_la_que_espera_la_misma_base():
+    gestor = GestorTrabajos(max_workers=2)
+    ejecutados = []
+    iniciado, liberar = threading.Event(), threading.Event()
+    primero = gestor.encolar("base", trabajo_bloqueado(iniciado, liberar, ejecutados, "primero"))
+    assert iniciado.wait(ESPERA)
+
+    segundo = gestor.encolar("base", trabajo_bloqueado(threading.Event(), liberar, ejecutados, "segundo"))
+    tercero = gestor.encolar("base", trabajo_bloqueado(threading.Event(), liberar, ejecutados, "tercero"))
+    assert gestor.obtener(segundo).estado == REEMPLAZADO
+    assert gestor.obtener(tercero).estado == EN_ESPERA
+
+    liberar.set()
+    assert esperar_fin(gestor, primero).estado == TERMINADO
+    assert esperar_fin(gestor, tercero).mensaje == "tercero"
+    assert ejecutados == ["primero", "tercero"]
+
+
+def test_bases_distintas_se_ejecutan_a_la_vez():
+    gestor = GestorTrabajos(max_workers=2)
+    ejecutados = []
+    liberar = threading.Event()
+    iniciados = [threading.Event(), threading.Event()]
+    ids = [gestor.encolar(base, trabajo_bloqueado(iniciado, liberar, ejecutados, base))
+           for base, iniciado in zip(["a", "b"], iniciados)]
+    assert all(iniciado.wait(ESPERA) for iniciado in iniciados)
+    liberar.set()
+    assert [esperar_fin(gestor, id_trabajo).estado for id_trabajo in ids] == [TERMINADO, TERMINADO]
+
+
+def test_un_error_no_deja_la_base_bloqueada():
+    gestor = GestorTrabajos(max_workers=1)
+
+    def falla(progreso=None):
+        raise RuntimeError("sin conexión")
+
+    fallido = esperar_fin(gestor, gestor.encolar("base", falla))
+    assert fallido.estado == FALLIDO
+    assert "sin conexión" in fallido.mensaje
+    siguiente = gestor.encolar("base", lambda progreso=None: (True, "ok"))
+    assert esperar_fin(gestor, siguiente).estado == TERMINADO
@@ -0,0 +1,175 @@
+## EJECUCIÓN DE PROCESOS EN SEGUNDO PLANO
+# CADA CARGA SE ENCOLA EN UN POOL DE HILOS ACOTADO Y RECIBE UN ID. LA INTERFAZ CONSULTA EL ESTADO POR ESE ID,
+# ASÍ EL SCRIPT DE STREAMLIT NO QUEDA BLOQUEADO Y UNA RECARGA DEL NAVEGADOR NO PIERDE LA EJECUCIÓN.
+# POR CADA BASE DE DATOS HAY COMO MÁXIMO UN TRABAJO EN CURSO Y UNO EN ESPERA: UNA CARGA NUEVA REEMPLAZA A LA QUE
+# TODAVÍA ESPERA (LA ÚLTIMA CARGA ES LA QUE VALE) Y NUNCA HAY DOS TRABAJOS ESCRIBIENDO LA MISMA BASE A LA VEZ.
+# LOS TRABAJOS NO LLAMAN A STREAMLIT: SOLO REGISTRAN SU PROGRESO EN MEMORIA.
+
+## IMPORTACION DE BIBLIOTECAS
+import io
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from progreso import Progreso
+
+## ESTADOS DE UN TRABAJO
+EN_ESPERA = "en_espera"
+EN_CURSO = "en_curso"
+TERMINADO = "terminado"
+FALLIDO = "fallido"
+REEMPLAZADO = "reemplazado"
+
+ESTADOS_FINALES = (TERMINADO, FALLIDO, REEMPLAZADO)
+
+
+## ARCHIVO SUBIDO COPIADO EN MEMORIA (NO DEPENDE DE LA SESIÓN DE STREAMLIT QUE LO RECIBIÓ)
+class ArchivoEnMemoria(io.BytesIO):
+
+    def __init__(self, nombre, contenido):
+        super().__init__(contenido)
+        self.name = nombre
+
+
+## PROGRESO DE UN TRABAJO: GUARDA LO QUE LA INTERFAZ DEBE MOSTRAR
+class ProgresoTrabajo(Progreso):
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.fraccion = 0.0
+        self.texto = "En espera..."
+        self.archivos = {}
+        self.eventos = []
+        self.tiempos_etapas = None
+
+    def avance(self, fraccion, texto=None):
+        with self.lock:
+            self.fraccion = fraccion
+            if texto is not None:
+                self.texto = texto
+
+    def archivo(self, nombre, fraccion, texto=None):
+        with self.lock:
+            self.archivos[nombre] = (fraccion, texto)
+
+    def mensaje(self, texto):
+        with self.lock:
+            self.eventos.append(("mensaje", texto))
+
+    def advertencia(self, texto):
+        with self.lock:
+            self.eventos.append(("advertencia", texto))
+
+    def error(self, texto):
+        with self.lock:
+            self.eventos.append(("error", texto))
+
+    def tiempos(self, medicion):
+        with self.lock:
+            self.tiempos_etapas = medicion.resumen()
+
+    ## COPIA CONSISTENTE DEL ESTADO PARA MOSTRAR
+    def instantanea(self):
+        with self.lock:
+            return {
+                "fraccion": self.fraccion,
+                "texto": self.texto,
+                "archivos": dict(self.archivos),
+                "eventos": list(self.eventos),
+                "tiempos": self.tiempos_etapas
+            }
+
+
+## UN TRABAJO ENCOLADO
+class Trabajo:
+
+    def __init__(self, destino):
+        self.id = uuid.uuid4().hex[:12]
+        self.destino = destino
+        self.estado = EN_ESPERA
+        self.progreso = ProgresoTrabajo()
+        self.exito = None
+        self.mensaje = None
+        self.creado = time.time()
+        self.finalizado = None
+        # DATOS DE LA INTERFAZ QUE DEBEN SOBREVIVIR A UNA RECARGA (POR EJEMPLO EL DESTINO LOCAL A DESCARGAR)
+        self.adjuntos = {}
+
+    @property
+    def terminado(self):
+        return self.estado in ESTADOS_FINALES
+
+    def finalizar(self, estado, exito, mensaje):
+        self.exito = exito
+        self.mensaje = mensaje
+        self.finalizado = time.time()
+        self.estado = estado
+
+
+## ADMINISTRADOR DE TRABAJOS
+# max_workers: TRABAJOS SIMULTÁNEOS (DE BASES DISTINTAS)
+# max_terminados: TRABAJOS TERMINADOS QUE SE CONSERVAN PARA CONSULTAR SU RESULTADO
+class GestorTrabajos:
+
+    def __init__(self, max_workers=2, max_terminados=50):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="trabajo")
+        self.max_terminados = max_terminados
+        self.trabajos = OrderedDict()
+        self.en_curso = {}
+        self.en_espera = {}
+        self.lock = threading.Lock()
+
+    ## ENCOLA funcion(*args, progreso=..., **kwargs), QUE DEBE DEVOLVER (exito, mensaje). DEVUELVE EL ID DEL TRABAJO
+    # destino: CLAVE DE LA BASE DE DATOS (POR EJEMPLO (host, base, usuario))
+    def encolar(self, destino, funcion, *args, **kwargs):
+        trabajo = Trabajo(destino)
+        with self.lock:
+            self.trabajos[trabajo.id] = trabajo
+            self.descartar_terminados()
+            if destino in self.en_curso:
+                anterior = self.en_espera.get(destino)
+                if anterior is not None:
+                    anterior[0].finalizar(REEMPLAZADO, False, "Reemplazado por una carga más reciente a la misma base de datos.")
+                self.en_espera[destino] = (trabajo, funcion, args, kwargs)
+            else:
+                self.en_curso[destino] = trabajo
+                self.pool.submit(self.ejecutar, trabajo, funcion, args, kwargs)
+        return trabajo.id
+
+    def obtener(self, id_trabajo):
+        with self.lock:
+            return self.trabajos.get(id_trabajo)
+
+    ## EJECUCIÓN EN UN HILO DEL POOL; AL TERMINAR LANZA EL TRABAJO QUE ESPERABA LA MISMA BASE
+    def ejecutar(self, trabajo, funcion, args, kwargs):
+        trabajo.estado = EN_CURSO
+        try:
+            exito, mensaje = funcion(*args, progreso=trabajo.progreso, **kwargs)
+            trabajo.finalizar(TERMINADO if exito else FALLIDO, exito, mensaje)
+        except Exception as e:
+            trabajo.progreso.error(f"Error detallado: {e}")
+            trabajo.finalizar(FALLIDO, False, f"Error general en el procesamiento: {e}")
+        finally:
+            with self.lock:
+                siguiente = self.en_espera.pop(trabajo.destino, None)
+                if siguiente is None:
+                    self.en_curso.pop(trabajo.destino, None)
+                else:
+                    self.en_curso[trabajo.destino] = siguiente[0]
+                    self.pool.submit(self.ejecutar, *siguiente)
+
+    ## CONSERVA SOLO LOS ÚLTIMOS max_terminados TRABAJOS TERMINADOS (EL LOCK YA ESTÁ TOMADO)
+    def descartar_terminados(self):
+        terminados = [id_trabajo for id_trabajo, trabajo in self.trabajos.items() if trabajo.terminado]
+        for id_trabajo in terminados[:max(0, len(terminados) - self.max_terminados)]:
+            del self.trabajos[id_trabajo]
+
+
+## ADMINISTRADOR COMPARTIDO POR TODAS LAS SESIONES DEL PROCESO
+gestor_trabajos = GestorTrabajos(
+    max_workers=int(os.getenv("TRABAJOS_MAX_WORKERS", "2")),
+    max_terminados=int(os.getenv("TRABAJOS_MAX_TERMINADOS", "50"))
+)
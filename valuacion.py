@@ -0,0 +1,111 @@
+## MOTOR DE VALUACIÓN VECTORIZADO
+# TODOS LOS CÁLCULOS SE HACEN SOBRE ARRAYS DE NUMPY EN UNA SOLA PASADA.
+# LOS TICKERS SE MANEJAN COMO CATEGORÍAS: LA AGRUPACIÓN POR TICKER ES UN np.bincount SOBRE SUS CÓDIGOS.
+
+## IMPORTACION DE BIBLIOTECAS
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+## FECHA DESDE LA QUE EL COSTO EN USD SE CALCULA CON EL DÓLAR MÁS BAJO (OFICIAL O MEP)
+FECHA_CAMBIO_DOLAR = np.datetime64("2025-04-15")
+
+## COMISIÓN ESTIMADA DE VENTA
+COMISION_VENTA = 0.006
+
+## MÉTRICAS QUE SE SUMAN POR TICKER (EN ESTE ORDEN)
+METRICAS_AGRUPADAS = ["cantidad", "costo_ars", "costo_usd", "tenencia_ars", "tenencia_usd", "resultados_ars", "resultados_usd"]
+
+
+## ARRAY FLOAT64 DE UNA COLUMNA
+def columna_float(df, nombre):
+    return df[nombre].to_numpy(dtype="float64", na_value=np.nan)
+
+
+## CÁLCULO DE COSTO EN ARS Y EN USD DE CADA LOTE (NO DEPENDE DEL MERCADO)
+def calcular_costos(df_cedears):
+    cantidad = columna_float(df_cedears, "cantidad")
+    precio_compra = columna_float(df_cedears, "precio_compra")
+    gastos = columna_float(df_cedears, "gastos")
+    dolar_mep = columna_float(df_cedears, "dolar_mep")
+    dolar_oficial = columna_float(df_cedears, "dolar_oficial")
+    fechas = df_cedears["fecha"].to_numpy(dtype="datetime64[ns]")
+
+    costo_ars = cantidad * precio_compra + gastos
+    # ANTES DEL 15/04/2025 SE USA EL MEP; DESDE ESA FECHA, EL MENOR ENTRE OFICIAL Y MEP
+    dolar_costo = np.where(fechas < FECHA_CAMBIO_DOLAR, dolar_mep, np.minimum(dolar_oficial, dolar_mep))
+
+    df_cedears["costo_ars"] = costo_ars
+    df_cedears["costo_usd"] = costo_ars / dolar_costo
+    return df_cedears
+
+
+## CÓDIGOS DE TICKER (CATEGÓRICOS) Y LISTA DE TICKERS
+def codificar_tickers(df_cedears):
+    if not isinstance(df_cedears["ticker"].dtype, pd.CategoricalDtype):
+        df_cedears["ticker"] = df_cedears["ticker"].astype("category")
+    categorias = df_cedears["ticker"].cat.categories
+    return df_cedears["ticker"].cat.codes.to_numpy(), categorias
+
+
+## VALUACIÓN DE LOTES Y ARMADO DEL HISTÓRICO POR TICKER Y MONEDA
+# DEVUELVE (df_cedears CON LAS COLUMNAS DE MERCADO, df_historico EN FORMATO LARGO ars/usd)
+def valuar_lotes(df_cedears, cotizaciones, dolar_oficial, dolar_mep, fecha_ejecucion=None):
+    codigos, categorias = codificar_tickers(df_cedears)
+    cantidad_tickers = len(categorias)
+
+    ## PRECIO ACTUAL DE CADA LOTE. LOS LOTES DE TICKERS SIN COTIZACIÓN QUEDAN CON LAS COLUMNAS DE MERCADO EN NaN
+    # (SIN VALUAR, NO EN 0) Y SUS TICKERS NO ENTRAN EN LA FOTO DEL DÍA
+    precios_ticker = np.array([cotizaciones.get(t, np.nan) for t in categorias], dtype="float64")
+    cotizados = ~np.isnan(precios_ticker)
+    precio_lote = precios_ticker[codigos]
+
+    cantidad = columna_float(df_cedears, "cantidad")
+    costo_ars = columna_float(df_cedears, "costo_ars")
+    costo_usd = columna_float(df_cedears, "costo_usd")
+    dolar_venta = min(dolar_oficial, dolar_mep)
+
+    ## MÉTRICAS POR LOTE
+    tenencia_ars = cantidad * precio_lote * (1 - COMISION_VENTA)
+    tenencia_usd = tenencia_ars / dolar_venta
+    resultados_ars = tenencia_ars - costo_ars
+    resultados_usd = tenencia_usd - costo_usd
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rendimiento_ars = np.round((tenencia_ars / costo_ars - 1) * 100, 2)
+        rendimiento_usd = np.round((tenencia_usd / costo_usd - 1) * 100, 2)
+
+    df_cedears["tenencia_ars"] = tenencia_ars
+    df_cedears["tenencia_usd"] = tenencia_usd
+    df_cedears["resultados_ars"] = resultados_ars
+    df_cedears["resultados_usd"] = resultados_usd
+    df_cedears["rendimiento_ars"] = rendimiento_ars
+    df_cedears["rendimiento_usd"] = rendimiento_usd
+
+    ## SUMAS POR TICKER: UNA MATRIZ (MÉTRICA x TICKER) CON np.bincount
+    valores = [cantidad, costo_ars, costo_usd, tenencia_ars, tenencia_usd, resultados_ars, resultados_usd]
+    sumas = np.round(np.vstack([np.bincount(codigos, weights=v, minlength=cantidad_tickers) for v in valores]), 2)
+    ## UNA FOTO SIN PRECIO (TENENCIA 0) NO SE PODRÍA CORREGIR DESPUÉS: LA FOTO DEL DÍA SE INSERTA UNA SOLA VEZ
+    presentes = (np.bincount(codigos, minlength=cantidad_tickers) > 0) & cotizados
+    sumas = sumas[:, presentes]
+    tickers = categorias[presentes]
+    suma = dict(zip(METRICAS_AGRUPADAS, sumas))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rendimiento_ticker_ars = suma["resultados_ars"] / suma["costo_ars"]
+        rendimiento_ticker_usd = suma["resultados_usd"] / suma["costo_usd"]
+
+    ## FORMATO LARGO DIRECTO: PRIMERO TODAS LAS FILAS EN ARS Y LUEGO TODAS EN USD
+    cantidad_filas = len(tickers)
+    fecha_ejecucion = fecha_ejecucion or datetime.now().date()
+    df_historico = pd.DataFrame({
+        "ticker": pd.Categorical(np.tile(tickers.to_numpy(), 2), categories=tickers),
+        "cantidad": np.tile(suma["cantidad"], 2),
+        "fecha_ejecucion": fecha_ejecucion,
+        "moneda": pd.Categorical.from_codes(np.repeat([0, 1], cantidad_filas), categories=["ars", "usd"]),
+        "costo": np.concatenate([suma["costo_ars"], suma["costo_usd"]]),
+        "tenencia": np.concatenate([suma["tenencia_ars"], suma["tenencia_usd"]]),
+        "resultados": np.concatenate([suma["resultados_ars"], suma["resultados_usd"]]),
+        "rendimiento": np.concatenate([rendimiento_ticker_ars, rendimiento_ticker_usd])
+    })
+    return df_cedears, df_historico